@@ -0,0 +1,146 @@
+import os
+import json
+import time
+from argparse import ArgumentParser
+from benchmarks.transfer import LoopMonitor
+
+"""
+Banc d'essai du fil des messages d'un salon : des messages arrivent au rythme demandé (comme s'ils venaient du socket,
+dans le thread du GUI) et sont affichés par un RoomFeed visible.
+
+    python -m benchmarks.room_feed --rates 1000,10000,50000 --duration 3 --output room_feed.json
+
+Modes :
+- buffered : RoomFeed.append_to_messages_feed, les messages sont ajoutés par lots une fois par image (MessageBuffer) ;
+- direct : chaque message est ajouté au modèle dès son arrivée (MessageModel.append) ;
+- html : l'affichage d'origine, un bloc HTML ajouté à un QTextBrowser par message (limité à --html-max messages/s, car
+  il ralentit à mesure que le document grandit).
+
+Pour chaque rythme, le banc mesure le retard de la boucle d'événements (LoopMonitor), le nombre d'images manquées
+(retard de plus de FRAME ms), le rythme réellement atteint et les messages encore en attente à la fin. Un rythme est
+tenu si le rythme atteint est celui demandé, si le 99e centile du retard reste sous une image et si le tampon est vide
+une image après la fin de la rafale.
+"""
+
+DEFAULT_RATES = "1000,5000,10000,20000,50000,100000"
+PRODUCER_INTERVAL = 1 # ms entre deux arrivées de messages
+FRAME = 16 # ms
+
+def message(i: int):
+    from src.components.room_utils import Message, MessageType
+    if i % 50 == 0:
+        return Message(MessageType.JOIN, f"peer{i % 97}", "")
+    text = f"message {i} " + "lorem ipsum dolor sit amet " * (i % 5)
+    if i % 10 == 0:
+        text += "\nsecond line\nthird line"
+    return Message(MessageType.MESSAGE, f"peer{i % 97}", text)
+
+def run_case(app, mode: str, rate: int, duration: float) -> dict:
+    from PySide6.QtCore import QTimer, Qt, QEventLoop
+    from PySide6.QtWidgets import QTextBrowser
+    from src.components.RoomPage import RoomFeed
+
+    feed = RoomFeed()
+    feed.resize(900, 600)
+    feed.show()
+    if mode == "html":
+        browser = QTextBrowser()
+        browser.resize(900, 600)
+        browser.show()
+        def push(message): # RoomFeed.append_to_messages_feed d'origine
+            alias, text, event = message.alias, message.text(), message.is_event()
+            if event:
+                formatted_message = f"<div><span style='color: gray; font-style: italic; padding-right: 50px;'>{text}</span></div>"
+            else:
+                with_br = text.replace('\n', '<br>')
+                formatted_message = f"<div><span style='color: gray; font-style: italic; padding-right: 50px;'>{alias}: </span>{with_br}</div>"
+            browser.append(formatted_message)
+    elif mode == "direct":
+        push = feed._messages_model.append
+    else:
+        push = feed.append_to_messages_feed
+    app.processEvents()
+
+    monitor = LoopMonitor()
+    loop = QEventLoop()
+    produced = 0
+    start = time.perf_counter()
+    producer = QTimer()
+    producer.setTimerType(Qt.TimerType.PreciseTimer)
+    producer.setInterval(PRODUCER_INTERVAL)
+
+    def produce():
+        nonlocal produced
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            producer.stop()
+            QTimer.singleShot(FRAME, loop.quit) # une image pour vider le tampon
+            return
+        due = int(rate * elapsed)
+        while produced < due:
+            push(message(produced))
+            produced += 1
+
+    producer.timeout.connect(produce)
+    monitor.start()
+    producer.start()
+    loop.exec()
+    monitor.stop()
+    elapsed = time.perf_counter() - start
+
+    delays = monitor._delays
+    result = {
+        "mode": mode,
+        "rate": rate,
+        "achieved": round(produced / min(elapsed, duration)),
+        "loop_delay_ms": monitor.summary(),
+        "missed_frames": sum(delay > FRAME for delay in delays),
+        "pending": feed._messages_buffer.pending() if mode == "buffered" else 0,
+        "dropped": feed._messages_buffer.dropped() if mode == "buffered" else 0,
+    }
+    result["sustained"] = result["achieved"] >= 0.95 * rate and result["loop_delay_ms"]["p99"] < FRAME and result["pending"] == 0
+    feed.close()
+    feed.deleteLater()
+    if mode == "html":
+        browser.close()
+        browser.deleteLater()
+    app.processEvents()
+    return result
+
+def format_result(result: dict) -> str:
+    delay = result["loop_delay_ms"]
+    return (f"{result['mode']:<8} {result['rate']:>7} msg/s -> {result['achieved']:>7} msg/s  delay p99 {delay['p99']:>7.2f} ms  "
+            f"max {delay['max']:>7.2f} ms  missed frames {result['missed_frames']:>4}  pending {result['pending']:>6}  "
+            f"{'ok' if result['sustained'] else 'NOT SUSTAINED'}")
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Banc d'essai du fil des messages d'un salon")
+    parser.add_argument("--rates", default=DEFAULT_RATES, help="rythmes d'arrivée des messages (messages/s)")
+    parser.add_argument("--modes", default="buffered,direct,html")
+    parser.add_argument("--duration", type=float, default=3.0, help="durée de chaque rafale (s)")
+    parser.add_argument("--html-max", type=int, default=5000, help="rythme maximal essayé en mode html (messages/s)")
+    parser.add_argument("--output", default="room_feed.json")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    app = QApplication([])
+
+    results = []
+    for mode in args.modes.split(","):
+        for rate in (int(rate) for rate in args.rates.split(",")):
+            if mode == "html" and rate > args.html_max:
+                continue
+            results.append(run_case(app, mode, rate, args.duration))
+            print(format_result(results[-1]), flush=True)
+
+    sustained = {}
+    for result in results:
+        if result["sustained"]:
+            sustained[result["mode"]] = max(sustained.get(result["mode"], 0), result["rate"])
+    for mode, rate in sustained.items():
+        print(f"{mode:<8} sustains {rate} msg/s without missing frames")
+
+    with open(args.output, "w") as file:
+        json.dump({ "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "duration": args.duration, "results": results, "sustained": sustained }, file, indent=2)
+    print(f"Results written to {args.output}")
@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import importlib
+import time
+import resource
+import subprocess
+import tracemalloc
+from argparse import ArgumentParser
+
+"""
+Mémoire occupée par les messages conservés dans le fil d'un salon :
+
+    python -m benchmarks.room_memory --count 10000 --output room_memory.json
+
+Les messages sont décodés à partir du JSON diffusé par le serveur, comme dans Connection, puis conservés sous l'une des
+formes suivantes :
+- html : le fil d'origine, un bloc HTML par message dans un QTextBrowser ;
+- tuples : une ligne (alias, texte, event, first) par ligne de message, le texte des événements étant construit à la
+  réception (fil modèle/vue avant les Message) ;
+- records : MessageModel et ses Message (alias internés, texte construit au moment de dessiner).
+
+Chaque forme est mesurée dans un processus à part : octets alloués par Python (tracemalloc, sauf html dont le document
+est alloué par Qt) et augmentation du pic de mémoire du processus (RSS), rapportés au nombre de messages. La taille des
+textes reçus (chaînes Python) est donnée comme référence : c'est le minimum à conserver, le reste est le coût de la forme.
+"""
+
+MODES = ["html", "tuples", "records"]
+ALIASES = 200 # nombre de pairs qui écrivent dans le salon
+
+def frames(count: int) -> list[str]:
+    """Messages JSON tels que diffusés par le serveur : surtout des textes, quelques arrivées et départs."""
+    result = []
+    for i in range(count):
+        _type = "JOIN" if i % 40 == 0 else "LEAVE" if i % 40 == 1 else "MESSAGE"
+        body = f"message {i} " + "lorem ipsum dolor sit amet " * (i % 4) + ("\nsecond line" if i % 10 == 2 else "")
+        result.append(json.dumps({ "type": _type, "alias": f"peer-{i % ALIASES:04}", "body": body if _type == "MESSAGE" else "" }))
+    return result
+
+def keep_html(app, messages: list[str]):
+    from PySide6.QtWidgets import QTextBrowser
+    browser = QTextBrowser()
+    for message in messages: # Connection.handle_message et RoomFeed.append_to_messages_feed d'origine
+        data = json.loads(message)
+        _str = data["body"] if data["type"] == "MESSAGE" else f"{data['alias']} has {'joined' if data['type'] == 'JOIN' else 'left'} the room."
+        if data["type"] != "MESSAGE":
+            browser.append(f"<div><span style='color: gray; font-style: italic; padding-right: 50px;'>{_str}</span></div>")
+        else:
+            with_br = _str.replace('\n', '<br>')
+            browser.append(f"<div><span style='color: gray; font-style: italic; padding-right: 50px;'>{data['alias']}: </span>{with_br}</div>")
+    app.processEvents()
+    return browser
+
+def keep_tuples(app, messages: list[str]):
+    rows = []
+    for message in messages:
+        data = json.loads(message)
+        event = data["type"] != "MESSAGE"
+        text = data["body"] if not event else f"{data['alias']} has {'joined' if data['type'] == 'JOIN' else 'left'} the room."
+        rows.extend((data["alias"], line, event, i == 0) for i, line in enumerate(text.split("\n")))
+    return rows
+
+def keep_records(app, messages: list[str]):
+    from src.components.MessageFeed import MessageModel
+    from src.components.room_utils import Message, loads
+    model = MessageModel(scrollback=4 * len(messages)) # aucun message n'est retiré
+    model.append_batch([Message.from_data(loads(message)) for message in messages])
+    return model
+
+def run_case(mode: str, count: int):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    # modules importés avant la mesure, pour que leur chargement ne soit pas compté dans la mémoire des messages
+    for module in ("src.components.MessageFeed", "src.components.room_utils"):
+        importlib.import_module(module)
+    app = QApplication([])
+    messages = frames(count)
+    app.processEvents()
+
+    text_bytes = sum(sys.getsizeof(json.loads(message)["body"]) for message in messages)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    tracemalloc.start()
+    kept = { "html": keep_html, "tuples": keep_tuples, "records": keep_records }[mode](app, messages)
+    python_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps({
+        "mode": mode,
+        "count": count,
+        "text_bytes_per_message": round(text_bytes / count, 1),
+        "python_bytes_per_message": None if mode == "html" else round(python_bytes / count, 1),
+        "rss_bytes_per_message": round((rss_after - rss_before) / count, 1),
+    }), flush=True)
+    del kept
+
+def format_result(result: dict) -> str:
+    python = result["python_bytes_per_message"]
+    return (f"{result['mode']:<8} {result['count']:>8} messages  text {result['text_bytes_per_message']:>7} B/message  "
+            f"python {'-' if python is None else python:>7} B/message  peak RSS {result['rss_bytes_per_message']:>7} B/message")
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Mémoire occupée par les messages conservés dans le fil d'un salon")
+    parser.add_argument("--count", type=int, default=10000, help="nombre de messages conservés")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--output", default="room_memory.json")
+    parser.add_argument("--case", help="(interne) mesure une seule forme")
+    args = parser.parse_args()
+
+    if args.case is not None:
+        run_case(args.case, args.count)
+        sys.exit(0)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = []
+    for mode in args.modes.split(","):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.room_memory", "--case", mode, "--count", str(args.count)],
+                                cwd=root, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+        print(format_result(results[-1]), flush=True)
+
+    with open(args.output, "w") as file:
+        json.dump({ "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results }, file, indent=2)
+    print(f"Results written to {args.output}")
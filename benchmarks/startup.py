@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import time
+import statistics
+import subprocess
+from argparse import ArgumentParser
+
+"""
+Temps de démarrage de l'interface graphique et de la ligne de commande (python main.py send|recv) :
+
+    python -m benchmarks.startup --runs 10 --output startup.json
+
+Chaque point lance un nouvel interpréteur qui importe et construit ce que construit main.py avant la boucle d'événements,
+puis traite une fois les événements en attente. Le démarrage d'un interpréteur vide est mesuré comme référence, et celui
+de la ligne de commande est comparé à celui de la fenêtre seule.
+La connexion n'est pas mesurée : le socket d'une transaction n'est créé qu'à son ouverture (le premier QWebSocket charge le
+backend TLS de Qt), et les modules propres à certains transferts sont importés à la demande (voir transfer_utils).
+Les fichiers .pyc sont écrits au premier lancement de chaque point, même si PYTHONDONTWRITEBYTECODE est défini : sans
+eux, chaque lancement recompilerait les modules modifiés.
+"""
+
+SNIPPETS = {
+    "python": "pass",
+    "cli": (
+        "from PySide6.QtCore import QCoreApplication\n"
+        "from src.components.CommandLine import ReceiveCommand\n"
+        "app = QCoreApplication([])\n"
+        "command = ReceiveCommand('00000000-0000-4000-8000-000000000000')\n"
+        "app.processEvents()\n"
+    ),
+    "gui": (
+        "from PySide6.QtWidgets import QApplication\n"
+        "from src.components.Application import Application\n"
+        "app = QApplication([])\n"
+        "window = Application()\n"
+        "window.show()\n"
+        "app.processEvents()\n"
+    )
+}
+
+def measure(snippet: str, root: str, env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", snippet], cwd=root, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Temps de démarrage de l'interface graphique et de la ligne de commande")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", default="startup.json")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = { **os.environ, "QT_QPA_PLATFORM": os.environ.get("QT_QPA_PLATFORM", "offscreen") }
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    results = {}
+    for name, snippet in SNIPPETS.items():
+        measure(snippet, root, env) # premier lancement : remplit les caches du système
+        times = [measure(snippet, root, env) for _ in range(args.runs)]
+        results[name] = { "median_ms": round(1000 * statistics.median(times), 1), "min_ms": round(1000 * min(times), 1) }
+        print(f"{name:<8} median {results[name]['median_ms']:>7.1f} ms  min {results[name]['min_ms']:>7.1f} ms", flush=True)
+    results["cli"]["gui_ratio"] = round(results["cli"]["median_ms"] / results["gui"]["median_ms"], 2)
+    print(f"cli/gui  {results['cli']['gui_ratio']:.2f}")
+
+    with open(args.output, "w") as file:
+        json.dump({ "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "runs": args.runs, "results": results }, file, indent=2)
+    print(f"Results written to {args.output}")
@@ -0,0 +1,530 @@
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+from argparse import ArgumentParser
+from uuid import uuid4
+
+"""
+Banc d'essai des transferts, sans interface graphique : un TransactionSender et un TransactionReceiver échangent un fichier
+à travers le serveur local (server.py) en boucle locale.
+
+    python -m benchmarks.transfer --sizes 1K,1M,100M --chunks 2K,256K,auto --output results.json
+    python -m benchmarks.transfer --compare before.json after.json
+    python -m benchmarks.transfer --sizes 64M --chunks auto --writers buffered,threaded,mapped
+    python -m benchmarks.transfer --sizes 100M,1G --chunks auto --streams 1,2,4,8 --latency 50
+
+Chaque cas (taille de fichier, taille de chunk, écriture du fichier reçu, nombre de streams) est exécuté dans un processus
+à part, pour que le pic de mémoire mesuré soit celui du cas. Comme entre deux instances du client, l'émetteur et le receveur
+ont chacun leur processus (voir ReceiverProcess) : le pic de mémoire, le temps CPU et la latence de la boucle d'événements
+sont mesurés de chaque côté, ceux du receveur étant rapportés dans "receiver". Le débit est mesuré par l'émetteur, entre
+l'acceptation de la transaction et l'annonce par le receveur de la fin de la réception, vérification comprise.
+La latence de la boucle d'événements est le retard d'un QTimer de LOOP_INTERVAL ms : c'est le temps pendant lequel le GUI
+de ce côté serait resté figé.
+Un cas échoue aussi s'il laisse un fichier de reprise à côté du fichier reçu : un fichier d'exactement CHECKPOINT_INTERVAL
+octets (64M) fait coïncider le dernier enregistrement de la progression avec la fin du transfert.
+
+Le premier point de mesure reproduit l'envoi d'origine (Sender.send_file) : chunks de 2 Kio lus et envoyés d'une traite
+dans le thread du GUI, chaque chunk étant ajouté au fichier reçu par une nouvelle ouverture du fichier.
+Les derniers (mode "allocations", un stream) refont les cas de l'émetteur sous tracemalloc pour mesurer la mémoire allouée
+par Python pour chaque chunk envoyé (voir AllocationTracer) : leur débit, ralenti par tracemalloc, n'est pas comparable.
+"""
+
+DEFAULT_SIZES = "1K,1M,100M,1G,10G"
+DEFAULT_CHUNKS = "2K,64K,256K,1M,8M,auto" # auto : taille adaptative par défaut (ChunkSizer)
+DEFAULT_WRITERS = "buffered" # buffered : FileWriter, threaded : ThreadedFileWriter, mapped : MappedFileWriter
+DEFAULT_STREAMS = "1" # nombres de streams parallèles (voir split_ranges), à comparer avec la latence du serveur (--latency)
+BASELINE_CHUNK = 2048
+BASELINE_MAX_SIZE = 256 * 1024 * 1024 # l'envoi d'origine garde tout le fichier en mémoire : au-delà, le cas est ignoré
+ALLOCATIONS_MAX_SIZE = 256 * 1024 * 1024 # au-delà, les cas sous tracemalloc sont ignorés (les chunks mesurés suffisent)
+LOOP_INTERVAL = 10 # ms
+UNITS = { "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3 }
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper().removesuffix("IB").removesuffix("B")
+    if text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def make_file(path: str, size: int):
+    """Écrit size octets aléatoires (incompressibles) dans path."""
+    block = 64 * 1024 * 1024
+    with open(path, "wb") as file:
+        while size > 0:
+            file.write(os.urandom(min(block, size)))
+            size -= block
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+class LoopMonitor:
+    """Mesure le retard d'un QTimer périodique dans la boucle d'événements du thread principal."""
+    def __init__(self):
+        from PySide6.QtCore import QTimer, Qt
+        self._delays = []
+        self._last = None
+        self._timer = QTimer()
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(LOOP_INTERVAL)
+        self._timer.timeout.connect(self.on_timeout)
+
+    def start(self):
+        self._last = time.perf_counter()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def on_timeout(self):
+        now = time.perf_counter()
+        self._delays.append(max(0.0, (now - self._last) * 1000 - LOOP_INTERVAL))
+        self._last = now
+
+    def summary(self) -> dict:
+        delays = sorted(self._delays) or [0.0]
+        return { "max": round(delays[-1], 2), "p99": round(delays[int(0.99 * (len(delays) - 1))], 2), "mean": round(sum(delays) / len(delays), 2) }
+
+class AllocationTracer:
+    """
+    Mesure avec tracemalloc la mémoire allouée par Python pour chaque chunk envoyé : Sender.pump est enveloppé, et chaque
+    chunk se termine par l'appel de ProgressReporter.add qui compte ses octets. Pour chaque chunk, le pic de mémoire tracée
+    au-dessus du niveau de son début est retenu : un bytes alloué par chunk y apparaît en entier, alors que le tampon
+    QByteArray réutilisé et sa copie dans le tampon du socket, alloués par Qt, ne sont pas tracés.
+    Les autres threads allouent aussi pendant la mesure : la médiane est plus représentative que le maximum.
+    """
+    def __init__(self):
+        self._sizes = [] # pic de chaque chunk (octets)
+        self._local = threading.local() # tracing : le thread courant exécute Sender.pump
+
+    def install(self):
+        import tracemalloc
+        from src.components.TransactionHandlers import Sender, ProgressReporter
+
+        pump, add = Sender.pump, ProgressReporter.add
+        local, sizes = self._local, self._sizes
+        def start_chunk():
+            tracemalloc.reset_peak()
+            local.base = tracemalloc.get_traced_memory()[0]
+        def traced_pump(sender):
+            local.tracing = True
+            start_chunk()
+            try:
+                pump(sender)
+            finally:
+                local.tracing = False
+        def traced_add(reporter, n: int):
+            tracing = getattr(local, "tracing", False)
+            if tracing:
+                sizes.append(tracemalloc.get_traced_memory()[1] - local.base)
+            add(reporter, n)
+            if tracing:
+                start_chunk()
+        Sender.pump, ProgressReporter.add = traced_pump, traced_add
+        tracemalloc.start()
+
+    def summary(self) -> dict:
+        sizes = sorted(self._sizes) or [0]
+        return { "chunks": len(self._sizes), "median_bytes": sizes[len(sizes) // 2], "mean_bytes": round(sum(sizes) / len(sizes)), "max_bytes": sizes[-1] }
+
+class ReceiverProcess:
+    """
+    Lance le côté receveur du cas dans un processus à part (--role receiver), pour que la latence de la boucle d'événements,
+    le temps CPU et la mémoire mesurés de chaque côté soient ceux d'un seul pair, comme dans deux instances du client.
+    Le receveur écrit "connected" sur la sortie standard une fois son socket ouvert (envoi d'origine), puis son résultat :
+    connected() puis done(résultat) sont alors appelés, ou failed() s'il se termine sans résultat.
+    """
+    def __init__(self, args):
+        from PySide6.QtCore import QProcess
+        self._args = args
+        self._result = None
+        self.connected = self.done = self.failed = lambda *_: None
+        self._process = QProcess()
+        self._process.setProcessChannelMode(QProcess.ProcessChannelMode.ForwardedErrorChannel) # erreurs visibles du banc
+        self._process.readyReadStandardOutput.connect(self.on_output)
+        self._process.finished.connect(self.on_finished)
+
+    def start(self, transaction_id: str):
+        args = self._args
+        self._process.start(sys.executable, ["-m", "benchmarks.transfer", "--case", "--role", "receiver", "--transaction", transaction_id,
+                                             "--mode", "baseline" if args.mode == "baseline" else "engine", "--size", str(args.size), "--writer", args.writer,
+                                             "--destination", args.destination, "--timeout", str(args.timeout)])
+
+    def on_output(self):
+        while self._process.canReadLine():
+            line = self._process.readLine().data().decode().strip()
+            if line == "connected":
+                self.connected()
+            elif line:
+                self._result = json.loads(line)
+                self.done(self._result)
+
+    def on_finished(self):
+        self.on_output()
+        if self._result is None:
+            self.failed()
+
+    def stop(self):
+        from PySide6.QtCore import QProcess
+        if self._process.state() != QProcess.ProcessState.NotRunning:
+            self._process.kill()
+            self._process.waitForFinished()
+
+def run_engine(filepath: str, chunk: int | None, streams: int, finish, receiver: ReceiverProcess):
+    """Côté émetteur d'un transfert par TransactionSender, le receveur (TransactionReceiver) étant lancé dans receiver."""
+    from PySide6.QtCore import QTimer
+    from src.components.TransactionHandlers import TransactionSender
+
+    transaction_id = str(uuid4())
+    sender = TransactionSender(transaction_id, filepath)
+    sender.set_streams(streams)
+    if chunk is not None:
+        sender.set_chunk_size(chunk, adaptive=False)
+
+    def on_accepted():
+        finish.start()
+        sender.start()
+
+    sender.transaction_accepted.connect(on_accepted)
+    sender.offer()
+    QTimer.singleShot(100, lambda: receiver.start(transaction_id)) # le receveur rejoint une fois la transaction créée
+    return sender
+
+def receive_engine(transaction_id: str, destination: str, writer: str, finish, done):
+    """Côté receveur d'un transfert par TransactionReceiver ; done() est appelé une fois le fichier reçu et vérifié."""
+    from src.components.TransactionHandlers import TransactionReceiver
+
+    receiver = TransactionReceiver(transaction_id)
+    receiver.set_writer(threaded=writer == "threaded", mapped=writer == "mapped")
+
+    def on_infos(filename: str, filesize: int):
+        receiver.set_filepath(destination)
+        finish.start()
+        receiver.accept()
+    def on_finished():
+        finish.stop()
+        receiver.close()
+        done()
+
+    receiver.infos_received.connect(on_infos)
+    receiver.transaction_finished.connect(on_finished)
+    receiver.open()
+    return receiver
+
+def run_baseline(filepath: str, finish, receiver: ReceiverProcess):
+    """Reproduction de l'envoi d'origine : tout le fichier est envoyé en chunks de 2 Kio depuis le thread du GUI."""
+    from PySide6.QtWebSockets import QWebSocket
+    from src.vars import SERVER_DOMAIN
+
+    transaction_id = str(uuid4())
+    sender = QWebSocket()
+
+    def on_open():
+        finish.start()
+        with open(filepath, "rb") as file:
+            while True:
+                chunk = file.read(BASELINE_CHUNK)
+                if not chunk:
+                    break
+                sender.sendBinaryMessage(chunk)
+
+    receiver.connected = lambda: sender.open(f"{SERVER_DOMAIN}/transaction/{transaction_id}/bin?sender=true")
+    sender.connected.connect(on_open)
+    receiver.start(transaction_id)
+    return sender
+
+def receive_baseline(transaction_id: str, destination: str, size: int, finish, done, connected):
+    """Réception d'origine : chaque chunk est ajouté au fichier reçu par une nouvelle ouverture du fichier."""
+    from PySide6.QtWebSockets import QWebSocket
+    from src.vars import SERVER_DOMAIN
+
+    receiver = QWebSocket()
+    with open(destination, "w"):
+        pass
+
+    received = [0]
+    def on_received(data):
+        chunk = data.data()
+        with open(destination, "ab") as file:
+            file.write(chunk)
+        received[0] += len(chunk)
+        if received[0] == size:
+            finish.stop()
+            receiver.close()
+            done()
+    def on_connected():
+        finish.start()
+        connected()
+
+    receiver.binaryMessageReceived.connect(on_received)
+    receiver.connected.connect(on_connected)
+    receiver.open(f"{SERVER_DOMAIN}/transaction/{transaction_id}/bin?sender=false")
+    return receiver
+
+class Stopwatch:
+    """Temps écoulé et temps CPU du processus (tous threads) entre start() et stop()."""
+    def __init__(self, monitor: LoopMonitor):
+        self._monitor = monitor
+        self.wall = self.cpu = None
+
+    def start(self):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        self._cpu = usage.ru_utime + usage.ru_stime
+        self._wall = time.perf_counter()
+        self._monitor.start()
+
+    def stop(self):
+        self._monitor.stop()
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        self.wall = time.perf_counter() - self._wall
+        self.cpu = usage.ru_utime + usage.ru_stime - self._cpu
+
+def side_result(stopwatch: Stopwatch, monitor: LoopMonitor) -> dict:
+    """Mesures propres au processus courant (un seul pair du transfert)."""
+    result = {}
+    if stopwatch.wall is not None:
+        result["cpu_percent"] = round(100 * stopwatch.cpu / stopwatch.wall, 1)
+        result["loop_latency_ms"] = monitor.summary()
+    result["peak_rss_mib"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return result
+
+def run_receiver(args):
+    """Côté receveur d'un cas : écrit ses propres mesures (JSON) sur la sortie standard une fois le fichier reçu."""
+    from PySide6.QtCore import QCoreApplication, QTimer
+
+    app = QCoreApplication([])
+    monitor = LoopMonitor()
+    stopwatch = Stopwatch(monitor)
+    def done():
+        print(json.dumps(side_result(stopwatch, monitor)), flush=True)
+        QTimer.singleShot(0, app.quit)
+    if args.mode == "baseline":
+        receiver = receive_baseline(args.transaction, args.destination, args.size, stopwatch, done, lambda: print("connected", flush=True))
+    else:
+        receiver = receive_engine(args.transaction, args.destination, args.writer, stopwatch, done)
+    QTimer.singleShot(args.timeout * 1000, app.quit)
+    app.exec()
+    receiver.close() # le receveur doit vivre jusqu'ici : ses sockets sont fermés même après le délai
+
+def run_case(args):
+    """
+    Exécute un cas (côté émetteur dans ce processus, côté receveur dans un processus à part) et écrit son résultat (JSON) sur
+    la sortie standard. Le débit est mesuré par l'émetteur, jusqu'à ce que le receveur annonce la fin de la réception.
+    """
+    from PySide6.QtCore import QCoreApplication, QTimer
+    from src.vars import CHECKPOINT_SUFFIX, LEAVES_SUFFIX
+
+    app = QCoreApplication([])
+    monitor = LoopMonitor()
+    stopwatch = Stopwatch(monitor)
+    chunk = None if args.chunk == "auto" else parse_size(args.chunk)
+    streams = int(args.streams)
+    receiver = ReceiverProcess(args)
+    tracer = None
+    if args.mode == "allocations":
+        tracer = AllocationTracer()
+        tracer.install()
+    if args.mode == "baseline":
+        sender = run_baseline(args.file, stopwatch, receiver)
+    else:
+        sender = run_engine(args.file, chunk, streams, stopwatch, receiver)
+    received = {}
+    def on_done(result: dict):
+        stopwatch.stop()
+        received.update(result)
+        sender.close()
+        QTimer.singleShot(0, app.quit)
+    receiver.done = on_done
+    receiver.failed = app.quit
+    QTimer.singleShot(args.timeout * 1000, app.quit)
+    app.exec()
+    receiver.stop()
+
+    result = { "mode": args.mode, "size": args.size, "chunk": args.chunk, "writer": args.writer, "streams": streams, "ok": stopwatch.wall is not None }
+    if result["ok"]:
+        leftovers = [suffix for suffix in (CHECKPOINT_SUFFIX, LEAVES_SUFFIX) if os.path.exists(args.destination + suffix)]
+        if leftovers:
+            result["leftovers"] = leftovers
+        result["ok"] = file_digest(args.file) == file_digest(args.destination) and not leftovers
+        result["seconds"] = round(stopwatch.wall, 4)
+        result["mb_s"] = round(args.size / stopwatch.wall / 1e6, 2)
+    result.update(side_result(stopwatch, monitor))
+    if received:
+        result["receiver"] = received
+    if tracer is not None:
+        result["allocations"] = tracer.summary()
+    print(json.dumps(result), flush=True)
+
+def cases(sizes: list[int], chunks: list[str], writers: list[str], streams: list[int]):
+    for size in sizes: # point de référence en premier
+        yield { "mode": "baseline", "size": size, "chunk": "2K", "writer": "buffered", "streams": 1 }
+    for size in sizes:
+        for chunk in chunks:
+            for writer in writers:
+                for count in streams:
+                    yield { "mode": "engine", "size": size, "chunk": chunk, "writer": writer, "streams": count }
+        for chunk in chunks:
+            yield { "mode": "allocations", "size": size, "chunk": chunk, "writer": "buffered", "streams": 1 }
+
+def case_key(result: dict) -> tuple:
+    """Identifie le cas d'un résultat, y compris dans les rapports antérieurs aux écritures et aux streams."""
+    return result["mode"], result["size"], result["chunk"], result.get("writer", "buffered"), result.get("streams", 1)
+
+def run_suite(args):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    chunks = [chunk.strip() for chunk in args.chunks.split(",")]
+    writers = [writer.strip() for writer in args.writers.split(",")]
+    streams = [int(count) for count in args.streams.split(",")]
+    workdir = tempfile.mkdtemp(prefix="nsi-bench-", dir=args.workdir)
+
+    server = None
+    domain = args.server
+    if domain is None:
+        port = free_port()
+        command = [sys.executable, "server.py", "--port", str(port), "--latency", str(args.latency), "--bandwidth", str(args.bandwidth)]
+        server = subprocess.Popen(command, cwd=root, stdout=subprocess.DEVNULL, env={ **os.environ, "QT_QPA_PLATFORM": "offscreen" })
+        domain = f"ws://127.0.0.1:{port}"
+        time.sleep(1)
+
+    try:
+        git = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=root, capture_output=True, text=True).stdout.strip()
+        report = {
+            "version": git or None,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "server": { "domain": domain, "latency_ms": args.latency, "bandwidth_mib_s": args.bandwidth },
+            "results": []
+        }
+        env = { **os.environ, "NSI_SERVER_DOMAIN": domain }
+        suite = list(cases(sizes, chunks, writers, streams))
+        for index, case in enumerate(suite):
+            mode, size = case["mode"], case["size"]
+            if (mode == "baseline" and size > BASELINE_MAX_SIZE) or (mode == "allocations" and size > ALLOCATIONS_MAX_SIZE):
+                report["results"].append({ **case, "skipped": True })
+                print(format_result(report["results"][-1]), flush=True)
+                continue
+            filepath = os.path.join(workdir, f"{size}.bin")
+            destination = os.path.join(workdir, "received.bin")
+            if not os.path.exists(filepath):
+                make_file(filepath, size)
+            command = [sys.executable, "-m", "benchmarks.transfer", "--case", "--mode", mode, "--size", str(size), "--chunk", case["chunk"],
+                       "--writer", case["writer"], "--streams", str(case["streams"]),
+                       "--file", filepath, "--destination", destination, "--timeout", str(args.timeout)]
+            try: # un cas bloqué dans le thread principal ne peut pas atteindre son propre délai
+                process = subprocess.run(command, cwd=root, env=env, capture_output=True, text=True, timeout=args.timeout + 30)
+                lines = process.stdout.strip().splitlines()
+                result = json.loads(lines[-1])
+                if "Traceback" in process.stderr: # exception levée dans un slot : Qt la rapporte sans interrompre le cas
+                    result["ok"] = False
+                    result["error"] = process.stderr.strip()[-500:]
+            except subprocess.TimeoutExpired:
+                result = { **case, "ok": False, "error": "timed out" }
+            except (IndexError, json.JSONDecodeError):
+                result = { **case, "ok": False, "error": process.stderr.strip()[-500:] }
+            report["results"].append(result)
+            print(format_result(result), flush=True)
+            for path in (destination, destination + ".nsi-checkpoint", destination + ".nsi-leaves"): # un cas suivant ne doit pas reprendre
+                if os.path.exists(path):
+                    os.remove(path)
+            if all(later["size"] != size for later in suite[index + 1:]): # dernier cas de cette taille
+                os.remove(filepath)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+def format_case(result: dict) -> str:
+    mode, size, chunk, writer, streams = case_key(result)
+    return f"{mode:<11} size={size:<12} chunk={chunk:<5} writer={writer:<8} streams={streams:<2}"
+
+def format_result(result: dict) -> str:
+    case = format_case(result)
+    if result.get("skipped"):
+        return f"{case} skipped"
+    if "mb_s" not in result:
+        return f"{case} FAILED {result.get('error', '')}"
+    latency = result["loop_latency_ms"]
+    receiver = result.get("receiver", {}).get("loop_latency_ms")
+    status = ""
+    if "leftovers" in result:
+        status = f" LEFT {','.join(result['leftovers'])}"
+    elif "error" in result:
+        status = f" FAILED {result['error'].splitlines()[-1]}"
+    elif not result["ok"]:
+        status = " CORRUPTED"
+    if "allocations" in result:
+        status = f"  alloc/chunk median {result['allocations']['median_bytes']} B max {result['allocations']['max_bytes']} B" + status
+    return f"{case} {result['mb_s']:>9.2f} MB/s  cpu {result['cpu_percent']:>5.1f}%  rss {result['peak_rss_mib']:>7.1f} MiB  loop max {latency['max']:>8.2f} ms p99 {latency['p99']:>7.2f} ms" + \
+        (f" (receiver max {receiver['max']:>8.2f} ms p99 {receiver['p99']:>7.2f} ms)" if receiver else "") + status
+
+def compare(before_path: str, after_path: str):
+    """Affiche l'évolution du débit et de la latence entre deux rapports, cas par cas."""
+    with open(before_path) as file:
+        before = { case_key(r): r for r in json.load(file)["results"] }
+    with open(after_path) as file:
+        after = json.load(file)["results"]
+    for result in after:
+        old = before.get(case_key(result))
+        if old is None or "mb_s" not in old or "mb_s" not in result:
+            continue
+        ratio = result["mb_s"] / old["mb_s"] if old["mb_s"] else float("inf")
+        line = f"{format_case(result)} {old['mb_s']:>9.2f} -> {result['mb_s']:>9.2f} MB/s (x{ratio:.2f})  " + \
+            f"loop max {old['loop_latency_ms']['max']:.2f} -> {result['loop_latency_ms']['max']:.2f} ms  rss {old['peak_rss_mib']} -> {result['peak_rss_mib']} MiB"
+        if "allocations" in old and "allocations" in result:
+            line += f"  alloc/chunk median {old['allocations']['median_bytes']} -> {result['allocations']['median_bytes']} B"
+        print(line)
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Banc d'essai des transferts de fichiers")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="tailles de fichier (1K, 100M, 10G...)")
+    parser.add_argument("--chunks", default=DEFAULT_CHUNKS, help="tailles de chunk, ou auto pour la taille adaptative")
+    parser.add_argument("--writers", default=DEFAULT_WRITERS, help="écriture du fichier reçu (buffered, threaded, mapped)")
+    parser.add_argument("--streams", default=DEFAULT_STREAMS, help="nombres de streams parallèles (1,2,4...), un seul pour --case")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--server", help="adresse d'un serveur déjà lancé (par défaut, server.py est lancé sur un port libre)")
+    parser.add_argument("--latency", type=int, default=0, help="latence du serveur local (ms)")
+    parser.add_argument("--bandwidth", type=float, default=0, help="débit maximal du serveur local (Mio/s)")
+    parser.add_argument("--timeout", type=int, default=1800, help="durée maximale d'un cas (s)")
+    parser.add_argument("--workdir", help="dossier des fichiers temporaires")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare deux rapports au lieu de lancer le banc")
+    parser.add_argument("--case", action="store_true", help="(interne) exécute un seul cas")
+    parser.add_argument("--role", choices=["sender", "receiver"], default="sender", help="(interne) côté du cas exécuté")
+    parser.add_argument("--transaction", help="(interne) transaction rejointe par le receveur")
+    parser.add_argument("--mode", choices=["engine", "baseline", "allocations"], default="engine")
+    parser.add_argument("--size", type=int)
+    parser.add_argument("--chunk")
+    parser.add_argument("--writer", choices=["buffered", "threaded", "mapped"], default="buffered")
+    parser.add_argument("--file")
+    parser.add_argument("--destination")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    elif args.case and args.role == "receiver":
+        run_receiver(args)
+    elif args.case:
+        run_case(args)
+    else:
+        run_suite(args)
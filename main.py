@@ -1,9 +1,58 @@
 import sys
-from PySide6.QtWidgets import QApplication
-from src.components.Application import Application
+import os
+import logging
+from argparse import ArgumentParser
+
+def run_gui() -> int:
+    from PySide6.QtWidgets import QApplication
+    from src.components.Application import Application
 
-if __name__ == "__main__":
     app = QApplication([])
     window = Application()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    return app.exec()
+
+def run_command(args) -> int:
+    """Envoi ou réception sans interface graphique : seul QtCore est chargé, pas les widgets."""
+    from PySide6.QtCore import QCoreApplication
+    from src.components.CommandLine import SendCommand, ReceiveCommand
+
+    # les erreurs des transferts vont sur la sortie d'erreur (la sortie standard ne porte que l'identifiant de la transaction)
+    logging.basicConfig(format="%(message)s", level=logging.ERROR if args.quiet else logging.WARNING)
+    app = QCoreApplication([])
+    if args.command == "send":
+        command = SendCommand(args.file, args.streams, args.compression, args.chunk_size, args.tar, args.rate_limit, args.quiet, args.timeout)
+    else:
+        command = ReceiveCommand(args.transaction_id, args.output, args.threaded, args.mapped, args.overwrite, args.rate_limit, args.quiet, args.timeout)
+    command.run()
+    return app.exec()
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="NSI Client (sans commande : interface graphique)")
+    parser.add_argument("--server", help="adresse du serveur, par exemple ws://127.0.0.1:8765 pour le serveur local (server.py)")
+    commands = parser.add_subparsers(dest="command")
+
+    send = commands.add_parser("send", help="envoie un fichier (ou plusieurs, ou un dossier) et affiche l'identifiant de la transaction")
+    send.add_argument("file", nargs="+", help="fichiers ou dossier, envoyés en une seule transaction")
+    send.add_argument("--streams", type=int, help="nombre de streams parallèles")
+    send.add_argument("--compression", choices=["zlib", "zstd"], help="compression à la volée")
+    send.add_argument("--chunk-size", type=int, help="taille fixe des chunks (octets), adaptative par défaut")
+    send.add_argument("--tar", action="store_true", help="envoie le dossier comme une archive tar générée à la volée")
+
+    recv = commands.add_parser("recv", help="reçoit le fichier d'une transaction")
+    recv.add_argument("transaction_id")
+    recv.add_argument("-o", "--output", default=".", help="dossier ou chemin du fichier reçu (dossier courant par défaut)")
+    recv.add_argument("--overwrite", action="store_true", help="remplace un fichier existant")
+    recv.add_argument("--threaded", action="store_true", help="écrit le fichier dans un thread dédié")
+    recv.add_argument("--mapped", action="store_true", help="écrit le fichier par projection en mémoire")
+
+    for command in (send, recv):
+        command.add_argument("-q", "--quiet", action="store_true", help="n'affiche ni les événements ni la progression")
+        command.add_argument("--timeout", type=int, help="abandonne après ce nombre de secondes")
+        command.add_argument("--rate-limit", type=int, help="débit maximal du transfert (octets/s)")
+
+    args = parser.parse_args()
+    if args.server is not None:
+        os.environ["NSI_SERVER_DOMAIN"] = args.server # lu par src/vars.py, donc avant l'import des composants
+
+    sys.exit(run_gui() if args.command is None else run_command(args))
\ No newline at end of file
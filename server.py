@@ -0,0 +1,25 @@
+import sys
+import logging
+from argparse import ArgumentParser
+from PySide6.QtCore import QCoreApplication
+from src.components.LocalServer import LocalServer
+from src.vars import LOCAL_SERVER_PORT, LOCAL_SERVER_WINDOW
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Serveur NSI local, pour tester le client sur une seule machine")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=LOCAL_SERVER_PORT)
+    parser.add_argument("--latency", type=int, default=0, help="latence de chaque connexion, dans chaque sens (ms)")
+    parser.add_argument("--bandwidth", type=float, default=0, help="débit maximal des streams binaires (Mio/s, 0 : illimité)")
+    parser.add_argument("--window", type=int, default=LOCAL_SERVER_WINDOW // 1024, help="octets en transit sur un stream binaire avant que le serveur cesse de lire l'émetteur (Kio)")
+    parser.add_argument("--drop-rate", type=float, default=0, help="probabilité de couper un stream binaire par Mio relayé")
+    parser.add_argument("--seed", type=int, default=None, help="graine des coupures, pour des essais reproductibles")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(message)s", level=logging.WARNING)
+    app = QCoreApplication([])
+    server = LocalServer(args.latency, int(args.bandwidth * 1024 * 1024), args.drop_rate, args.seed, args.window * 1024)
+    if not server.listen(args.host, args.port):
+        sys.exit(1)
+    print(f"Listening on {server.url()}, run the client with --server {server.url()}")
+    sys.exit(app.exec())
\ No newline at end of file
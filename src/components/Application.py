@@ -3,6 +3,8 @@ from PySide6.QtCore import Slot
 from .HomePage import HomeMenu
 from .RoomPage import RoomPage
 from .TransactionPage import TransactionSenderPage, TransactionReceiverPage
+from .TransferManager import TransferManager, Transfer
+from .TransfersPage import TransfersPage
 from ..vars import CONFLICT, NOT_FOUND, UNAUTHORIZED, STYLES_PATH
 from uuid import uuid4
 from .utils import QErrorDialog
@@ -11,9 +13,12 @@ from pathlib import Path
 class Application(QWidget):
     """
     Widget principal qui relie les différentes pages entre elles avec à un QStackedWidget.
+    Chaque transaction a sa propre page, affichée dans la page des transferts ; le TransferManager limite le nombre de
+    transferts simultanés.
     """
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._manager = TransferManager(parent=self)
         self.init_UI()
 
     def init_UI(self):
@@ -22,13 +27,11 @@ class Application(QWidget):
         self._stacked_widgets = QStackedWidget(self)
         self._home_page = HomeMenu(self) # menu principal
         self._room_page = RoomPage(self) # page du salon
-        self._transaction_send_page = TransactionSenderPage(self) # page de l'envoi de fichier
-        self._transaction_receive_page = TransactionReceiverPage(self) # page de la réception de fichier
+        self._transfers_page = TransfersPage(self._manager, self) # pages des transactions en cours
 
         self._stacked_widgets.addWidget(self._home_page)
         self._stacked_widgets.addWidget(self._room_page)
-        self._stacked_widgets.addWidget(self._transaction_send_page)
-        self._stacked_widgets.addWidget(self._transaction_receive_page)
+        self._stacked_widgets.addWidget(self._transfers_page)
         self._stacked_widgets.setCurrentIndex(0)
 
         self._layout = QVBoxLayout(self)
@@ -36,11 +39,11 @@ class Application(QWidget):
         self.setLayout(self._layout)
 
         self._room_page.left.connect(self.leave_room)
-        self._transaction_receive_page.closed.connect(self.on_transaction_closed)
-        self._transaction_send_page.closed.connect(self.on_transaction_closed)
+        self._transfers_page.back.connect(self.back_to_menu)
         self._home_page.room_form_submitted.connect(self.join_room)
         self._home_page.send_form_submitted.connect(self.join_send_page)
         self._home_page.receive_form_submitted.connect(self.join_receive_page)
+        self._home_page.transfers_requested.connect(lambda: self._stacked_widgets.setCurrentIndex(2))
 
         self.setStyleSheet(Path(f"{STYLES_PATH}/global.qss").read_text())
 
@@ -54,21 +57,20 @@ class Application(QWidget):
             dialog = QErrorDialog(f"Username {self._room_page.connection().alias()} is already in use in room {self._room_page.connection().room_id()}")
             dialog.exec()
 
-    @Slot(int)
-    def transaction_connection_refused(self, code: int):
+    def transaction_connection_refused(self, page: QWidget, code: int):
         """
-        Slot appelé quand une connexion à une transaction est refusée (se produit quand la transaction n'a pas été créée
-        ou quand elle comporte déjà un émetteur et un récepteur).
+        Appelé quand une connexion à une transaction est refusée (se produit quand la transaction n'a pas été créée
+        ou quand elle comporte déjà un émetteur et un récepteur) : la page de la transaction est fermée.
         """
         if code == NOT_FOUND:
-            self._stacked_widgets.currentWidget().clear()
-            self._stacked_widgets.setCurrentIndex(0)
+            page.clear()
+            self.back_to_menu()
             dialog = QErrorDialog(f"No receiver has instantiated this transaction.")
             dialog.exec()
         
         elif code == UNAUTHORIZED:
-            self._stacked_widgets.currentWidget().clear()
-            self._stacked_widgets.setCurrentIndex(0)
+            page.clear()
+            self.back_to_menu()
             dialog = QErrorDialog(f"Transaction is already full.")
             dialog.exec()
 
@@ -89,29 +91,49 @@ class Application(QWidget):
         self._stacked_widgets.setCurrentIndex(0)
         self._home_page.back_to_menu()
 
-    @Slot(str)
-    def join_send_page(self, filepath: str):
+    @Slot(list, bool)
+    def join_send_page(self, filepaths: list, archive: bool):
         """
-        Rejoint la page de transaction (côté émetteur) avec un UUID généré côté client.
+        Ouvre une page de transaction (côté émetteur) avec un UUID généré côté client.
         """
         transaction_id = str(uuid4())
-        self._transaction_send_page.invoke(transaction_id, filepath)
-        self._stacked_widgets.setCurrentIndex(2)
-        self._transaction_send_page.connection().connection_refused.connect(self.transaction_connection_refused)
+        page = TransactionSenderPage()
+        page.invoke(transaction_id, filepaths, archive)
+        transfer = self._manager.add(page.connection(), sending=True)
+        page.started.connect(lambda: self._manager.schedule(transfer, transfer.transaction.start))
+        self.add_transfer(transfer, page)
 
     @Slot(str)
     def join_receive_page(self, transaction_id: str):
         """
-        Rejoint la page de transaction (côté receveur).
+        Ouvre une page de transaction (côté receveur).
         """
-        self._transaction_receive_page.invoke(transaction_id)
-        self._stacked_widgets.setCurrentIndex(3)
-        self._transaction_receive_page.connection().connection_refused.connect(self.transaction_connection_refused)
+        page = TransactionReceiverPage()
+        page.invoke(transaction_id)
+        transfer = self._manager.add(page.connection(), sending=False)
+        page.accepted.connect(lambda: self._manager.schedule(transfer, transfer.transaction.accept))
+        self.add_transfer(transfer, page)
 
-    @Slot()
-    def on_transaction_closed(self):
+    def add_transfer(self, transfer: Transfer, page: QWidget):
+        page.closed.connect(lambda: self.on_transaction_closed(transfer))
+        page.connection().connection_refused.connect(lambda code: self.transaction_connection_refused(page, code))
+        self._transfers_page.add(transfer, page)
+        self._home_page.set_transfers_count(self._transfers_page.count())
+        self._home_page.back_to_menu()
+        self._stacked_widgets.setCurrentIndex(2)
+
+    def on_transaction_closed(self, transfer: Transfer):
         """
-        Revenir au menu principal lorsque la transaction est terminée.
+        La page d'une transaction a été fermée : la transaction est retirée des transferts, et on revient au menu principal
+        s'il n'en reste plus.
         """
+        self._manager.remove(transfer)
+        self._transfers_page.remove(transfer)
+        self._home_page.set_transfers_count(self._transfers_page.count())
+        if self._transfers_page.count() == 0:
+            self.back_to_menu()
+
+    @Slot()
+    def back_to_menu(self):
         self._stacked_widgets.setCurrentIndex(0)
-        self._home_page.back_to_menu()
\ No newline at end of file
+        self._home_page.back_to_menu()
@@ -0,0 +1,164 @@
+from PySide6.QtCore import Signal, Slot, QObject, QCoreApplication, QTimer
+from .TransactionHandlers import TransactionSender, TransactionReceiver
+from .transfer_utils import read_checkpoint
+from ..vars import NOT_FOUND
+from pathlib import Path
+import sys
+
+"""
+Envoi et réception de fichiers en ligne de commande (python main.py send|recv), sans interface graphique : les commandes
+ne font que piloter TransactionSender et TransactionReceiver dans une QCoreApplication.
+L'identifiant de la transaction est écrit sur la sortie standard, les événements et la progression sur la sortie d'erreur.
+Code de sortie : 0 si le fichier a été transmis et vérifié, 1 en cas d'échec, 2 si la connexion est refusée, 3 si le délai
+est dépassé, 4 si le fichier a été reçu sans pouvoir être vérifié (l'émetteur n'a pas publié d'empreinte utilisable).
+"""
+
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+EXIT_REFUSED = 2
+EXIT_TIMEOUT = 3
+EXIT_UNVERIFIED = 4
+
+class Command(QObject):
+    """
+    Classe parente des commandes : affiche les événements de la transaction et termine l'application avec le bon code.
+    """
+    done = Signal(int) # émis avec le code de sortie
+
+    def __init__(self, quiet: bool = False, timeout: int = None, parent=None):
+        super().__init__(parent)
+        self._quiet = quiet
+        self._connection = None
+        self._filesize = None
+        self._done = 0 # octets transférés
+        self._finished = False
+        self._unverified = False # True si le fichier reçu n'a pas pu être vérifié
+        if timeout is not None:
+            QTimer.singleShot(timeout * 1000, lambda: self.exit(EXIT_TIMEOUT, "Timeout reached."))
+
+    def connect_transaction(self, connection):
+        self._connection = connection
+        connection.text_received.connect(self.log)
+        connection.infos_received.connect(self.set_file)
+        connection.connection_refused.connect(self.on_connection_refused)
+        connection.transaction_progressed.connect(self.on_progress)
+        connection.transaction_resumed.connect(self.on_resumed)
+        connection.transaction_stats.connect(self.on_stats)
+        connection.transaction_unverified.connect(self.on_unverified)
+        connection.transaction_finished.connect(lambda: self.exit(EXIT_UNVERIFIED if self._unverified else EXIT_SUCCESS))
+        connection.transaction_corrupted.connect(lambda: self.exit(EXIT_FAILURE))
+        connection.transaction_failed.connect(lambda: self.exit(EXIT_FAILURE))
+        connection.peer_left.connect(self.on_peer_left)
+
+    @Slot(str)
+    def log(self, text: str):
+        if not self._quiet:
+            self.clear_line()
+            print(text, file=sys.stderr, flush=True)
+
+    @Slot(str, int)
+    def set_file(self, filename: str, filesize: int):
+        self._filesize = filesize
+
+    @Slot(int)
+    def on_connection_refused(self, code: int):
+        self.exit(EXIT_REFUSED, "Transaction not found." if code == NOT_FOUND else "Transaction already has a receiver.")
+
+    @Slot(str)
+    def on_unverified(self, reason: str):
+        self._unverified = True
+
+    @Slot(int)
+    def on_progress(self, n: int):
+        self._done += n
+
+    @Slot(int)
+    def on_resumed(self, done: int):
+        self._done = done
+
+    @Slot(float, float, float)
+    def on_stats(self, rate: float, average_rate: float, eta: float):
+        """Ligne de progression, réécrite sur place si la sortie d'erreur est un terminal."""
+        if self._quiet or not sys.stderr.isatty() or not self._filesize:
+            return
+        from humanize import naturalsize # importé à la demande, comme les modules des transferts (voir transfer_utils)
+        line = f"{100 * self._done / self._filesize:5.1f}% of {naturalsize(self._filesize, binary=True)} at {naturalsize(average_rate, binary=True)}/s"
+        if eta >= 0:
+            line += f", {int(eta)} s left"
+        print(f"\r{line:<60}", end="", file=sys.stderr, flush=True)
+
+    def clear_line(self):
+        if not self._quiet and sys.stderr.isatty():
+            print(f"\r{'':<60}\r", end="", file=sys.stderr, flush=True)
+
+    @Slot()
+    def on_peer_left(self):
+        if not self._finished:
+            self.exit(EXIT_FAILURE)
+
+    def exit(self, code: int, message: str = None):
+        if self._finished:
+            return
+        self._finished = True
+        if message is not None:
+            self.log(message)
+        if self._connection is not None:
+            self._connection.close()
+        self.done.emit(code)
+        QTimer.singleShot(0, lambda: QCoreApplication.exit(code)) # laisse les sockets se fermer
+
+class SendCommand(Command):
+    """
+    Crée une transaction pour filepath, affiche son identifiant et envoie le fichier dès que le receveur l'accepte.
+    filepath peut être un dossier ou une liste de fichiers, envoyés en une transaction groupée, ou un dossier envoyé comme
+    une archive tar si archive est à True.
+    """
+    def __init__(self, filepath: str | list[str], streams: int = None, compression: str = None, chunk_size: int = None, archive: bool = False, rate_limit: int = None, quiet: bool = False, timeout: int = None, parent=None):
+        from uuid import uuid4 # seul l'émetteur génère un identifiant
+        super().__init__(quiet, timeout, parent)
+        self._transaction_id = str(uuid4())
+        connection = TransactionSender(self._transaction_id, filepath, archive)
+        if streams is not None:
+            connection.set_streams(streams)
+        if compression is not None:
+            connection.set_compression(compression)
+        if chunk_size is not None:
+            connection.set_chunk_size(chunk_size, adaptive=False)
+        if rate_limit is not None:
+            connection.set_rate_limit(rate_limit)
+        connection.transaction_accepted.connect(connection.start)
+        self.connect_transaction(connection)
+
+    def run(self):
+        print(self._transaction_id, flush=True)
+        self._connection.offer()
+
+class ReceiveCommand(Command):
+    """
+    Rejoint la transaction transaction_id et enregistre le fichier dans destination (dossier ou chemin du fichier).
+    Les fichiers d'une transaction groupée ou d'une archive sont écrits dans un dossier du nom de la transaction si destination est un
+    dossier existant, et dans destination sinon.
+    Un fichier existant n'est remplacé que si overwrite est à True, sauf s'il s'agit d'un fichier partiel à reprendre.
+    """
+    def __init__(self, transaction_id: str, destination: str = ".", threaded: bool = False, mapped: bool = False, overwrite: bool = False, rate_limit: int = None, quiet: bool = False, timeout: int = None, parent=None):
+        super().__init__(quiet, timeout, parent)
+        self._destination = Path(destination)
+        self._overwrite = overwrite
+        connection = TransactionReceiver(transaction_id)
+        connection.set_writer(threaded=threaded, mapped=mapped)
+        connection.set_rate_limit(rate_limit)
+        connection.infos_received.connect(self.accept)
+        self.connect_transaction(connection)
+
+    def run(self):
+        self._connection.open()
+
+    @Slot(str, int)
+    def accept(self, filename: str, filesize: int):
+        filepath = self._destination / Path(filename).name if self._destination.is_dir() else self._destination
+        if filepath.exists() and not self._overwrite and read_checkpoint(str(filepath)) is None:
+            self.exit(EXIT_FAILURE, f"{filepath} already exists, use --overwrite to replace it.")
+            return
+        self._connection.set_filepath(str(filepath))
+        self._connection.accept()
+        self.log(f"Receiving {filename} into {filepath}")
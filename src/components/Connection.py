@@ -1,73 +1,137 @@
+import logging
 from PySide6.QtWebSockets import QWebSocket
-from PySide6.QtWidgets import QWidget
-from PySide6.QtCore import Signal
+from PySide6.QtCore import Signal, Slot, QObject, QThread, QTimer, QMetaObject, QCoreApplication, Qt
+from .room_utils import Message, loads, dumps
 from ..vars import SERVER_DOMAIN, CONFLICT
-import json
 
-class Connection(QWidget):
+logger = logging.getLogger(__name__)
+
+class RoomWorker(QObject):
     """
-    Widget qui permet de gérer la connexion à un salon.
+    Socket d'un salon et traitement des messages reçus, dans un QThread dédié (voir Connection) : le décodage JSON et la
+    préparation des messages ne se font jamais dans le thread du GUI. Les messages décodés pendant un même tour de la
+    boucle d'événements du thread sont émis ensemble : un seul signal traverse les threads par lot.
+    """
+    connection_refused = Signal(int)
+    update_peers = Signal(list)
+    messages_received = Signal(list) # émis avec les messages (Message) décodés
+
+    def __init__(self, url: str):
+        super().__init__() # pas de parent : l'objet doit pouvoir être déplacé dans un autre thread
+        self._url = url
+        self._socket = None
+        self._peers = None # dernière liste des pairs émise
+        self._batch = [] # messages décodés pas encore émis
+        self._timer = None
+
+    @Slot()
+    def run(self):
+        """
+        Point d'entrée du thread de travail (connecté à QThread.started) : le socket est créé ici pour lui appartenir.
+        """
+        self._socket = QWebSocket(parent=self)
+        self._socket.textMessageReceived.connect(self.handle_message)
+        self._socket.errorOccurred.connect(self.on_error)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.publish)
+        self._socket.open(self._url)
+
+    @Slot(str)
+    def handle_message(self, message: str):
+        """
+        Reçoit les messages diffusés dans le salon et les traite.
+        """
+        data = loads(message)
+
+        if data["peers"] != self._peers: # la liste n'est émise que si elle a changé
+            self._peers = data["peers"]
+            self.update_peers.emit(self._peers) # mise à jour des pairs
+
+        record = Message.from_data(data)
+        if record is None:
+            return
+        self._batch.append(record)
+        if not self._timer.isActive():
+            self._timer.start(0) # après les autres messages déjà arrivés sur le socket
+
+    @Slot()
+    def publish(self):
+        batch, self._batch = self._batch, []
+        if batch:
+            self.messages_received.emit(batch)
+
+    @Slot(str)
+    def send_text(self, text: str):
+        self._socket.sendTextMessage(dumps({ "type": "MESSAGE", "body": text }))
+
+    def on_error(self, error):
+        logger.warning(self._socket.errorString())
+        if str(CONFLICT) in self._socket.errorString():
+            self.connection_refused.emit(CONFLICT)
+
+    @Slot()
+    def stop(self):
+        if self._timer is not None:
+            self._timer.stop()
+        if self._socket is not None:
+            self._socket.close()
+
+class Connection(QObject):
+    """
+    Gère la connexion à un salon. Le socket vit dans un RoomWorker déplacé dans un QThread dédié : les messages reçus
+    arrivent déjà décodés (Message) dans le thread du GUI, par des connexions en file (queued connections).
+    Le JSON est traité par orjson s'il est installé (voir room_utils).
     """
     connection_refused = Signal(int, name="connection_refused")
     update_peers = Signal(list, name="update_peers") # émis pour mettre à jour la liste des pairs
-    text_received = Signal(str, str, bool, name="text_received") # émis pour ajouter un message au fil
+    messages_received = Signal(list, name="messages_received") # émis avec des messages (Message) à ajouter au fil
+    send_requested = Signal(str) # transmet un message à envoyer au thread du socket
 
-    def __init__(self, room_id: str, alias: str = ""):
-        super().__init__()
+    def __init__(self, room_id: str, alias: str = "", parent=None):
+        super().__init__(parent)
 
-        self._socket = QWebSocket()
-        self._socket.textMessageReceived.connect(self.handle_message)
-        self._socket.errorOccurred.connect(self.on_connection_refused)
-        
         self._room_id = room_id
         self._alias = alias
         self._url = f"{SERVER_DOMAIN}/room/{self._room_id}?alias={self._alias}" if len(self._alias) > 0 else f"{SERVER_DOMAIN}/room/{self._room_id}"
 
+        self._thread = None
+        self._worker = None
+
     def open(self):
         """Lance la connexion au salon."""
-        self._socket.open(self._url)
-
-    def handle_message(self, message):
-        """
-        Reçoit les messages diffusés dans le salon et les traite.
-        """
-        data = json.loads(message)
-        
-        self.update_peers.emit(data["peers"]) # mise à jour des pairs
-
-        _str = ""
-        is_event = True # True si pas un texte envoyé par un pair
-        match data["type"]:
-            case "WELCOME" | "JOIN":
-                _str = f"{data['alias']} has joined the room." # nouvel arrivant
-            case "MESSAGE" | "RECEIVED":
-                _str = data["body"] # message d'un pair
-                is_event = False
-            case "LEAVE": 
-                _str = f"{data['alias']} has left the room." # départ d'un pair
-
-        self.text_received.emit(data["alias"], _str, is_event)
+        self._thread = QThread(self)
+        self._worker = RoomWorker(self._url)
+        self._worker.moveToThread(self._thread) # le RoomWorker vit désormais dans le thread de travail
+        self._thread.started.connect(self._worker.run)
+        self._thread.finished.connect(self._worker.deleteLater)
+        self._worker.connection_refused.connect(self.connection_refused)
+        self._worker.update_peers.connect(self.update_peers)
+        self._worker.messages_received.connect(self.messages_received)
+        self.send_requested.connect(self._worker.send_text)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close) # le thread doit être arrêté avant sa destruction
+        self._thread.start()
 
     def send_text(self, text: str):
         """
         Envoie un message au salon
         """
-        message = json.dumps({ "type": "MESSAGE", "body": text })
-        self._socket.sendTextMessage(message)
-
-    def on_connection_refused(self, error):
-        print(self._socket.errorString())
-        if str(CONFLICT) in self._socket.errorString():
-            self.connection_refused.emit(CONFLICT)
+        self.send_requested.emit(text)
 
     def close(self):
-        self._socket.close()
+        if self._thread is None:
+            return
+        thread, self._thread = self._thread, None
+        if thread.isRunning():
+            QMetaObject.invokeMethod(self._worker, "stop", Qt.ConnectionType.BlockingQueuedConnection)
+            thread.quit()
+            thread.wait()
+        self._worker = None
 
     def room_id(self):
         return self._room_id
-    
+
     def alias(self):
         return self._alias
-
-    def socket(self):
-        return self._socket
\ No newline at end of file
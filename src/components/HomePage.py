@@ -1,10 +1,11 @@
-from PySide6.QtWidgets import QWidget, QLineEdit, QApplication, QLabel, QPushButton, QVBoxLayout, QGroupBox, QStackedWidget, QFileDialog, QLineEdit
+from PySide6.QtWidgets import QWidget, QLineEdit, QApplication, QLabel, QPushButton, QVBoxLayout, QGroupBox, QStackedWidget, QFileDialog, QLineEdit, QCheckBox
 from PySide6.QtCore import Slot, QEvent, Qt, QObject, Signal, QFileInfo
 from PySide6.QtGui import QFont
 from random import randbytes
 from pathlib import Path
 from ..vars import STYLES_PATH, MAXIMUM_ALIAS_LENGTH
 from .utils import QLimitedLineEdit, QErrorDialog, QElidedLabel
+from .transfer_utils import FileSet
 from humanize import naturalsize
 import uuid
 
@@ -20,14 +21,14 @@ def is_valid_uuid(_str: str):
     
 class SendForm(QWidget):
     """
-    Formulaire pour l'envoi d'un fichier.
+    Formulaire pour l'envoi d'un fichier, de plusieurs fichiers ou d'un dossier (transaction groupée).
     """
     cancelled = Signal() # émis si bouton "Back" cliqué
-    submitted = Signal(str) # émis si bouton "Submit" cliqué
+    submitted = Signal(list, bool) # émis si bouton "Submit" cliqué, avec les chemins choisis et l'envoi en archive
 
     def __init__(self, parent=None):
-        self._filepath = "" # chemin du fichier à envoyer
-        self._filesize = 0 # taille de ce fichier
+        self._filepaths = [] # chemins des fichiers (ou du dossier) à envoyer
+        self._filesize = 0 # taille totale
 
         super().__init__(parent)
         self.init_UI()
@@ -40,7 +41,8 @@ class SendForm(QWidget):
 
         self._box_layout = QVBoxLayout()
         
-        self._file_button = QPushButton("Browse...") # bouton pour choisir le fichier
+        self._file_button = QPushButton("Browse...") # bouton pour choisir le ou les fichiers
+        self._folder_button = QPushButton("Folder...") # bouton pour choisir un dossier
         self._submit_button = QPushButton("Submit")
         self._back_button = QPushButton("Back")
         self._second_back_button = QPushButton("Back")
@@ -50,6 +52,7 @@ class SendForm(QWidget):
         self._submit_button.setObjectName("submit")
 
         self._file_button.clicked.connect(self.browse)
+        self._folder_button.clicked.connect(self.browse_folder)
         self._submit_button.clicked.connect(self.submit)
         self._back_button.clicked.connect(self.cancel)
         self._second_back_button.clicked.connect(self.cancel)
@@ -61,12 +64,15 @@ class SendForm(QWidget):
         self._filesize_label = QLabel("", alignment=Qt.AlignmentFlag.AlignHCenter)
         self._filepath_label.setFont(font)
         self._filesize_label.setFont(font)
+        self._archive_box = QCheckBox("Send as a tar archive") # dossier envoyé comme une archive générée à la volée
+        self._archive_box.hide() # visible seulement si un dossier est choisi
 
         self._submit_widget = QWidget()
         self._submit_layout = QVBoxLayout()
         self._submit_layout.addWidget(self._filepath_label) # infos sur fichier
         self._submit_layout.addStretch(1)
         self._submit_layout.addWidget(self._filesize_label)
+        self._submit_layout.addWidget(self._archive_box, alignment=Qt.AlignmentFlag.AlignHCenter)
         self._submit_layout.addStretch(3)
         self._submit_layout.addWidget(self._submit_button, alignment=Qt.AlignmentFlag.AlignHCenter)
         self._submit_layout.addWidget(self._second_back_button, alignment=Qt.AlignmentFlag.AlignHCenter)
@@ -75,6 +81,7 @@ class SendForm(QWidget):
         self._file_widget = QWidget()
         self._file_layout = QVBoxLayout()
         self._file_layout.addWidget(self._file_button, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self._file_layout.addWidget(self._folder_button, alignment=Qt.AlignmentFlag.AlignHCenter)
         self._file_layout.addWidget(self._back_button, alignment=Qt.AlignmentFlag.AlignHCenter)
         self._file_widget.setLayout(self._file_layout)
 
@@ -92,15 +99,39 @@ class SendForm(QWidget):
     @Slot()
     def browse(self):
         """
-        Sélection d'un fichier à envoyer.
+        Sélection d'un ou plusieurs fichiers à envoyer.
         """
-        self._filepath, _ = QFileDialog.getOpenFileName()
+        filepaths, _ = QFileDialog.getOpenFileNames()
 
-        if len(self._filepath) > 0: # si un fichier a bien été sélectionné
-            self._filesize = QFileInfo(self._filepath).size()
-            self._filepath_label.setText(f"File: {self._filepath}")
+        if len(filepaths) == 1: # si un fichier a bien été sélectionné
+            self._filepaths = filepaths
+            self._filesize = QFileInfo(filepaths[0]).size()
+            self._filepath_label.setText(f"File: {filepaths[0]}")
             self._filesize_label.setText(f"Size: {naturalsize(self._filesize, binary=True)}") # mise à jour des labels
+            self._archive_box.hide()
             self._stacked_widget.setCurrentIndex(1) # on passe à la confirmation
+        elif len(filepaths) > 1:
+            self.select(filepaths)
+
+    @Slot()
+    def browse_folder(self):
+        """
+        Sélection d'un dossier à envoyer avec tout son contenu.
+        """
+        directory = QFileDialog.getExistingDirectory()
+
+        if len(directory) > 0:
+            self.select([directory])
+
+    def select(self, paths: list[str]):
+        files = FileSet.from_paths(paths)
+        self._filepaths = paths
+        self._filesize = files.size()
+        self._filepath_label.setText(f"Files: {files.count()} in {paths[0] if len(paths) == 1 else files.name()}")
+        self._filesize_label.setText(f"Size: {naturalsize(self._filesize, binary=True)}")
+        self._archive_box.setChecked(False)
+        self._archive_box.setVisible(len(paths) == 1) # seul un dossier peut être envoyé en archive
+        self._stacked_widget.setCurrentIndex(1)
 
     @Slot()
     def cancel(self):
@@ -109,7 +140,7 @@ class SendForm(QWidget):
 
     @Slot()
     def submit(self):
-        self.submitted.emit(self._filepath)
+        self.submitted.emit(self._filepaths, not self._archive_box.isHidden() and self._archive_box.isChecked())
         self._filepath_label.setText("") # nettoyage
         self._filesize_label.setText("")
         self._stacked_widget.setCurrentIndex(0)
@@ -265,11 +296,14 @@ class HomeForm(QWidget):
         self._room_button = QPushButton("Join a room")
         self._send_button = QPushButton("Send a file")
         self._receive_button = QPushButton("Receive a file")
+        self._transfers_button = QPushButton("Transfers") # visible tant que des transferts sont ouverts
         self._quit_button = QPushButton("Quit")
 
         self._room_button.setObjectName("submit")
         self._send_button.setObjectName("submit")
         self._receive_button.setObjectName("submit")
+        self._transfers_button.setObjectName("submit")
+        self._transfers_button.hide()
         self._quit_button.setObjectName("cancel")
 
         self._quit_button.clicked.connect(self.quit)
@@ -282,6 +316,8 @@ class HomeForm(QWidget):
         self._box_layout.addSpacing(spacing)
         self._box_layout.addWidget(self._receive_button, alignment=Qt.AlignmentFlag.AlignHCenter)
         self._box_layout.addSpacing(spacing)
+        self._box_layout.addWidget(self._transfers_button, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self._box_layout.addSpacing(spacing)
         self._box_layout.addWidget(self._quit_button, alignment=Qt.AlignmentFlag.AlignHCenter)
         self._box_layout.addStretch()
 
@@ -302,6 +338,9 @@ class HomeForm(QWidget):
     
     def file_receive_button(self):
         return self._receive_button
+
+    def transfers_button(self):
+        return self._transfers_button
     
     def resizeEvent(self, event):
         """pour ajouter les boutons à la largeur de la fenêtre"""
@@ -309,6 +348,7 @@ class HomeForm(QWidget):
         self._room_button.setFixedWidth(new_width)
         self._send_button.setFixedWidth(new_width)
         self._receive_button.setFixedWidth(new_width)
+        self._transfers_button.setFixedWidth(new_width)
         self._quit_button.setFixedWidth(new_width)
         super().resizeEvent(event)
 
@@ -340,8 +380,9 @@ class HomeMenu(QWidget):
     Menu principal (et d'accueil) permettant de naviguer entre les type de connexion : salon, transaction entrante et transaction sortante
     """
     room_form_submitted = Signal(str, str) # lorsque l'utilisateur envoie le formulaire pour rejoindre un salon
-    send_form_submitted = Signal(str) # idem pour envoyer un fichier
+    send_form_submitted = Signal(list, bool) # idem pour envoyer un ou plusieurs fichiers
     receive_form_submitted = Signal(str) # idem pour recevoir un fichier
+    transfers_requested = Signal() # lorsque l'utilisateur veut revenir à la liste des transferts
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -360,12 +401,13 @@ class HomeMenu(QWidget):
         self._home_form.room_button().clicked.connect(self.switch_to_room_form)
         self._home_form.file_send_button().clicked.connect(self.switch_to_file_send_form)
         self._home_form.file_receive_button().clicked.connect(self.switch_to_file_receive_form)
+        self._home_form.transfers_button().clicked.connect(lambda: self.transfers_requested.emit())
 
         self._room_form.cancelled.connect(self.back_to_menu)
         self._room_form.submitted.connect(lambda room_id, alias: self.room_form_submitted.emit(room_id, alias))
 
         self._send_form.cancelled.connect(self.back_to_menu)
-        self._send_form.submitted.connect(lambda filepath: self.send_form_submitted.emit(filepath))
+        self._send_form.submitted.connect(lambda filepaths, archive: self.send_form_submitted.emit(filepaths, archive))
 
         self._receive_form.cancelled.connect(self.back_to_menu)
         self._receive_form.submitted.connect(lambda transaction_id: self.receive_form_submitted.emit(transaction_id))
@@ -397,4 +439,11 @@ class HomeMenu(QWidget):
         
     @Slot()
     def back_to_menu(self):
-        self._stacked_widgets.setCurrentIndex(0)
\ No newline at end of file
+        self._stacked_widgets.setCurrentIndex(0)
+
+    def set_transfers_count(self, count: int):
+        """
+        Affiche le bouton qui mène à la liste des transferts s'il y en a.
+        """
+        self._home_form.transfers_button().setText(f"Transfers ({count})")
+        self._home_form.transfers_button().setVisible(count > 0)
\ No newline at end of file
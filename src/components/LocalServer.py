@@ -0,0 +1,398 @@
+from PySide6.QtNetwork import QTcpServer, QTcpSocket, QHostAddress
+from PySide6.QtWebSockets import QWebSocketServer, QWebSocket
+from PySide6.QtCore import Slot, QObject, QTimer, Qt
+from ..vars import CONFLICT, UNAUTHORIZED, NOT_FOUND, LOCAL_SERVER_WINDOW, CHUNK_SIZE_MAX
+from urllib.parse import urlsplit, parse_qs
+from random import Random, randbytes
+import heapq
+import json
+import logging
+import time
+
+"""
+Serveur local qui remplace NSI Server pour tester le client sur une seule machine (voir server.py) :
+- /room/:room_id?alias=... : salon de discussion. Chaque message du serveur contient le type (WELCOME, JOIN, MESSAGE,
+RECEIVED, LEAVE), l'alias concerné, le corps et la liste des pairs. Un alias déjà utilisé dans le salon est refusé (409).
+- /transaction/:transaction_id?sender=true|false : canal de contrôle. Chaque message est relayé à l'autre pair et renvoyé
+à son auteur avec le suffixe _RECEIVED. TRANSACTION_INFOS est conservé et transmis au receveur quand il arrive.
+Le receveur est refusé si la transaction n'existe pas (404) ou si elle a déjà un receveur (401).
+- /transaction/:transaction_id/bin?sender=true|false&stream=k : les messages binaires de l'émetteur sont relayés au
+receveur du même stream (0 par défaut). Ceux qui arrivent avant le receveur sont gardés jusqu'à sa connexion.
+
+Les dégradations s'appliquent aux messages relayés : latence propre à chaque connexion, débit maximal partagé par tous les
+streams binaires (comme un unique lien montant) et coupures aléatoires des sockets binaires du receveur, qui doit alors
+reprendre le stream.
+Chaque stream binaire se comporte comme une connexion TCP dont la fenêtre vaut window octets : les octets lus sur le socket
+de l'émetteur restent en transit jusqu'à ce que leur livraison au receveur soit confirmée, une latence plus tard. Au-delà de
+window octets en transit (ou en attente d'écriture vers le receveur), le serveur arrête de lire le socket de l'émetteur :
+son tampon d'envoi se remplit comme face à un lien lent, et le débit d'un stream est limité à window / (2 × latence). Les
+messages déjà lus dans le tampon de lecture (READ_BUFFER_SIZE) sont relayés malgré la pause : la fenêtre est approchée à un
+message près.
+"""
+
+MEBIBYTE = 1024 * 1024
+READ_BUFFER_SIZE = CHUNK_SIZE_MAX + 64 * 1024 # tampon de lecture des sockets des émetteurs, au-delà duquel le système cesse d'accepter leurs données (QWebSocket attend qu'un message y soit entier)
+
+logger = logging.getLogger(__name__)
+
+class LocalServer(QObject):
+    """
+    Serveur WebSocket local qui implémente le protocole attendu par Connection et TransactionHandlers.
+    latency est en ms, bandwidth en octets/s (0 : illimité) et drop_rate est la probabilité de couper le socket du receveur
+    pour chaque Mio relayé sur un stream. window est le nombre maximal d'octets en transit sur un stream binaire.
+    """
+    def __init__(self, latency: int = 0, bandwidth: int = 0, drop_rate: float = 0.0, seed: int = None, window: int = LOCAL_SERVER_WINDOW, parent=None):
+        super().__init__(parent)
+        self._latency = latency / 1000
+        self._bandwidth = bandwidth
+        self._window = window
+        self._drop_rate = drop_rate
+        self._random = Random(seed)
+
+        self._tcp = QTcpServer(self)
+        self._tcp.newConnection.connect(self.on_tcp_connection)
+        self._ws = QWebSocketServer("NSI local server", QWebSocketServer.SslMode.NonSecureMode, self)
+        self._ws.newConnection.connect(self.on_ws_connection)
+
+        self._rooms = {} # room_id -> {alias: socket}
+        self._transactions = {} # transaction_id -> {"sender": socket, "receiver": socket, "infos": dict}
+        self._bins = {} # (transaction_id, stream) -> {"sender": socket, "receiver": socket, "stale": socket, "pending": list, "in_flight": int, "tcp": QTcpSocket, "paused": bool}
+        self._open = set() # sockets encore ouverts, les seuls auxquels on livre des messages
+        self._tcp_sockets = {} # port du pair -> QTcpSocket confié au QWebSocketServer, jusqu'à la création du QWebSocket
+
+        self._queue = [] # (échéance, n°, socket, action) : livraisons retardées et confirmations, socket étant leur destinataire
+        self._count = 0
+        self._link_free = 0.0 # instant où le lien limité en débit sera libre
+        self._connection_free = {} # socket -> instant de sa dernière livraison, pour qu'une connexion livre dans l'ordre
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self.flush)
+
+    def listen(self, host: str = "127.0.0.1", port: int = 0) -> bool:
+        """Écoute sur host:port (port 0 : choisi par le système, voir port())."""
+        if not self._tcp.listen(QHostAddress(host), port):
+            logger.error(self._tcp.errorString())
+            return False
+        return True
+
+    def port(self) -> int:
+        return self._tcp.serverPort()
+
+    def url(self) -> str:
+        """Adresse à utiliser comme SERVER_DOMAIN."""
+        return f"ws://{self._tcp.serverAddress().toString()}:{self.port()}"
+
+    def close(self):
+        """Ferme le serveur et tous les sockets, sans prévenir les pairs."""
+        self._tcp.close()
+        sockets = list(self._open)
+        self._open.clear()
+        self._queue.clear()
+        for socket in sockets:
+            socket.close()
+
+    @Slot()
+    def on_tcp_connection(self):
+        """
+        Les connexions sont d'abord lues comme du TCP brut : la requête de handshake est inspectée pour refuser les
+        connexions invalides avec le bon code HTTP, puis le socket est confié au QWebSocketServer.
+        """
+        while self._tcp.hasPendingConnections():
+            socket = self._tcp.nextPendingConnection()
+            socket.readyRead.connect(lambda socket=socket: self.on_handshake(socket))
+
+    def on_handshake(self, socket: QTcpSocket):
+        request = socket.peek(8192).data()
+        if b"\r\n\r\n" not in request: # handshake incomplet
+            return
+        socket.readyRead.disconnect()
+
+        path, query = self.parse(request.split(b" ")[1].decode())
+        status = None
+        if path[0] == "room" and len(path) == 2:
+            if query.get("alias") in self._rooms.get(path[1], {}):
+                status = CONFLICT
+        elif path[0] == "transaction" and len(path) == 2:
+            transaction = self._transactions.get(path[1])
+            if query.get("sender") == "true":
+                pass
+            elif transaction is None or "sender" not in transaction:
+                status = NOT_FOUND
+            elif "receiver" in transaction:
+                status = UNAUTHORIZED
+        elif not (path[0] == "transaction" and len(path) == 3 and path[2] == "bin"):
+            status = NOT_FOUND
+
+        if status is None:
+            self._tcp_sockets[socket.peerPort()] = socket
+            self._ws.handleConnection(socket)
+        else:
+            self.refuse(socket, status)
+
+    def refuse(self, socket: QTcpSocket, status: int):
+        reasons = { CONFLICT: "Conflict", UNAUTHORIZED: "Unauthorized", NOT_FOUND: "Not Found" }
+        response = f"HTTP/1.1 {status} {reasons[status]}\r\nContent-Length: 0\r\nConnection: close\r\n"
+        if status == UNAUTHORIZED:
+            response += "WWW-Authenticate: Transaction\r\n" # le client reconnaît un refus 401 à cet en-tête
+        socket.write((response + "\r\n").encode())
+        socket.disconnectFromHost()
+
+    @staticmethod
+    def parse(url: str) -> tuple[list[str], dict]:
+        parts = urlsplit(url)
+        query = { key: values[0] for key, values in parse_qs(parts.query).items() }
+        return parts.path.strip("/").split("/"), query
+
+    @Slot()
+    def on_ws_connection(self):
+        while self._ws.hasPendingConnections():
+            socket = self._ws.nextPendingConnection()
+            tcp = self._tcp_sockets.pop(socket.peerPort(), None)
+            self._open.add(socket)
+            url = socket.requestUrl()
+            path, query = self.parse(url.path() + "?" + url.query())
+
+            if path[0] == "room":
+                self.join_room(socket, path[1], query.get("alias") or randbytes(4).hex())
+            elif len(path) == 2:
+                self.join_transaction(socket, path[1], query.get("sender") == "true")
+            else:
+                self.join_bin(socket, tcp, (path[1], int(query.get("stream", 0))), query.get("sender") == "true")
+            socket.disconnected.connect(socket.deleteLater)
+
+    def on_closed(self, socket: QWebSocket) -> bool:
+        """Oublie socket ; renvoie False s'il était déjà fermé (disconnected peut être émis deux fois)."""
+        if socket not in self._open:
+            return False
+        self._open.discard(socket)
+        self._connection_free.pop(socket, None)
+        return True
+
+    # salons
+
+    def join_room(self, socket: QWebSocket, room_id: str, alias: str):
+        room = self._rooms.setdefault(room_id, {})
+        room[alias] = socket
+        socket.textMessageReceived.connect(lambda message: self.on_room_message(room, alias, message))
+        socket.disconnected.connect(lambda: self.leave_room(socket, room_id, alias))
+
+        self.broadcast(room, alias, "WELCOME", "JOIN", None)
+
+    def on_room_message(self, room: dict, alias: str, message: str):
+        data = json.loads(message)
+        if data.get("type") == "MESSAGE":
+            self.broadcast(room, alias, "RECEIVED", "MESSAGE", data.get("body"))
+
+    def leave_room(self, socket: QWebSocket, room_id: str, alias: str):
+        if not self.on_closed(socket):
+            return
+        room = self._rooms[room_id]
+        room.pop(alias, None)
+        self.broadcast(room, alias, None, "LEAVE", None)
+        if not room:
+            del self._rooms[room_id]
+
+    def broadcast(self, room: dict, alias: str, own_type: str, others_type: str, body):
+        """Envoie own_type au pair alias et others_type aux autres pairs du salon."""
+        peers = list(room)
+        for peer, socket in room.items():
+            _type = own_type if peer == alias else others_type
+            if _type is not None:
+                self.send(socket, json.dumps({ "type": _type, "alias": alias, "body": body, "peers": peers }))
+
+    # transactions
+
+    def join_transaction(self, socket: QWebSocket, transaction_id: str, sender: bool):
+        transaction = self._transactions.setdefault(transaction_id, {})
+        role, other = ("sender", "receiver") if sender else ("receiver", "sender")
+        transaction[role] = socket
+        socket.textMessageReceived.connect(lambda message: self.on_transaction_message(transaction, role, other, message))
+        socket.disconnected.connect(lambda: self.leave_transaction(socket, transaction_id, role, other))
+
+        if not sender:
+            self.send(transaction["sender"], json.dumps({ "type": "TRANSACTION_JOIN", "body": None }))
+            if "infos" in transaction:
+                self.send(socket, json.dumps({ "type": "TRANSACTION_INFOS", "body": transaction["infos"] }))
+
+    def on_transaction_message(self, transaction: dict, role: str, other: str, message: str):
+        data = json.loads(message)
+        if data["type"] == "TRANSACTION_INFOS":
+            transaction["infos"] = data["body"]
+        self.send(transaction[role], json.dumps({ "type": data["type"] + "_RECEIVED", "body": data["body"] }))
+        if other in transaction:
+            self.send(transaction[other], message)
+
+    def leave_transaction(self, socket: QWebSocket, transaction_id: str, role: str, other: str):
+        if not self.on_closed(socket):
+            return
+        transaction = self._transactions[transaction_id]
+        if transaction.get(role) is socket:
+            del transaction[role]
+            if other in transaction:
+                self.send(transaction[other], json.dumps({ "type": "LEAVE", "body": None }))
+        if "sender" not in transaction and "receiver" not in transaction:
+            del self._transactions[transaction_id]
+            for key in [key for key in self._bins if key[0] == transaction_id]:
+                del self._bins[key]
+
+    # streams binaires
+
+    def join_bin(self, socket: QWebSocket, tcp: QTcpSocket, key: tuple, sender: bool):
+        _bin = self._bins.setdefault(key, { "pending": [], "in_flight": 0, "tcp": None, "paused": False })
+        if sender:
+            self.resume(_bin) # socket remplacé (reprise du stream) : l'ancien n'est plus suspendu
+            _bin["sender"] = socket
+            _bin["tcp"] = tcp
+            if tcp is not None:
+                tcp.setReadBufferSize(READ_BUFFER_SIZE)
+                tcp.destroyed.connect(lambda: self.forget_tcp(_bin, tcp))
+            socket.binaryMessageReceived.connect(lambda data: self.on_binary_message(_bin, socket, data))
+        else:
+            _bin["receiver"] = socket
+            socket.bytesWritten.connect(lambda _: self.update_flow(_bin))
+            for data in _bin["pending"]: # données reçues avant la connexion du receveur
+                self.relay(_bin, data)
+            _bin["pending"].clear()
+        socket.disconnected.connect(lambda: self.leave_bin(socket, _bin, "sender" if sender else "receiver"))
+
+    def on_binary_message(self, _bin: dict, socket: QWebSocket, data):
+        if socket is _bin.get("stale"): # suite d'un stream coupé : l'émetteur va le reprendre sur un nouveau socket
+            return
+        _bin["in_flight"] += len(data)
+        if _bin.get("receiver") is None:
+            _bin["pending"].append(data)
+        else:
+            self.relay(_bin, data)
+        self.update_flow(_bin)
+
+    def relay(self, _bin: dict, data):
+        if self._drop_rate > 0 and self._random.random() < 1 - (1 - self._drop_rate) ** (len(data) / MEBIBYTE):
+            self.drop(_bin)
+            return
+        self.send(_bin["receiver"], data, _bin)
+
+    def drop(self, _bin: dict):
+        """Coupe le socket du receveur et oublie les données qui lui étaient destinées."""
+        receiver = _bin.pop("receiver")
+        _bin["stale"] = _bin.get("sender")
+        _bin["in_flight"] = 0
+        self._queue = [item for item in self._queue if item[2] is not receiver]
+        heapq.heapify(self._queue)
+        receiver.abort()
+        self.resume(_bin) # l'émetteur doit pouvoir constater la coupure
+
+    def leave_bin(self, socket: QWebSocket, _bin: dict, role: str):
+        if self.on_closed(socket) and _bin.get(role) is socket:
+            if role == "sender":
+                self.resume(_bin)
+                _bin["tcp"] = None
+            del _bin[role]
+
+    def forget_tcp(self, _bin: dict, tcp: QTcpSocket):
+        """Le socket de l'émetteur a été détruit sans que sa fermeture ait été vue (pendant une pause par exemple)."""
+        if _bin["tcp"] is tcp:
+            _bin["tcp"] = None
+            _bin["paused"] = False
+
+    # contrôle de flux
+
+    def acknowledge(self, _bin: dict, receiver: QWebSocket, n: int):
+        """La livraison de n octets au receveur a été confirmée à l'émetteur : ils ne sont plus en transit."""
+        if _bin.get("receiver") is receiver: # sinon le stream a été coupé entre-temps et son compte remis à zéro
+            _bin["in_flight"] = max(0, _bin["in_flight"] - n)
+            self.update_flow(_bin)
+
+    def update_flow(self, _bin: dict):
+        """Suspend la lecture du socket de l'émetteur tant que le stream a plus de window octets en transit."""
+        receiver = _bin.get("receiver")
+        backlog = _bin["in_flight"] + (receiver.bytesToWrite() if receiver is not None else 0)
+        if backlog >= self._window:
+            self.pause(_bin)
+        elif _bin["paused"]:
+            self.resume(_bin)
+        elif _bin["tcp"] is not None:
+            self.enable_reading(_bin["tcp"])
+
+    def pause(self, _bin: dict):
+        """
+        Cesse de lire le socket de l'émetteur : QWebSocket n'est plus prévenu des données reçues, qui s'accumulent dans le
+        tampon de lecture limité du QTcpSocket puis dans ceux du système, jusqu'à bloquer l'émetteur.
+        """
+        tcp = _bin["tcp"]
+        if tcp is not None and not _bin["paused"]:
+            _bin["paused"] = True
+            tcp.blockSignals(True)
+
+    def resume(self, _bin: dict):
+        tcp = _bin["tcp"]
+        if tcp is not None and _bin["paused"]:
+            _bin["paused"] = False
+            tcp.blockSignals(False)
+            self.enable_reading(tcp)
+            if tcp.bytesAvailable() > 0: # données arrivées pendant la pause
+                tcp.readyRead.emit()
+            if tcp.state() == QTcpSocket.SocketState.UnconnectedState: # fermeture survenue pendant la pause
+                tcp.disconnected.emit()
+
+    @staticmethod
+    def enable_reading(tcp: QTcpSocket):
+        """
+        Le QTcpSocket cesse de lire le système quand son tampon est plein, et ne reprend que si le tampon est vidé par readData :
+        QWebSocket le vide sans passer par là. Changer la taille du tampon relance la lecture s'il reste de la place.
+        """
+        tcp.setReadBufferSize(0)
+        tcp.setReadBufferSize(READ_BUFFER_SIZE)
+
+    # dégradations
+
+    def send(self, socket: QWebSocket, message, _bin: dict = None):
+        """
+        Livre message (str ou binaire) à socket après le temps de passage dans le lien pour les données binaires, puis la latence
+        de la connexion : les messages d'une connexion sont livrés dans l'ordre. Si _bin est donné, la livraison est confirmée
+        à l'émetteur du stream une latence plus tard (voir acknowledge).
+        """
+        if self._latency == 0 and self._bandwidth == 0:
+            self.deliver(socket, message, _bin)
+            return
+
+        now = time.monotonic()
+        ready = now
+        if self._bandwidth > 0 and not isinstance(message, str):
+            ready = max(now, self._link_free) + len(message) / self._bandwidth
+            self._link_free = ready
+        due = max(ready + self._latency, self._connection_free.get(socket, 0.0))
+        self._connection_free[socket] = due
+        self.push(due, socket, lambda: self.deliver(socket, message, _bin))
+
+    def push(self, due: float, socket: QWebSocket, action):
+        self._count += 1
+        heapq.heappush(self._queue, (due, self._count, socket, action))
+        self.schedule()
+
+    def schedule(self):
+        if self._queue:
+            delay = max(0, self._queue[0][0] - time.monotonic())
+            self._timer.start(int(delay * 1000))
+
+    @Slot()
+    def flush(self):
+        now = time.monotonic()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, _, action = heapq.heappop(self._queue)
+            action()
+        self.schedule()
+
+    def deliver(self, socket: QWebSocket, message, _bin: dict = None):
+        if socket not in self._open:
+            return
+        if isinstance(message, str):
+            socket.sendTextMessage(message)
+        else:
+            socket.sendBinaryMessage(message)
+        if _bin is not None: # la confirmation revient à l'émetteur avec la même latence
+            n = len(message)
+            if self._latency == 0:
+                self.acknowledge(_bin, socket, n)
+            else:
+                self.push(time.monotonic() + self._latency, socket, lambda: self.acknowledge(_bin, socket, n))
@@ -0,0 +1,249 @@
+from PySide6.QtWidgets import QTableView, QHeaderView, QStyledItemDelegate, QStyleOptionViewItem, QStyle, QAbstractItemView, QWidget
+from PySide6.QtGui import QPainter, QColor, QFont, QGuiApplication, QKeyEvent, QKeySequence
+from PySide6.QtCore import Qt, QObject, QAbstractListModel, QModelIndex, QPersistentModelIndex, QTimer, Slot
+from .room_utils import Message, MessageType
+from ..vars import MESSAGE_SCROLLBACK, MESSAGE_FLUSH_INTERVAL, MESSAGE_BATCH_MAX
+from collections import deque
+
+"""
+Fil des messages (Message) d'un salon ou d'une transaction en modèle/vue : le modèle ne garde que les MESSAGE_SCROLLBACK dernières lignes et la vue ne
+dessine que les lignes visibles. Toutes les lignes ont la même hauteur (un message sur plusieurs lignes occupe plusieurs
+lignes du modèle), ce qui évite à la vue de mesurer chaque ligne : l'ajout d'un message ne dépend pas de la taille de
+l'historique. Les messages reçus passent par un MessageBuffer qui les ajoute au modèle par lots, au plus une fois par
+image (MESSAGE_FLUSH_INTERVAL ms). Le texte affiché n'est construit que par le délégué, pour les lignes visibles.
+"""
+
+class MessageModel(QAbstractListModel):
+    """
+    Lignes du fil : la première ligne d'un message est le Message lui-même, les lignes suivantes d'un message sur plusieurs
+    lignes sont des couples (Message, numéro de la ligne). Les lignes les plus anciennes sont retirées, par messages
+    entiers, au-delà de scrollback lignes ; le dernier message est toujours gardé : s'il dépasse à lui seul la limite,
+    seules ses premières lignes sont retirées.
+    """
+    def __init__(self, scrollback: int = MESSAGE_SCROLLBACK, parent=None):
+        super().__init__(parent)
+        self._scrollback = max(1, scrollback)
+        self._rows = [] # lignes, dont les start premières ont été retirées du modèle
+        self._start = 0
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows) - self._start
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[self._start + index.row()]
+        message, line = row if type(row) is tuple else (row, 0)
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole): # l'infobulle montre la ligne non élidée
+            text = message.line(line)
+            return f"{message.alias}: {text}" if line == 0 and message.type in (MessageType.MESSAGE, MessageType.RECEIVED) else text
+        if role == Qt.ItemDataRole.UserRole:
+            return message, line
+        return None
+
+    def set_scrollback(self, scrollback: int):
+        self._scrollback = max(1, scrollback)
+        self.evict()
+
+    def scrollback(self) -> int:
+        return self._scrollback
+
+    def append(self, message: Message):
+        """
+        Ajoute un message à la fin du fil, puis retire les plus anciens si le fil dépasse la limite.
+        """
+        self.append_batch([message])
+
+    def append_batch(self, messages: list[Message]):
+        """
+        Ajoute des messages en une seule insertion : la vue n'est mise à jour qu'une fois par lot.
+        """
+        rows = []
+        for message in messages:
+            rows.append(message)
+            count = message.line_count()
+            if count > 1:
+                rows.extend((message, line) for line in range(1, count))
+        if not rows:
+            return
+        count = self.rowCount()
+        self.beginInsertRows(QModelIndex(), count, count + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+        self.evict()
+
+    def evict(self):
+        excess = self.rowCount() - self._scrollback
+        if excess <= 0:
+            return
+        end = self._start + excess
+        while end < len(self._rows) and type(self._rows[end]) is tuple: # le message le plus ancien est retiré en entier
+            end += 1
+        if end >= len(self._rows): # sauf s'il s'agit du dernier message : seules ses lignes en trop sont retirées
+            end = self._start + excess
+        self.beginRemoveRows(QModelIndex(), 0, end - self._start - 1)
+        self._start = end
+        if self._start > self._scrollback: # les lignes retirées sont libérées par paquets : coût amorti constant
+            del self._rows[:self._start]
+            self._start = 0
+        self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self._start = 0
+        self.endResetModel()
+
+class MessageBuffer(QObject):
+    """
+    Tampon des messages reçus : push() ne fait que les mettre en file, et un minuteur les ajoute au modèle par lots toutes
+    les MESSAGE_FLUSH_INTERVAL ms, au plus MESSAGE_BATCH_MAX à la fois pour qu'un lot ne retarde jamais l'image suivante.
+    Le minuteur ne tourne que lorsque des messages attendent. Lors d'une rafale que le fil n'affiche pas assez vite, les
+    messages en attente sont comptés en lignes comme dans le modèle : les plus anciens sont abandonnés tant que les messages
+    en attente dépassent scrollback lignes, puisqu'ils seraient de toute façon retirés du fil (le dernier est toujours gardé).
+    """
+    def __init__(self, model: MessageModel, interval: int = MESSAGE_FLUSH_INTERVAL, batch: int = MESSAGE_BATCH_MAX, parent=None):
+        super().__init__(parent)
+        self._model = model
+        self._batch = max(1, batch)
+        self._pending = deque() # messages en attente
+        self._lines = 0 # nombre de lignes des messages en attente
+        self._dropped = 0 # messages retirés du tampon sans avoir été affichés
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+
+    @Slot(object)
+    def push(self, message: Message):
+        self.extend([message])
+
+    @Slot(list)
+    def extend(self, messages: list[Message]):
+        for message in messages:
+            self._pending.append(message)
+            self._lines += message.line_count()
+        self.trim()
+        if self._pending and not self._timer.isActive():
+            self._timer.start()
+
+    def trim(self):
+        """
+        Abandonne les plus anciens messages en attente que le modèle retirerait dès leur ajout (voir MessageModel.evict).
+        """
+        pending, scrollback = self._pending, self._model.scrollback()
+        while len(pending) > 1 and self._lines > scrollback: # les lignes à partir du plus ancien ne tiennent pas dans le fil
+            self._lines -= pending.popleft().line_count()
+            self._dropped += 1
+
+    @Slot()
+    def flush(self):
+        """
+        Ajoute au modèle le prochain lot de messages en attente.
+        """
+        pending = self._pending
+        batch = [pending.popleft() for _ in range(min(self._batch, len(pending)))]
+        self._lines -= sum(message.line_count() for message in batch)
+        if not pending:
+            self._timer.stop()
+        self._model.append_batch(batch)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def dropped(self) -> int:
+        return self._dropped
+
+    def clear(self):
+        self._pending.clear()
+        self._lines = 0
+        self._timer.stop()
+
+class MessageDelegate(QStyledItemDelegate):
+    """
+    Dessine une ligne du fil à partir de son Message : l'alias en gris italique puis le texte, ou l'événement (arrivée
+    ou départ d'un pair, événement d'une transaction) en italique. Le texte est élidé s'il dépasse la largeur de la vue
+    (la ligne complète est dans l'infobulle et copiable depuis la sélection).
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._gray = QColor("gray")
+        self._light_gray = QColor("lightgray") # événements d'une transaction
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex):
+        message, line = index.data(Qt.ItemDataRole.UserRole)
+        text = message.line(line)
+        painter.save()
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        rect = option.rect.adjusted(4 if line == 0 else 16, 0, -4, 0) # les lignes suivantes d'un message sont décalées
+        italic = QFont(option.font)
+        italic.setItalic(True)
+        if message.is_event() or message.type is MessageType.INFO:
+            painter.setFont(italic)
+            painter.setPen(self._light_gray if message.type is MessageType.INFO else self._gray)
+            text = painter.fontMetrics().elidedText(text, Qt.TextElideMode.ElideRight, rect.width())
+            painter.drawText(rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, text)
+        else:
+            if line == 0:
+                painter.setFont(italic)
+                painter.setPen(self._gray)
+                metrics = painter.fontMetrics()
+                prefix = metrics.elidedText(f"{message.alias}: ", Qt.TextElideMode.ElideRight, rect.width())
+                painter.drawText(rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, prefix)
+                rect.setLeft(rect.left() + metrics.horizontalAdvance(prefix))
+            painter.setFont(option.font)
+            painter.setPen(option.palette.color(option.palette.ColorRole.Text))
+            text = painter.fontMetrics().elidedText(text, Qt.TextElideMode.ElideRight, rect.width())
+            painter.drawText(rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, text)
+        painter.restore()
+
+class MessageView(QTableView):
+    """
+    Vue du fil, une seule colonne sans en-têtes : contrairement à QListView et QTreeView, dont la mise en page parcourt
+    toutes les lignes, QTableView avec des lignes de hauteur fixe ne calcule que la position des lignes visibles.
+    Suit les nouveaux messages tant qu'elle est en bas du fil.
+    """
+    def __init__(self, parent: QWidget = None):
+        super().__init__(parent)
+        self.horizontalHeader().hide()
+        self.horizontalHeader().setStretchLastSection(True)
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed) # la hauteur d'une ligne n'est jamais recalculée
+        self.verticalHeader().setMinimumSectionSize(1)
+        self.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 2)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setItemDelegate(MessageDelegate(self))
+        self._follow = True
+        self._scroll_timer = QTimer(self) # défilement différé, détruit avec la vue
+        self._scroll_timer.setSingleShot(True)
+        self._scroll_timer.timeout.connect(self.scrollToBottom)
+
+    def setModel(self, model: MessageModel):
+        super().setModel(model)
+        model.rowsAboutToBeInserted.connect(self.on_rows_about_to_be_inserted)
+        model.rowsInserted.connect(self.on_rows_inserted)
+
+    @Slot(QModelIndex, int, int)
+    def on_rows_about_to_be_inserted(self, parent: QModelIndex, first: int, last: int):
+        bar = self.verticalScrollBar()
+        self._follow = bar.value() >= bar.maximum()
+
+    @Slot(QModelIndex, int, int)
+    def on_rows_inserted(self, parent: QModelIndex, first: int, last: int):
+        if self._follow and not self._scroll_timer.isActive():
+            # le défilement est fait une fois pour tous les messages reçus pendant le même tour de la boucle d'événements
+            self._scroll_timer.start(0)
+
+    def keyPressEvent(self, event: QKeyEvent):
+        if event.matches(QKeySequence.StandardKey.Copy): # copie des lignes sélectionnées, non élidées
+            rows = sorted(index.row() for index in self.selectionModel().selectedRows())
+            lines = [self.model().index(row).data(Qt.ItemDataRole.DisplayRole) for row in rows]
+            QGuiApplication.clipboard().setText("\n".join(lines))
+            return
+        super().keyPressEvent(event)
@@ -0,0 +1,70 @@
+from PySide6.QtWidgets import QListView, QAbstractItemView, QWidget
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QPersistentModelIndex, Slot
+
+class PeerModel(QAbstractListModel):
+    """
+    Pairs présents dans un salon, dans l'ordre d'arrivée. set_peers() compare la liste reçue à l'état courant et n'applique
+    que les départs et les arrivées : la vue n'est pas reconstruite à chaque message du salon.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._peers = [] # alias affichés, dans l'ordre d'arrivée
+        self._received = [] # dernière liste reçue, pour ignorer les listes identiques sans les comparer pair par pair
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._peers)
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if index.isValid() and role == Qt.ItemDataRole.DisplayRole:
+            return self._peers[index.row()]
+        return None
+
+    @Slot(list)
+    def set_peers(self, peers: list[str]):
+        """
+        Met à jour les pairs : les pairs partis sont retirés (par plages de lignes consécutives), les nouveaux ajoutés à la fin.
+        """
+        if peers == self._received:
+            return
+        self._received = list(peers)
+        incoming = set(peers)
+
+        row = len(self._peers)
+        while row > 0: # du bas vers le haut, pour que les lignes restantes gardent leur numéro
+            row -= 1
+            if self._peers[row] in incoming:
+                continue
+            first = row
+            while first > 0 and self._peers[first - 1] not in incoming:
+                first -= 1
+            self.beginRemoveRows(QModelIndex(), first, row)
+            del self._peers[first:row + 1]
+            self.endRemoveRows()
+            row = first
+
+        current = set(self._peers)
+        added = [peer for peer in dict.fromkeys(peers) if peer not in current]
+        if added:
+            self.beginInsertRows(QModelIndex(), len(self._peers), len(self._peers) + len(added) - 1)
+            self._peers.extend(added)
+            self.endInsertRows()
+
+    def peers(self) -> list[str]:
+        return list(self._peers)
+
+    def clear(self):
+        self.beginResetModel()
+        self._peers = []
+        self._received = []
+        self.endResetModel()
+
+class PeerView(QListView):
+    """
+    Liste des pairs d'un salon.
+    """
+    def __init__(self, parent: QWidget = None):
+        super().__init__(parent)
+        self.setObjectName("peers")
+        self.setUniformItemSizes(True)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
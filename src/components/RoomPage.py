@@ -1,7 +1,10 @@
-from PySide6.QtWidgets import QWidget, QHBoxLayout, QTextEdit, QTextBrowser, QVBoxLayout, QLabel, QPushButton, QGroupBox
+from PySide6.QtWidgets import QWidget, QHBoxLayout, QTextEdit, QVBoxLayout, QLabel, QPushButton, QGroupBox
 from PySide6.QtGui import QCloseEvent
 from PySide6.QtCore import QEvent, Qt, QObject, Signal, Slot
 from .Connection import Connection
+from .MessageFeed import MessageModel, MessageBuffer, MessageView
+from .room_utils import Message
+from .PeerList import PeerModel, PeerView
 from pathlib import Path
 from ..vars import STYLES_PATH
 
@@ -19,7 +22,10 @@ class RoomFeed(QWidget):
         self._box_layout = QVBoxLayout()
 
         self._feed_layout = QHBoxLayout()
-        self._messages_feed = QTextBrowser() # le fil des messages est un QTextBrowser qui supporte le HTML
+        self._messages_model = MessageModel(parent=self) # le fil des messages ne garde que les dernières lignes
+        self._messages_buffer = MessageBuffer(self._messages_model, parent=self) # les messages reçus sont affichés par lots
+        self._messages_feed = MessageView()
+        self._messages_feed.setModel(self._messages_model)
 
         self._messages_layout = QVBoxLayout()
         self._messages_feed_label = QLabel("Messages:", parent=self._box)
@@ -28,7 +34,9 @@ class RoomFeed(QWidget):
 
         self._peers_layout = QVBoxLayout()
         self._peers_feed_label = QLabel("Peers:", parent=self._box)
-        self._peers_feed = QTextBrowser(self._box)  # le fil des pairs est un QTextBrowser qui supporte le HTML
+        self._peers_model = PeerModel(self) # seuls les arrivées et départs sont appliqués à la liste
+        self._peers_feed = PeerView(self._box)
+        self._peers_feed.setModel(self._peers_model)
         self._peers_layout.addWidget(self._peers_feed_label)
         self._peers_layout.addWidget(self._peers_feed)
 
@@ -41,28 +49,27 @@ class RoomFeed(QWidget):
         self.setLayout(self._layout)
 
     def clear_feed(self):
-        self._messages_feed.clear()
-        self._peers_feed.clear()
+        self._messages_buffer.clear()
+        self._messages_model.clear()
+        self._peers_model.clear()
     
-    def peers_feed(self):
-        return self._peers_feed
+    def peers_model(self):
+        return self._peers_model
     
-    @Slot(str, str, bool)
-    def append_to_messages_feed(self, alias: str, text: str, event: bool):
-        """Ajout d'un message textuel au fil. Si event est à True, il s'agit d'un message signalant l'arrivée ou le départ d'un pair."""
-        if event:
-            formatted_message = f"<div><span style='color: gray; font-style: italic; padding-right: 50px;'>{text}</span></div>"
-        else:
-            with_br = text.replace('\n', '<br>')
-            formatted_message = f"<div><span style='color: gray; font-style: italic; padding-right: 50px;'>{alias}: </span>{with_br}</div>"
-        self._messages_feed.append(formatted_message)
+    @Slot(object)
+    def append_to_messages_feed(self, message: Message):
+        """Ajout d'un message (texte d'un pair, arrivée ou départ d'un pair) au fil."""
+        self._messages_buffer.push(message)
+
+    @Slot(list)
+    def extend_messages_feed(self, messages: list[Message]):
+        """Ajout d'un lot de messages au fil."""
+        self._messages_buffer.extend(messages)
 
     @Slot(list)
     def set_peers_feed(self, peers: list[str]):
         """Mise à jour des pairs."""
-        self._peers_feed.clear()
-        for peer in peers:
-            self._peers_feed.append(f"<div><span style='color: gray; font-style: italic; padding-right: 50px;'>{peer}</span></div>")
+        self._peers_model.set_peers(peers)
 
 class Interactions(QWidget):
     """Widget contenant les interactions du client dans le salon : envoyer un message et quitter le salon."""
@@ -152,7 +159,6 @@ class RoomPage(QWidget):
     @Slot()
     def leave_room(self):
         self._feed.clear_feed()
-        self._feed.peers_feed().clear()
 
         self._connection.close()
         self.left.emit()
@@ -173,6 +179,6 @@ class RoomPage(QWidget):
 
         self._interactions.leave_button().clicked.connect(self.leave_room) # connexions aux slots
         self._connection.update_peers.connect(self._feed.set_peers_feed)
-        self._connection.text_received.connect(self._feed.append_to_messages_feed)
+        self._connection.messages_received.connect(self._feed.extend_messages_feed)
         self._interactions.message_submitted.connect(self._connection.send_text)
         self._interactions.leave_clicked.connect(self.leave_room)
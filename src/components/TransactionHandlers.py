@@ -1,9 +1,12 @@
 from PySide6.QtWebSockets import QWebSocket
-from PySide6.QtWidgets import QWidget
-from PySide6.QtCore import Signal, QFileInfo, QThread, QByteArray
-from ..vars import SERVER_DOMAIN, UNAUTHORIZED, NOT_FOUND
-from humanize import naturalsize
+from PySide6.QtCore import Signal, Slot, QObject, QFileInfo, QThread, QByteArray, QMetaObject, QCoreApplication, Qt, QTimer
+from ..vars import SERVER_DOMAIN, UNAUTHORIZED, NOT_FOUND, UPLOAD_HIGH_WATERMARK, UPLOAD_LOW_WATERMARK, WRITE_BUFFER_SIZE, PROGRESS_INTERVAL, CHECKPOINT_INTERVAL, RECONNECT_DELAY, RECONNECT_ATTEMPTS, TRANSFER_STREAMS, COMPRESSION, DIGEST_ALGORITHM, MANIFEST_BLOCK_SIZE, MANIFEST_BATCH, REPAIR_ATTEMPTS
+from .transfer_utils import ChunkSizer, TokenBucket, FileWriter, ThreadedFileWriter, MappedFileWriter, FileSet, FileSetWriter, TarArchive, TarExtractor, open_source, source_size, ProgressAggregator, Compressor, Decompressor, available_codecs, choose_codec, hash_range, BlockHasher, Manifest, complete_blocks, split_ranges, write_checkpoint, read_checkpoint, remove_checkpoint, write_leaves, read_leaves
+from pathlib import Path
 import json
+import logging
+import math
+import time
 
 """
 Fonctionnement des transactions :
@@ -14,96 +17,700 @@ Pour s'y connecter il ouvre aussi un socket à transaction/:transaction_id
 - Diverses informations sont échangées (informations sur le fichier, acceptation de la transaction, début, etc.) à travers cette connexion
 - Lorsque l'émetteur et le récepteur sont prêts, ils se connectent à transaction/:transaction_id/bin. C'est ici que l'émetteur
 envoie le stream au récepteur.
+- Si TRANSACTION_INFOS indique un codec, chaque chunk est compressé par l'émetteur et décompressé par le récepteur ; chaque
+stream a son propre état de compression, réinitialisé lorsqu'il reprend. Les positions et la progression portent sur les octets
+du fichier, non compressés.
+- Chaque côté calcule l'empreinte (DIGEST_ALGORITHM) de chaque bloc de block_size octets (annoncé dans TRANSACTION_INFOS)
+pendant la lecture ou l'écriture. L'émetteur publie ses empreintes par lots dans TRANSACTION_MANIFEST, puis, une fois toutes
+les plages envoyées, la racine de Merkle du fichier dans TRANSACTION_DIGEST, avant TRANSACTION_UPLOAD.
+- Le récepteur compare chaque bloc reçu à l'empreinte publiée. Une fois le fichier reçu et la racine vérifiée, il envoie
+TRANSACTION_END, ou TRANSACTION_REPAIR avec les plages corrompues : chacune est renvoyée sur son propre stream (numéro
+choisi par le récepteur) et écrite à sa position. Après REPAIR_ATTEMPTS essais, le récepteur envoie TRANSACTION_CORRUPTED.
+- En mode parallèle (streams > 1 dans TRANSACTION_INFOS), le fichier est découpé en plages (split_ranges) et chaque plage k
+est envoyée sur son propre socket transaction/:transaction_id/bin?stream=k. Le récepteur écrit chaque plage à sa position
+dans un fichier préalloué.
+- Si un stream est interrompu, le récepteur enregistre la position atteinte par chaque stream à côté du fichier partiel
+(fichier de reprise), rouvre le socket puis envoie TRANSACTION_RESUME avec le numéro du stream et sa position. L'émetteur
+arrête l'envoi de ce stream, répond TRANSACTION_RESTART avec les mêmes valeurs et envoie la suite de la plage.
+- Un fichier de reprise permet aussi de reprendre un fichier partiel dans une nouvelle transaction : les positions des
+streams sont alors transmises dans TRANSACTION_ACCEPT puis dans TRANSACTION_START.
 """
 
-class Sender(QThread):
+logger = logging.getLogger(__name__) # erreurs des transferts, sur la sortie d'erreur (voir main.py)
+
+class ProgressReporter(QObject):
     """
-    Une classe qui hérite de QThread et qui envoie un stream d'octets au serveur (transaction/:transaction_id/bin).
-    Utilisation de QThread pour ne pas bloquer le GUI.
+    Publie la progression d'un transfert à intervalle fixe (PROGRESS_INTERVAL) plutôt qu'à chaque chunk : les octets sont
+    accumulés par un ProgressAggregator dans le thread du transfert, puis émis en une fois avec les débits et le temps restant.
+    La progression est publiée immédiatement quand le total est atteint.
     """
-    progress = Signal(int) # émis lorsqu'un nouveau chunk a été envoyé, prend en argument la taille du chunk
-    finished = Signal() # émis lorsque l'upload est terminé
+    progress = Signal(int) # octets transférés depuis la publication précédente
+    stats = Signal(float, float, float) # débit instantané, débit lissé (octets/s), temps restant (s, -1 si inconnu)
 
-    def __init__(self, transaction_id: str, filepath: str, parent=None):
+    def __init__(self, total: int = None, done: int = 0, parent=None):
         super().__init__(parent)
+        self._aggregator = ProgressAggregator(total, done)
+        self._timer = QTimer(self)
+        self._timer.setInterval(PROGRESS_INTERVAL)
+        self._timer.timeout.connect(self.publish)
+
+    def add(self, n: int):
+        self._aggregator.add(n)
+        if self._aggregator.is_complete():
+            self.stop()
+        elif not self._timer.isActive():
+            self._timer.start()
+
+    def set_done(self, done: int):
+        """
+        Publie ce qui reste puis corrige le nombre d'octets transférés (voir ProgressAggregator.set_done).
+        """
+        self.publish()
+        self._aggregator.set_done(done)
+
+    @Slot()
+    def publish(self):
+        n = self._aggregator.take()
+        if n > 0:
+            self.progress.emit(n)
+            self.stats.emit(*self._aggregator.stats())
+
+    def stop(self):
+        """
+        Publie ce qui reste et arrête les publications périodiques.
+        """
+        self._timer.stop()
+        self.publish()
+
+class Sender(QObject):
+    """
+    Objet qui envoie un stream d'octets au serveur (transaction/:transaction_id/bin) : la plage [start, end) du fichier,
+    à partir de offset si le début de la plage a déjà été reçu.
+    Il est déplacé dans un QThread dédié : le socket est créé dans ce thread et la lecture du fichier comme l'envoi
+    se font dans sa boucle d'événements, le GUI n'est donc jamais bloqué.
+    Les signaux sont reçus par le thread principal via des connexions en file (queued connections).
+
+    L'envoi est régulé : le fichier n'est lu que tant que le tampon sortant du socket (bytesToWrite) est sous
+    high_watermark, puis la lecture reprend lorsque bytesWritten le fait redescendre sous low_watermark.
+    La mémoire occupée reste donc bornée quelle que soit la taille du fichier.
+
+    La taille des chunks est choisie par un ChunkSizer, alimenté par le débit d'écriture du socket et par le RTT
+    (mesuré avec des pings WebSocket). Les chunks sont lus (readinto) dans un même tampon réutilisé d'un chunk à l'autre.
+
+    Si stream n'est pas None, le socket est ouvert sur transaction/:transaction_id/bin?stream=stream (mode parallèle).
+    Si codec n'est pas None, chaque chunk est compressé avant d'être envoyé (voir Compressor) ; la progression compte
+    les octets lus dans le fichier.
+
+    L'empreinte de chaque bloc de la plage est calculée sur les chunks lus (voir BlockHasher) et émise par lots de
+    MANIFEST_BATCH. Si l'envoi reprend en cours de plage, le début de la plage est relu pour en recalculer les empreintes,
+    à partir de hashed (aligné sur un bloc) si les empreintes des blocs précédents sont déjà publiées ; si la plage est déjà
+    entièrement reçue, aucun socket n'est ouvert.
+
+    Si limiter (TokenBucket, partagé par les streams d'une transaction) limite le débit, aucun chunk n'est lu tant que le
+    seau est vide : un minuteur relance la lecture dès que l'envoi est de nouveau permis. Les chunks ne dépassent pas la
+    réserve du seau, et les octets comptés sont ceux envoyés (compressés le cas échéant).
+    """
+    SAMPLE_INTERVAL = 0.25 # intervalle (en secondes) entre deux mesures de débit
+    PING_INTERVAL = 1000 # intervalle (en ms) entre deux pings
+    progress = Signal(int, int) # émis périodiquement avec le numéro du stream et le nombre d'octets envoyés depuis l'émission précédente
+    leaves = Signal(int, int, list) # émis avec le numéro du stream, le numéro du premier bloc et les empreintes des blocs lus
+    finished = Signal(int) # émis avec le numéro du stream lorsque sa plage a été entièrement envoyée
+
+    def __init__(self, transaction_id: str, filepath: str | FileSet | TarArchive, high_watermark: int = UPLOAD_HIGH_WATERMARK, low_watermark: int = UPLOAD_LOW_WATERMARK, chunk_sizer: ChunkSizer = None, start: int = 0, end: int = None, offset: int = None, stream: int = None, codec: str = None, block_size: int = MANIFEST_BLOCK_SIZE, limiter: TokenBucket = None, hashed: int = None):
+        super().__init__() # pas de parent : l'objet doit pouvoir être déplacé dans un autre thread
         self._filepath = filepath
+        self._position = offset if offset is not None else start # position du prochain octet à envoyer
+        self._end = end if end is not None else source_size(filepath)
+        self._stream = stream if stream is not None else 0
         self._url = f"{SERVER_DOMAIN}/transaction/{transaction_id}/bin?sender=true"
+        if stream is not None:
+            self._url += f"&stream={stream}"
+        self._high_watermark = high_watermark
+        self._low_watermark = min(low_watermark, high_watermark)
+        self._chunk_sizer = chunk_sizer if chunk_sizer is not None else ChunkSizer()
+        self._compressor = Compressor(codec) if codec is not None else None
+        self._hashed = hashed if hashed is not None else start # début des octets dont l'empreinte doit être calculée
+        self._hasher = BlockHasher(self._hashed, self._end, block_size)
+        self._limiter = limiter
+        self._limit_timer = None # relance la lecture quand le débit limité le permet
+        self._reporter = None
+        self._sample_bytes = 0 # octets écrits depuis la dernière mesure de débit
+        self._sample_start = None
+        self._ping_timer = None
+        self._s = None
+        self._file = None
+        self._buffer = QByteArray() # tampon de lecture réutilisé, redimensionné si la taille des chunks change
+        self._view = memoryview(self._buffer) # vue Python (modifiable) sur le tampon de self._buffer
+        self._sent = False # True une fois que le dernier chunk a été envoyé
+        self._pinging = False # True entre un ping et son pong
 
+    @Slot()
+    def run(self):
+        """
+        Point d'entrée du thread de travail (connecté à QThread.started).
+        Le socket est créé ici pour appartenir au thread de travail.
+        """
+        if self._position > self._hashed: # reprise : les empreintes doivent couvrir le début de la plage
+            hash_range(self._filepath, self._hashed, self._position, self._hasher)
+        self.publish_leaves() # y compris l'empreinte du bloc vide d'un fichier vide
+        if self._position >= self._end: # plage déjà reçue
+            self._sent = True
+            self.finished.emit(self._stream)
+            return
+        self._s = QWebSocket(parent=self)
+        self._s.connected.connect(self.send_file)
+        self._s.disconnected.connect(self.on_disconnected)
+        self._s.errorOccurred.connect(self.on_error)
+        self._s.pong.connect(self.on_pong)
+        self._reporter = ProgressReporter(self._end - self._position, parent=self) # vit dans le thread de travail
+        self._reporter.progress.connect(self.on_progress)
+        self._s.open(self._url)
+
+    @Slot()
     def send_file(self):
-        self._s = QWebSocket()
-        def on_open():
-            with open(self._filepath, "rb") as file:
-                while True:
-                    chunk = file.read(2048)
-                    if not chunk: # fin de la lecture
-                        break
-                    self._s.sendBinaryMessage(chunk)
-                    self.progress.emit(len(chunk))
-
-                self._s.close()
-                self.finished.emit()
-
-        def on_error(error):
-            print(self._s.errorString())
+        """
+        Le socket est ouvert : on ouvre le fichier et on remplit le tampon du socket.
+        """
+        self._file = open_source(self._filepath) # lecture directe dans self._buffer, sans tampon intermédiaire
+        self._file.seek(self._position)
+        self._s.bytesWritten.connect(self.on_bytes_written)
+        self._sample_start = time.monotonic()
 
-        self._s.open(self._url)
-        self._s.connected.connect(on_open)
-        self._s.errorOccurred.connect(on_error)
+        self._ping_timer = QTimer(self)
+        self._ping_timer.timeout.connect(self.ping)
+        self._ping_timer.start(self.PING_INTERVAL)
+        self.ping()
 
-    def run(self):
-        self.send_file()
+        self._limit_timer = QTimer(self)
+        self._limit_timer.setSingleShot(True)
+        self._limit_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._limit_timer.timeout.connect(self.on_limit_timeout)
+
+        self.pump()
+
+    def pump(self):
+        """
+        Lit et envoie des chunks tant que le tampon sortant du socket n'a pas atteint high_watermark et que le débit limité
+        le permet.
+        """
+        while self._s.bytesToWrite() < self._high_watermark:
+            if self._position >= self._end: # fin de la plage
+                self.end_range()
+                return
+            size = min(self._chunk_sizer.size(), self._high_watermark, self._end - self._position)
+            if self._limiter is not None:
+                wait, allowance = self._limiter.poll() # lus ensemble : le débit peut changer depuis un autre thread
+                if wait > 0:
+                    if not self._limit_timer.isActive():
+                        self._limit_timer.start(math.ceil(wait * 1000))
+                    return
+                if allowance is not None:
+                    size = min(size, allowance)
+            self.resize_buffer(size)
+            n = self._file.readinto(self._view)
+            if not n: # fin du fichier avant celle de la plage
+                self.end_range()
+                return
+            if n < self._buffer.size(): # dernier chunk
+                self.resize_buffer(n)
+            self._hasher.update(self._view)
+            if self._hasher.pending() >= MANIFEST_BATCH:
+                self.publish_leaves()
+            if self._compressor is not None:
+                sent = self._s.sendBinaryMessage(self._compressor.compress(self._view))
+            else:
+                sent = self._s.sendBinaryMessage(self._buffer) # copié (et masqué) par Qt dans le tampon du socket, self._buffer peut être réutilisé
+            if self._limiter is not None:
+                self._limiter.consume(sent)
+            self._position += n
+            self._reporter.add(n)
+
+    def end_range(self):
+        """
+        Toute la plage a été lue : on publie les dernières empreintes et on ferme le socket une fois son tampon vidé.
+        """
+        self.publish_leaves()
+        self._file.close()
+        self._ping_timer.stop()
+        self._reporter.stop()
+        self._sent = True
+        self.close_when_flushed()
+
+    @Slot()
+    def on_limit_timeout(self):
+        if not self._sent and self._file is not None and not self._file.closed:
+            self.pump()
+
+    def publish_leaves(self):
+        while self._hasher.pending():
+            self.leaves.emit(self._stream, *self._hasher.take(MANIFEST_BATCH))
+
+    def resize_buffer(self, size: int):
+        """
+        Redimensionne le tampon de lecture. Qt conserve la capacité allouée : rien n'est réalloué tant que la taille ne dépasse pas
+        le plus grand chunk déjà lu.
+        """
+        if self._buffer.size() != size:
+            self._view.release() # la vue doit être recréée car les données peuvent être déplacées
+            self._buffer.resize(size)
+            self._view = memoryview(self._buffer)
+
+    @Slot(int)
+    def on_bytes_written(self, n: int):
+        """
+        Une partie du tampon a été écrite sur le réseau : on relance la lecture si le tampon est assez vidé.
+        """
+        self._sample_bytes += n
+        now = time.monotonic()
+        if now - self._sample_start >= self.SAMPLE_INTERVAL:
+            self._chunk_sizer.record(self._sample_bytes, now - self._sample_start)
+            self._sample_bytes = 0
+            self._sample_start = now
+
+        if self._sent:
+            self.close_when_flushed()
+        elif self._s.bytesToWrite() <= self._low_watermark:
+            self.pump()
+
+    def close_when_flushed(self):
+        """
+        Ferme le socket une fois le dernier chunk envoyé, son tampon vidé et le dernier pong reçu. QWebSocket ferme la connexion
+        TCP sans attendre le serveur : une donnée qui arrive ensuite (un pong) provoque un reset, et le serveur perd ce qu'il
+        n'a pas encore lu.
+        """
+        if self._sent and not self._s.bytesToWrite() and not self._pinging:
+            self._s.close()
+
+    @Slot()
+    def ping(self):
+        if not self._pinging:
+            self._pinging = True
+            self._s.ping()
+
+    @Slot(int, QByteArray)
+    def on_pong(self, elapsed: int, payload: QByteArray):
+        self._pinging = False
+        self._chunk_sizer.set_rtt(elapsed / 1000)
+        self.close_when_flushed()
+
+    @Slot(int)
+    def on_progress(self, n: int):
+        self.progress.emit(self._stream, n)
+
+    @Slot()
+    def on_disconnected(self):
+        if self._sent: # la fermeture propre garantit que tout a été transmis au serveur
+            self.finished.emit(self._stream)
+
+    def on_error(self, error):
+        logger.warning(self._s.errorString())
+
+    @Slot()
+    def stop(self):
+        """
+        Interrompt l'envoi (invoqué depuis le thread principal, exécuté dans le thread de travail).
+        """
+        if self._limit_timer is not None:
+            self._limit_timer.stop()
+        if self._s is not None:
+            self._s.abort()
+        if self._file is not None:
+            self._file.close()
 
-class Receiver(QWidget):
+class ReceiverStream(QObject):
     """
-    Classe qui écoute le stream de l'émetteur (transaction/:transaction_id/bin) et l'écrit dans le fichier spécifié.
+    Un socket transaction/:transaction_id/bin qui reçoit la plage [start, end) du fichier et la transmet au Receiver.
+    Si le stream est interrompu avant la fin de sa plage, le socket est rouvert puis resume_requested est émis ; les données
+    reçues sont ignorées jusqu'à ce que l'émetteur confirme la reprise (resume()), car elles peuvent encore provenir de
+    l'ancien stream.
+    Si codec n'est pas None, les chunks sont décompressés avant d'être écrits (voir Decompressor).
+    hasher (BlockHasher) calcule l'empreinte des blocs reçus, transmises au Receiver au fil de l'eau.
     """
-    progress = Signal(int) # émis lorsqu'un nouveau chunk a été reçu, prend en argument la taille du chunk
+    resume_requested = Signal(int, int) # émis quand le stream a été rouvert, avec son numéro et la position à partir de laquelle reprendre
+    opened = Signal() # émis à la première connexion du socket
+    interrupted = Signal() # émis quand le stream est interrompu avant la fin de sa plage
+    failed = Signal() # émis quand le stream n'a pas pu être rouvert
 
-    def __init__(self, transaction_id: str, filepath: str, parent=None):
+    def __init__(self, receiver: "Receiver", url: str, index: int, end: int, position: int, hasher, codec: str = None, parent=None):
         super().__init__(parent)
-        self._filepath = filepath
-        self._s = QWebSocket()
+        self._receiver = receiver
+        self._index = index
+        self._end = end
+        self._position = position # position du prochain octet attendu
+        self._hasher = hasher
+        self._codec = codec
+        self._decompressor = Decompressor(codec) if codec is not None else None
+        self._interrupted = False # True entre l'interruption du stream et sa réouverture
+        self._discarding = False # True entre la réouverture du stream et la confirmation de l'émetteur
+        self._closed = False
+        self._opened = False
+        self._attempts = 0 # tentatives de reconnexion
+        self._url = url
 
-        with open(filepath, "w"): # fichier vierge
-            pass
+        self._reconnect_timer = QTimer(self)
+        self._reconnect_timer.setSingleShot(True)
+        self._reconnect_timer.timeout.connect(self.reconnect)
 
-        self._url = f"{SERVER_DOMAIN}/transaction/{transaction_id}/bin?sender=false"
+        self._s = QWebSocket(parent=self)
         self._s.binaryMessageReceived.connect(self.on_received)
+        self._s.connected.connect(self.on_connected)
+        self._s.disconnected.connect(self.on_disconnected)
+        self._s.errorOccurred.connect(self.on_error)
+
+    def open(self):
         self._s.open(self._url)
 
+    def position(self) -> int:
+        return self._position
+
+    def is_opened(self) -> bool:
+        return self._opened
+
+    def is_complete(self) -> bool:
+        return self._end is not None and self._position >= self._end
+
     def on_received(self, data: QByteArray):
-        chunk = data.data()
-        with open(self._filepath, "ab") as file: # écriture
-            file.write(chunk)
-        self.progress.emit(len(chunk))
+        if self._discarding: # reste de l'ancien stream
+            return
+        if self._decompressor is not None:
+            try:
+                data = self._decompressor.decompress(data)
+            except ValueError as error: # la suite du stream est illisible : il reprend à la position atteinte
+                logger.warning(error)
+                self._s.abort()
+                return
+        self._hasher.update(data)
+        if self._hasher.pending():
+            self._receiver.add_leaves(*self._hasher.take())
+        position = self._position
+        self._position += len(data) # avant l'écriture : le Receiver peut annoncer la fin du fichier pendant write()
+        self._receiver.write(position, data)
+
+    @Slot()
+    def on_connected(self):
+        if not self._opened:
+            self._opened = True
+            self.opened.emit()
+        if self._interrupted: # le stream a été rouvert
+            self._interrupted = False
+            self._attempts = 0
+            self._discarding = True
+            self.resume_requested.emit(self._index, self._position)
+
+    @Slot()
+    def on_disconnected(self):
+        if self._closed or self.is_complete():
+            return
+        if not self._interrupted: # interruption prématurée du stream
+            self._interrupted = True
+            self._discarding = False
+            self.interrupted.emit()
+        self.schedule_reconnect()
+
+    def on_error(self, error):
+        logger.warning(self._s.errorString())
+        if self._interrupted:
+            self.schedule_reconnect()
+
+    def schedule_reconnect(self):
+        if self._reconnect_timer.isActive():
+            return
+        if self._attempts >= RECONNECT_ATTEMPTS:
+            self.failed.emit()
+            return
+        self._attempts += 1
+        self._reconnect_timer.start(RECONNECT_DELAY * self._attempts)
+
+    @Slot()
+    def reconnect(self):
+        if not self._closed:
+            self._s.open(self._url)
+
+    def resume(self, offset: int):
+        """
+        L'émetteur a confirmé qu'il reprend l'envoi à la position offset : les données reçues sont de nouveau écrites.
+        """
+        if offset == self._position:
+            self._discarding = False
+            if self._codec is not None: # l'émetteur repart d'un nouvel état de compression
+                self._decompressor = Decompressor(self._codec)
 
     def close(self):
+        self._closed = True
+        self._reconnect_timer.stop()
         self._s.close()
 
-class Transaction(QWidget):
+class Receiver(QObject):
+    """
+    Classe qui écoute le stream de l'émetteur (transaction/:transaction_id/bin) et l'écrit dans le fichier spécifié.
+    Le fichier reste ouvert pendant tout le transfert derrière un tampon d'écriture (FileWriter) ; si threaded est à True,
+    les écritures sont faites par un thread dédié (ThreadedFileWriter).
+    Si mapped est à True et que filesize est connu, le fichier est préalloué et les chunks sont copiés dans une projection
+    en mémoire (MappedFileWriter) ; en cas d'échec, l'écriture à la suite (FileWriter) est utilisée.
+
+    Si streams est supérieur à 1, le fichier est reçu en parallèle sur un ReceiverStream par plage (voir split_ranges) :
+    chaque plage est écrite à sa position, dans un fichier préalloué et projeté en mémoire si possible.
+
+    L'empreinte de chaque bloc est calculée sur les octets reçus et comparée au manifeste de l'émetteur (voir Manifest). Les
+    plages corrompues sont reçues à nouveau sur des streams supplémentaires (repair()), puis repaired est émis.
+
+    La position atteinte par chaque stream est régulièrement enregistrée dans un fichier de reprise, ainsi qu'à chaque
+    interruption d'un stream et à la fermeture si le fichier est incomplet ; les empreintes des blocs reçus sont enregistrées
+    en même temps (voir write_leaves). En cas de reprise d'un fichier partiel, seul le dernier bloc incomplet de chaque plage
+    est donc relu depuis le disque (toute la partie reçue si les empreintes n'ont pas été enregistrées).
+    offsets donne la position de départ de chaque stream (reprise d'un fichier partiel) ; par défaut les plages sont reçues en entier.
+    codec est le codec de compression annoncé par l'émetteur (None si le fichier est envoyé tel quel).
+    Si files n'est pas None (transaction groupée), les octets reçus sont répartis entre ses fichiers (FileSetWriter) et
+    filepath est le dossier de destination. Si archive vaut "tar", l'archive reçue est extraite à la volée dans ce dossier
+    (TarExtractor) : elle est reçue sur un seul stream et n'est pas reprise après une fermeture.
+    """
+    progress = Signal(int) # émis périodiquement avec le nombre d'octets reçus depuis l'émission précédente
+    stats = Signal(float, float, float) # débit instantané, débit lissé et temps restant (voir ProgressReporter)
+    resume_requested = Signal(int, int) # émis quand un stream a été rouvert après une interruption (voir ReceiverStream)
+    failed = Signal() # émis quand un stream n'a pas pu être rouvert
+    repair_ready = Signal(list) # émis avec les plages redemandées quand leurs streams sont tous connectés
+    repaired = Signal() # émis quand toutes les plages redemandées ont été reçues
+
+    def __init__(self, transaction_id: str, filepath: str, buffer_size: int = WRITE_BUFFER_SIZE, threaded: bool = False, mapped: bool = False, filesize: int = None, offsets: list[int] = None, filename: str = None, streams: int = 1, codec: str = None, block_size: int = MANIFEST_BLOCK_SIZE, files: FileSet = None, archive: str = None, parent=None):
+        super().__init__(parent)
+        self._url = f"{SERVER_DOMAIN}/transaction/{transaction_id}/bin?sender=false"
+        self._filepath = filepath
+        source = files if files is not None else filepath # ce qui est relu à la reprise
+        self._filename = filename
+        self._filesize = filesize
+        self._ranges = split_ranges(filesize, streams) if filesize is not None else [(0, None)]
+        self._striped = len(self._ranges) > 1
+        offsets = offsets if offsets is not None else [start for start, _ in self._ranges]
+        resumed = any(offset > start for offset, (start, _) in zip(offsets, self._ranges))
+        self._received = 0 # octets écrits depuis le dernier enregistrement de la progression
+        self._codec = codec
+        self._block_size = block_size
+        self._manifest = Manifest(filesize, block_size) if filesize is not None else None
+        self._repairs = {} # ReceiverStream des plages redemandées, par numéro de stream
+        self._archive = archive
+        self._writer = None
+        self._finished = False # True une fois le fichier écrit sur le disque (finish)
+        self._saved = [] # numéro du premier bloc de chaque plage dont l'empreinte n'est pas enregistrée (voir save_leaves)
+        if not resumed:
+            remove_checkpoint(filepath) # empreintes d'un fichier partiel précédent
+
+        if archive is not None:
+            self._writer = TarExtractor(filepath, buffer_size)
+        elif files is not None:
+            self._writer = FileSetWriter(files, buffer_size, offsets[0] if not self._striped else 0, keep=resumed)
+        elif (mapped or self._striped) and filesize:
+            try:
+                self._writer = MappedFileWriter(filepath, filesize, offsets[0] if not self._striped else 0, keep=resumed)
+            except (OSError, ValueError) as error:
+                logger.warning("Falling back to append mode: %s", error)
+        if self._writer is None:
+            offset = offsets[0] if not self._striped else 0 # en mode parallèle, les écritures se font à une position donnée
+            writer = ThreadedFileWriter if threaded else FileWriter
+            self._writer = writer(filepath, buffer_size, offset, keep=self._striped and resumed) # fichier vierge sauf reprise
+
+        done = sum(offset - start for offset, (start, _) in zip(offsets, self._ranges))
+        self._reporter = ProgressReporter(filesize, done, self)
+        self._reporter.progress.connect(self.progress)
+        self._reporter.stats.connect(self.stats)
+
+        self._streams = []
+        for index, ((start, end), offset) in enumerate(zip(self._ranges, offsets)):
+            url = self._url + (f"&stream={index}" if self._striped else "")
+            hashed, saved = start, 0 # début de ce qui doit être relu, nombre d'empreintes enregistrées
+            if offset > start:
+                count = complete_blocks(start, end, offset, block_size)
+                leaves = read_leaves(filepath, start // block_size, count)
+                if leaves is not None:
+                    self.add_leaves(start // block_size, leaves)
+                    hashed, saved = min(start + count * block_size, end), count
+            hasher = BlockHasher(hashed, end, block_size)
+            if offset > hashed: # dernier bloc incomplet, ou toute la partie reçue si les empreintes n'ont pas été enregistrées
+                hash_range(source, hashed, offset, hasher)
+            self.add_leaves(*hasher.take()) # y compris l'empreinte du bloc vide d'un fichier vide
+            self._saved.append(start // block_size + saved)
+            stream = ReceiverStream(self, url, index, end, offset, hasher, codec, self)
+            stream.resume_requested.connect(self.resume_requested)
+            stream.interrupted.connect(self.checkpoint)
+            stream.failed.connect(self.failed)
+            self._streams.append(stream)
+            if not stream.is_complete():
+                stream.open()
+
+    def write(self, position: int, data: QByteArray):
+        """
+        Écrit un chunk reçu par un stream à la position position.
+        """
+        if self._striped or self._repairs:
+            self._writer.write_at(position, data)
+        else:
+            self._writer.write(data) # le QByteArray est écrit directement, sans copie en bytes
+        if self._repairs: # la progression ne compte pas les plages redemandées
+            if all(stream.is_complete() for stream in self._repairs.values()):
+                self.close_repairs()
+                self.repaired.emit()
+            return
+        self._received += len(data)
+        if self._received >= CHECKPOINT_INTERVAL:
+            self.checkpoint()
+        self._reporter.add(len(data)) # en dernier : la fin du transfert peut être annoncée (et finish() appelé) pendant add()
+
+    def add_leaves(self, first: int, leaves: list[str]):
+        if self._manifest is not None:
+            self._manifest.set_received(first, leaves)
+
+    def manifest(self) -> Manifest | None:
+        return self._manifest
+
+    def repair(self, ranges: list[list[int]]):
+        """
+        Reçoit à nouveau les plages données (numéro de stream, début, fin), chacune sur son propre stream.
+        repair_ready est émis une fois tous les streams connectés : l'émetteur ne doit pas envoyer avant.
+        """
+        for index, start, end in ranges:
+            stream = ReceiverStream(self, self._url + f"&stream={index}", index, end, start, BlockHasher(start, end, self._block_size), self._codec, self)
+            stream.resume_requested.connect(self.resume_requested)
+            stream.opened.connect(lambda ranges=ranges: self.on_repair_opened(ranges))
+            stream.failed.connect(self.failed)
+            self._repairs[index] = stream
+            stream.open()
+
+    def repair_ranges(self, ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Renvoie les plages à redemander pour les plages corrompues ranges. Si l'extraction d'une archive doit reprendre à
+        un en-tête (voir TarExtractor.rewind), toute la suite de l'archive est redemandée à partir du bloc de cet en-tête.
+        """
+        if self._archive is None:
+            return ranges
+        position = self._writer.rewind(ranges)
+        if position is None:
+            return ranges
+        start = position - position % self._block_size
+        start = min([start] + [range_start for range_start, end in ranges if end > start])
+        return [(range_start, end) for range_start, end in ranges if end <= start] + [(start, self._filesize)]
+
+    def on_repair_opened(self, ranges: list[list[int]]):
+        if all(stream.is_opened() for stream in self._repairs.values()):
+            self.repair_ready.emit(ranges)
+
+    def is_repairing(self) -> bool:
+        return bool(self._repairs)
+
+    def close_repairs(self):
+        for stream in self._repairs.values():
+            stream.close()
+            stream.deleteLater()
+        self._repairs = {}
+
+    def offsets(self) -> list[int]:
+        return [stream.position() for stream in self._streams]
+
+    def is_complete(self) -> bool:
+        return all(stream.is_complete() for stream in self._streams)
+
+    @Slot()
+    def checkpoint(self):
+        """
+        Vide le tampon d'écriture puis enregistre la position atteinte par chaque stream dans le fichier de reprise.
+        Ne fait rien une fois le fichier écrit sur le disque (voir finish).
+        """
+        if self._finished:
+            return
+        self._writer.flush(sync=False)
+        if self._archive is not None: # l'extraction ne peut pas reprendre au milieu de l'archive
+            return
+        if self._manifest is not None:
+            self.save_leaves()
+        write_checkpoint(self._filepath, { "filename": self._filename, "filesize": self._filesize, "offsets": self.offsets() })
+        self._received = 0
+
+    def save_leaves(self):
+        """
+        Enregistre les empreintes des blocs entièrement reçus depuis l'enregistrement précédent.
+        """
+        for index, ((start, end), stream) in enumerate(zip(self._ranges, self._streams)):
+            first = self._saved[index]
+            last = start // self._block_size + complete_blocks(start, end, stream.position(), self._block_size)
+            leaves = self._manifest.received(first, max(0, last - first))
+            if None in leaves:
+                leaves = leaves[:leaves.index(None)]
+            if leaves:
+                write_leaves(self._filepath, first, leaves)
+                self._saved[index] += len(leaves)
+
+    def resume(self, stream: int, offset: int):
+        """
+        L'émetteur a confirmé qu'il reprend l'envoi du stream à la position offset.
+        """
+        if 0 <= stream < len(self._streams):
+            self._streams[stream].resume(offset)
+        elif stream in self._repairs:
+            self._repairs[stream].resume(offset)
+
+    def finish(self):
+        """
+        Le fichier a été entièrement reçu : le tampon est vidé et le fichier est écrit sur le disque.
+        """
+        self._finished = True
+        self._writer.flush()
+        self._writer.close()
+        remove_checkpoint(self._filepath)
+
+    def close(self):
+        """
+        Ferme les streams. Si le fichier est incomplet, sa progression est enregistrée pour pouvoir le reprendre plus tard.
+        """
+        self._reporter.stop()
+        self.close_repairs()
+        for stream in self._streams:
+            stream.close()
+        if not self.is_complete():
+            self.checkpoint()
+        self._writer.close()
+
+class Transaction(QObject):
     """
     Classe parente qui permet des opérations qui seront réutilisées par TransactionSender et TransactionReceiver.
+    Les transactions ne dépendent d'aucun widget : elles fonctionnent avec une QCoreApplication, les pages de
+    TransactionPage ne faisant qu'afficher leurs signaux.
+    Déroulement : offer() (émetteur), accept() (receveur), start() (émetteur), transaction_progressed,
+    transaction_uploaded puis transaction_finished (ou transaction_corrupted) des deux côtés.
     """
     text_received = Signal(str) # émis lorsque un nouvel événement a eu lieu
     infos_received = Signal(str, int) # émis lorsque les informations concernant le fichier ont été partagées
     connection_refused = Signal(int) # émis lorsque erreur
     transaction_accepted = Signal() # émis lorsque le receveur accepte la transaction
-    transaction_progressed = Signal(int) # émis lorsqu'un chunk a été reçu ou envoyé
+    offsets_received = Signal(list) # émis lorsque le receveur accepte la transaction avec un fichier partiel (position de chaque stream)
+    transaction_progressed = Signal(int) # émis périodiquement avec le nombre d'octets reçus ou envoyés depuis l'émission précédente
+    transaction_stats = Signal(float, float, float) # débit instantané, débit lissé (octets/s) et temps restant (s, -1 si inconnu)
     transaction_finished = Signal() # émis lorsque la transaction est terminé
     transaction_uploaded = Signal() # émis lorsque le receveur a uploadé le fichier
+    manifest_received = Signal(int, list) # émis avec le numéro du premier bloc et les empreintes de blocs publiées par l'émetteur
+    digest_received = Signal(str, str) # émis avec l'algorithme et la racine de Merkle publiés par l'émetteur
+    repair_requested = Signal(list) # émis lorsque le receveur redemande des plages (numéro de stream, début, fin)
+    transaction_corrupted = Signal() # émis lorsque le fichier reçu ne correspond pas aux empreintes de l'émetteur
+    transaction_unverified = Signal(str) # émis par le receveur avant transaction_finished si le fichier n'a pas pu être vérifié (raison)
+    files_received = Signal(list) # émis avec les fichiers ({"path", "size"}) d'une transaction groupée
+    transaction_failed = Signal() # émis par le receveur lorsque le fichier ne peut pas être reçu (codec absent, stream perdu)
+    resume_requested = Signal(int, int) # émis lorsque le receveur demande de reprendre l'envoi d'un stream à une position donnée
+    stream_restarted = Signal(int, int) # émis lorsque l'émetteur reprend l'envoi d'un stream à une position donnée
+    transaction_resumed = Signal(int) # émis avec le nombre total d'octets déjà transférés lorsque le transfert reprend
+    rate_limit_requested = Signal(object) # émis avec le débit maximal (octets/s, None : pas de limite) demandé par le receveur
     peer_left = Signal()
 
     def __init__(self, transaction_id: str, parent=None):
         super().__init__(parent)
         self._transaction_id = transaction_id
-        self._socket = QWebSocket()
-        self._socket.errorOccurred.connect(self.on_error)
+        self._streams = 1 # nombre de streams utilisés pour le fichier
+        self._codec = None # codec de compression utilisé pour le fichier
+        self._block_size = MANIFEST_BLOCK_SIZE # taille des blocs du manifeste
+        self._entries = None # fichiers d'une transaction groupée (voir FileSet.entries)
+        self._archive = None # format de l'archive générée à la volée pour un dossier ("tar"), None sinon
+        self._socket = None # créé par open() : le premier QWebSocket charge le backend TLS de Qt, ce qui retarderait le démarrage
         self._url = f"{SERVER_DOMAIN}/transaction/{self._transaction_id}"
-        self._socket.textMessageReceived.connect(self.handle_incoming_message)
 
     def on_error(self, error):
         error_str = self._socket.errorString()
-        print(error_str)
+        logger.warning(error_str)
 
         if str(NOT_FOUND) in error_str:
             self.connection_refused.emit(NOT_FOUND)
@@ -114,24 +721,86 @@ class Transaction(QWidget):
         """
         Traite les événements reçus et émet le texte qui sera affiché dans le fil.
         """
+        from humanize import naturalsize # importé au premier message : inutile au démarrage
         data = json.loads(message)
         match data["type"]:
             case "TRANSACTION_INFOS_RECEIVED":
                 _str = "Transaction infos have been updated on server."
                 self.infos_received.emit(data["body"]["filename"], data["body"]["filesize"])
+                if "files" in data["body"]:
+                    self.files_received.emit(data["body"]["files"])
             case "TRANSACTION_INFOS":
-                _str = f"Transaction infos received from server: file is {data['body']['filename']} ({naturalsize(data['body']['filesize'], binary=True)})"
+                self._streams = data["body"].get("streams", 1)
+                self._codec = data["body"].get("codec")
+                self._block_size = data["body"].get("block_size", MANIFEST_BLOCK_SIZE)
+                self._entries = data["body"].get("files")
+                self._archive = data["body"].get("archive")
+                if self._archive is not None:
+                    _str = f"Transaction infos received from server: folder {data['body']['filename']} sent as a {self._archive} archive ({naturalsize(data['body']['filesize'], binary=True)})"
+                elif self._entries is not None:
+                    _str = f"Transaction infos received from server: {len(self._entries)} files in {data['body']['filename']} ({naturalsize(data['body']['filesize'], binary=True)})"
+                else:
+                    _str = f"Transaction infos received from server: file is {data['body']['filename']} ({naturalsize(data['body']['filesize'], binary=True)})"
+                if self._streams > 1:
+                    _str += f", sent over {self._streams} streams"
+                if self._codec is not None:
+                    _str += f", compressed with {self._codec}"
                 self.infos_received.emit(data["body"]["filename"], data["body"]["filesize"])
+                if self._entries is not None:
+                    self.files_received.emit(self._entries)
             case "TRANSACTION_JOIN":
                 _str = "Receiver has joined the transaction."
             case "TRANSACTION_ACCEPT" | "TRANSACTION_ACCEPT_RECEIVED":
+                offsets = (data["body"] or {}).get("offsets")
+                if offsets: # reprise d'un fichier partiel
+                    _str = "Receiver has accepted the transaction and already has part of the file."
+                    if data["type"] == "TRANSACTION_ACCEPT":
+                        self.offsets_received.emit(offsets)
+                else:
+                    _str = "Receiver has accepted the transaction."
                 self.transaction_accepted.emit()
-                _str = "Receiver has accepted the transaction."
             case "TRANSACTION_START" | "TRANSACTION_START_RECEIVED":
-                _str = "Sender has started the transaction."
+                if (data["body"] or {}).get("offsets"):
+                    _str = "Sender has started the transaction from the partial file."
+                else:
+                    _str = "Sender has started the transaction."
+            case "TRANSACTION_RESUME" | "TRANSACTION_RESUME_RECEIVED":
+                _str = f"Stream {data['body']['stream']} was interrupted, receiver asks to resume it from {naturalsize(data['body']['offset'], binary=True)}."
+                if data["type"] == "TRANSACTION_RESUME":
+                    self.resume_requested.emit(data["body"]["stream"], data["body"]["offset"])
+            case "TRANSACTION_RESTART" | "TRANSACTION_RESTART_RECEIVED":
+                _str = f"Sender resumes stream {data['body']['stream']} from {naturalsize(data['body']['offset'], binary=True)}."
+                if data["type"] == "TRANSACTION_RESTART":
+                    self.stream_restarted.emit(data["body"]["stream"], data["body"]["offset"])
+            case "TRANSACTION_MANIFEST" | "TRANSACTION_MANIFEST_RECEIVED":
+                if data["type"] == "TRANSACTION_MANIFEST":
+                    self.manifest_received.emit(data["body"]["first"], data["body"]["leaves"])
+                return # pas affiché dans le fil : un message tous les MANIFEST_BATCH blocs
+            case "TRANSACTION_DIGEST" | "TRANSACTION_DIGEST_RECEIVED":
+                _str = "File digest has been published."
+                if data["type"] == "TRANSACTION_DIGEST":
+                    self.digest_received.emit(data["body"]["algorithm"], data["body"]["root"])
+            case "TRANSACTION_REPAIR" | "TRANSACTION_REPAIR_RECEIVED":
+                size = sum(end - start for _, start, end in data["body"]["ranges"])
+                _str = f"Corrupted blocks detected, {naturalsize(size, binary=True)} of the file will be sent again."
+                if data["type"] == "TRANSACTION_REPAIR":
+                    self.repair_requested.emit(data["body"]["ranges"])
+            case "TRANSACTION_CORRUPTED" | "TRANSACTION_CORRUPTED_RECEIVED":
+                _str = "The received file does not match the sent file."
+                self.transaction_corrupted.emit()
             case "TRANSACTION_END" | "TRANSACTION_END_RECEIVED":
                 _str = "Transaction is finished."
                 self.transaction_finished.emit()
+            case "TRANSACTION_RATE" | "TRANSACTION_RATE_RECEIVED":
+                rate = (data["body"] or {}).get("rate")
+                if not isinstance(rate, (int, float)) or rate <= 0:
+                    rate = None
+                if rate is not None:
+                    _str = f"Receiver limits the transfer rate to {naturalsize(rate, binary=True)}/s."
+                else:
+                    _str = "Receiver no longer limits the transfer rate."
+                if data["type"] == "TRANSACTION_RATE":
+                    self.rate_limit_requested.emit(rate)
             case "TRANSACTION_UPLOAD" | "TRANSACTION_UPLOAD_RECEIVED":
                 _str = "Receiver starts downloading the file."
                 self.transaction_uploaded.emit()
@@ -142,58 +811,331 @@ class Transaction(QWidget):
         self.text_received.emit(_str)
 
     def open(self):
+        if self._socket is None:
+            self._socket = QWebSocket()
+            self._socket.errorOccurred.connect(self.on_error)
+            self._socket.textMessageReceived.connect(self.handle_incoming_message)
         self._socket.open(self._url)
 
     def close(self):
-        self._socket.close()
+        if self._socket is not None:
+            self._socket.close()
+
+    def archive(self) -> str | None:
+        return self._archive
 
 class TransactionSender(Transaction):
     """
     Classe utilisée pour envoyer un fichier via une transaction.
+    Chaque plage du fichier (une seule par défaut, voir set_streams) est envoyée par un Sender dans son propre QThread.
+    Les plages redemandées par le receveur (repair()) sont ajoutées à la suite des plages du fichier, avec le numéro de stream
+    choisi par le receveur.
+    filepath peut aussi être un dossier ou une liste de fichiers : c'est alors une transaction groupée, où les fichiers sont
+    envoyés bout à bout comme un seul (voir FileSet) et leur liste est jointe à TRANSACTION_INFOS.
+    Si archive est à True, un dossier est plutôt envoyé comme une archive tar générée à la volée (voir TarArchive), sur un
+    seul stream.
     """
-    def __init__(self, transaction_id: str, filepath: str):
+    def __init__(self, transaction_id: str, filepath: str | list[str], archive: bool = False):
         super().__init__(transaction_id)
-        self._filepath = filepath # chemin du fichier
-        self._filename = filepath.split("/")[-1]
-        self._filesize = QFileInfo(filepath).size() # taille du fichier
+        paths = [filepath] if isinstance(filepath, str) else list(filepath)
+        if archive and len(paths) == 1 and QFileInfo(paths[0]).isDir():
+            self._filepath = TarArchive(paths[0]) # jamais écrite sur le disque
+            self._filename = self._filepath.name()
+            self._filesize = self._filepath.size()
+            self._archive = "tar"
+        elif len(paths) == 1 and not QFileInfo(paths[0]).isDir():
+            self._filepath = paths[0] # chemin du fichier
+            self._filename = self._filepath.split("/")[-1]
+            self._filesize = QFileInfo(self._filepath).size() # taille du fichier
+        else:
+            self._filepath = FileSet.from_paths(paths) # lu comme un seul fichier
+            self._filename = self._filepath.name()
+            self._filesize = self._filepath.size()
+            self._entries = self._filepath.entries()
         self._url += "?sender=true"
+        self._high_watermark = UPLOAD_HIGH_WATERMARK
+        self._low_watermark = UPLOAD_LOW_WATERMARK
+        self._chunk_options = {} # paramètres des ChunkSizer (voir set_chunk_size)
+        self._ranges = [] # plage [start, end) de chaque stream (les self._streams premières couvrent le fichier)
+        self._offsets = [] # position à partir de laquelle chaque plage est envoyée
+        self._workers = [] # (QThread, Sender) de chaque stream, None si le stream n'est pas en cours
+        self._finished = [] # True pour chaque stream entièrement envoyé
+        self._manifest = Manifest(self._filesize) # empreintes des blocs envoyés
+        self._reporter = None
+        self._compression = COMPRESSION # codec demandé, self._codec est celui retenu pour le fichier (voir offer)
+        self._limiter = TokenBucket() # débit maximal des Sender de la transaction (voir set_rate_limit)
+        self._rate_limit = None # débit maximal réglé par le client
+        self._peer_rate_limit = None # débit maximal demandé par le receveur
+        self.set_streams(TRANSFER_STREAMS)
+        self.offsets_received.connect(self.set_offsets)
+        self.rate_limit_requested.connect(self.set_peer_rate_limit)
+        self.resume_requested.connect(self.resume)
+        self.repair_requested.connect(self.repair)
+
+    def set_watermarks(self, high: int, low: int):
+        """
+        Règle les seuils (en octets) du contrôle de flux de l'upload, pour chaque stream. À appeler avant start().
+        """
+        self._high_watermark = high
+        self._low_watermark = low
+
+    def set_chunk_size(self, size: int, minimum: int = None, maximum: int = None, adaptive: bool = True):
+        """
+        Règle la taille des chunks de l'upload. À appeler avant start().
+        Si adaptive est à True, size est la taille initiale, ajustée ensuite entre minimum et maximum selon le débit et le RTT ;
+        sinon tous les chunks font size octets.
+        """
+        self._chunk_options = { "initial": size, "adaptive": adaptive }
+        if minimum is not None:
+            self._chunk_options["minimum"] = minimum
+        if maximum is not None:
+            self._chunk_options["maximum"] = maximum
+
+    def chunk_size(self) -> int:
+        return ChunkSizer(**self._chunk_options).size()
+
+    def set_streams(self, streams: int):
+        """
+        Règle le nombre de streams parallèles utilisés pour envoyer le fichier (le fichier est découpé en plages, voir
+        split_ranges ; un petit fichier peut donc utiliser moins de streams). À appeler avant offer().
+        Une archive est toujours envoyée sur un seul stream, le receveur l'extrayant dans l'ordre.
+        """
+        self._ranges = split_ranges(self._filesize, streams if self._archive is None else 1)
+        self._streams = len(self._ranges)
+        self._offsets = [start for start, _ in self._ranges]
+        self._workers = [None] * self._streams
+        self._finished = [False] * self._streams
+
+    def set_rate_limit(self, rate: float | None):
+        """
+        Limite le débit d'envoi de la transaction (octets/s, None : pas de limite), tous streams confondus. Peut être appelé
+        pendant l'envoi. Le débit appliqué est le plus petit entre cette limite et celle demandée par le receveur.
+        """
+        self._rate_limit = rate
+        self.update_rate_limit()
+
+    @Slot(object)
+    def set_peer_rate_limit(self, rate: float | None):
+        self._peer_rate_limit = rate
+        self.update_rate_limit()
+
+    def update_rate_limit(self):
+        limits = [rate for rate in (self._rate_limit, self._peer_rate_limit) if rate is not None]
+        self._limiter.set_rate(min(limits) if limits else None)
+
+    def set_compression(self, codec: str | None):
+        """
+        Règle le codec de compression ("zlib", "zstd" ou None). À appeler avant offer().
+        Lève ValueError si le codec n'est pas disponible (voir available_codecs).
+        """
+        if codec is not None and codec not in available_codecs():
+            raise ValueError(f"Unavailable codec: {codec}")
+        self._compression = codec
 
     def offer(self):
         """
         Envoie une offre de transaction (la transaction est créée côté serveur) puis envoie les infos du fichier.
+        Le codec demandé n'est retenu que si un échantillon du fichier se compresse bien (voir choose_codec).
         """
+        self._codec = choose_codec(self._filepath, self._compression)
         self.open()
         def send_transaction_infos():
-            message = { "type": "TRANSACTION_INFOS", "body": { "filename": self._filename, "filesize": self._filesize }}
+            body = { "filename": self._filename, "filesize": self._filesize, "block_size": self._manifest.block_size() }
+            if self._streams > 1:
+                body["streams"] = self._streams
+            if self._codec is not None:
+                body["codec"] = self._codec
+            if self._entries is not None:
+                body["files"] = self._entries
+            if self._archive is not None:
+                body["archive"] = self._archive
+            message = { "type": "TRANSACTION_INFOS", "body": body }
             self._socket.sendTextMessage(json.dumps(message))
 
         self._socket.connected.connect(send_transaction_infos)
 
+    @Slot(list)
+    def set_offsets(self, offsets: list):
+        """
+        Le receveur possède déjà une partie du fichier : chaque plage sera envoyée à partir de la position donnée.
+        """
+        if len(offsets) != self._streams:
+            return
+        self._offsets = [min(max(offset, start), end) for offset, (start, end) in zip(offsets, self._ranges)]
+
+    def done(self) -> int:
+        """
+        Renvoie le nombre d'octets dont l'envoi n'est plus à faire.
+        """
+        return sum(offset - start for offset, (start, _) in zip(self._offsets[:self._streams], self._ranges))
+
     def start(self):
         """
-        Lance l'envoi du fichier en démarrant un QThread.
+        Lance l'envoi du fichier : chaque plage est envoyée dans un QThread dédié.
         """
-        message = { "type": "TRANSACTION_START", "body": None }
+        resumed = any(offset > start for offset, (start, _) in zip(self._offsets, self._ranges))
+        body = { "offsets": self._offsets } if resumed else None
+        message = { "type": "TRANSACTION_START", "body": body }
         self._socket.sendTextMessage(json.dumps(message))
-        sender = Sender(self._transaction_id, self._filepath, self) # QThread
-        sender.progress.connect(lambda n: self.transaction_progressed.emit(n))
-        # quand l'upload est fini
-        sender.finished.connect(lambda: self._socket.sendTextMessage(json.dumps({ "type": "TRANSACTION_UPLOAD", "body": None })))
-        sender.run()
+
+        self._reporter = ProgressReporter(self._filesize, self.done(), self)
+        self._reporter.progress.connect(self.transaction_progressed)
+        self._reporter.stats.connect(self.transaction_stats)
+        if resumed:
+            self.transaction_resumed.emit(self.done())
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close) # les threads d'envoi doivent être arrêtés avant leur destruction
+        for stream in range(self._streams):
+            self.start_sender(stream)
+
+    def start_sender(self, stream: int):
+        start, end = self._ranges[stream]
+        block_size = self._manifest.block_size()
+        known = self._manifest.expected(start // block_size, complete_blocks(start, end, self._offsets[stream], block_size))
+        known = known.index(None) if None in known else len(known) # blocs du début de la plage dont l'empreinte est déjà publiée
+        thread = QThread(self)
+        sender = Sender(self._transaction_id, self._filepath, self._high_watermark, self._low_watermark, ChunkSizer(**self._chunk_options),
+                        start, end, self._offsets[stream], stream if len(self._ranges) > 1 else None, self._codec, block_size, self._limiter,
+                        min(start + known * block_size, end))
+        sender.moveToThread(thread) # le Sender vit désormais dans le thread de travail
+        thread.started.connect(sender.run)
+        sender.progress.connect(self.on_sender_progress)
+        sender.leaves.connect(self.on_sender_leaves)
+        sender.finished.connect(self.on_sender_finished)
+        sender.finished.connect(thread.quit)
+        thread.finished.connect(sender.deleteLater)
+        self._workers[stream] = (thread, sender)
+        thread.start()
+
+    def stop_sender(self, stream: int):
+        """
+        Arrête le thread d'envoi du stream s'il est en cours.
+        """
+        if self._workers[stream] is None:
+            return
+        thread, sender = self._workers[stream]
+        self._workers[stream] = None
+        if thread.isRunning():
+            QMetaObject.invokeMethod(sender, "stop", Qt.ConnectionType.BlockingQueuedConnection)
+            thread.quit()
+            thread.wait()
+
+    def is_current(self, stream: int) -> bool:
+        """
+        Indique si le signal en cours de traitement provient du Sender actuel du stream (et non d'un Sender arrêté).
+        """
+        return 0 <= stream < len(self._workers) and self._workers[stream] is not None and self.sender() is self._workers[stream][1]
+
+    @Slot(int, int)
+    def on_sender_progress(self, stream: int, n: int):
+        if self.is_current(stream):
+            self._offsets[stream] += n
+            if stream < self._streams: # la progression ne compte pas les plages redemandées
+                self._reporter.add(n)
+
+    @Slot(int, int, list)
+    def on_sender_leaves(self, stream: int, first: int, leaves: list):
+        """
+        Publie les empreintes de blocs calculées par un Sender (les plages redemandées ont déjà été publiées).
+        """
+        if self.is_current(stream) and stream < self._streams:
+            self._manifest.set_expected(first, leaves)
+            message = { "type": "TRANSACTION_MANIFEST", "body": { "first": first, "leaves": leaves } }
+            self._socket.sendTextMessage(json.dumps(message))
+
+    @Slot(int, int)
+    def resume(self, stream: int, offset: int):
+        """
+        Le receveur demande l'envoi d'un stream à partir de offset. Si l'envoi a déjà commencé, il est arrêté puis relancé
+        à partir de cette position ; sinon la position sera utilisée par start().
+        """
+        if not 0 <= stream < len(self._ranges):
+            return
+        start, end = self._ranges[stream]
+        self._offsets[stream] = min(max(offset, start), end)
+        if self._reporter is not None:
+            self.stop_sender(stream)
+            self._finished[stream] = False
+            self._reporter.set_done(self.done())
+            self.transaction_resumed.emit(self.done())
+            message = { "type": "TRANSACTION_RESTART", "body": { "stream": stream, "offset": self._offsets[stream] } }
+            self._socket.sendTextMessage(json.dumps(message))
+            self.start_sender(stream)
+
+    @Slot(list)
+    def repair(self, ranges: list):
+        """
+        Le receveur redemande des plages (numéro de stream, début, fin) : chacune est envoyée par un nouveau Sender.
+        """
+        for stream, start, end in ranges:
+            if stream < self._streams or not 0 <= start <= end <= self._filesize:
+                continue
+            while len(self._ranges) <= stream:
+                self._ranges.append((0, 0))
+                self._offsets.append(0)
+                self._workers.append(None)
+                self._finished.append(True)
+            self.stop_sender(stream)
+            self._ranges[stream] = (start, end)
+            self._offsets[stream] = start
+            self._finished[stream] = False
+            self.start_sender(stream)
+
+    @Slot(int)
+    def on_sender_finished(self, stream: int):
+        """
+        Un stream a été entièrement envoyé : une fois toutes les plages du fichier envoyées, on publie la racine du manifeste
+        et on prévient le receveur.
+        """
+        if not self.is_current(stream):
+            return
+        self._finished[stream] = True
+        if stream < self._streams and all(self._finished[:self._streams]):
+            self._reporter.publish()
+            message = { "type": "TRANSACTION_DIGEST", "body": { "algorithm": DIGEST_ALGORITHM, "root": self._manifest.root() } }
+            self._socket.sendTextMessage(json.dumps(message))
+            self._socket.sendTextMessage(json.dumps({ "type": "TRANSACTION_UPLOAD", "body": None }))
+
+    def close(self):
+        """
+        Ferme le socket de la transaction et arrête les threads d'envoi en cours.
+        """
+        for stream in range(len(self._workers)):
+            self.stop_sender(stream)
+        if self._reporter is not None:
+            self._reporter.stop()
+        super().close()
 
 class TransactionReceiver(Transaction):
     """
     Classe utilisée pour recevoir un fichier via une transaction.
+    Pour une transaction groupée ou une archive, le chemin d'enregistrement est le dossier dans lequel les fichiers sont écrits.
     """
     def __init__(self, transaction_id: str):
         super().__init__(transaction_id)
         self._filename = None # nom du fichier
         self._filesize = None # taille
         self._filepath = None # lieu d'enregistrement
+        self._files = None # FileSet d'une transaction groupée
         self._receiver = None # Receiver
+        self._buffer_size = WRITE_BUFFER_SIZE
+        self._threaded_writer = False
+        self._mapped_writer = False
+        self._root = None # racine du manifeste publiée par l'émetteur
+        self._algorithm = None # algorithme de l'empreinte publiée, même s'il n'est pas celui du client
+        self._uploaded = False # True une fois l'envoi terminé côté émetteur (la racine est publiée avant)
+        self._complete = False # True une fois le fichier entièrement reçu, en attente de vérification
+        self._repair_attempts = 0
+        self._next_stream = None # numéro du prochain stream de réparation
+        self._rate_limit = None # débit maximal demandé à l'émetteur (voir set_rate_limit)
 
         self._url += "?sender=false"
         self.infos_received.connect(self.set_file)
+        self.manifest_received.connect(self.on_manifest_received)
+        self.digest_received.connect(self.on_digest_received)
+        self.transaction_uploaded.connect(self.on_uploaded)
+        self.stream_restarted.connect(self.on_stream_restarted)
         self._transaction_id = transaction_id
 
     def set_file(self, filename: str, filesize: int):
@@ -209,19 +1151,216 @@ class TransactionReceiver(Transaction):
         """
         self._filepath = filepath
 
+    def set_writer(self, buffer_size: int = WRITE_BUFFER_SIZE, threaded: bool = False, mapped: bool = False):
+        """
+        Règle le tampon d'écriture du fichier reçu et active, si threaded est à True, l'écriture dans un thread dédié.
+        Si mapped est à True, le fichier est préalloué et projeté en mémoire (voir Receiver).
+        À appeler avant accept().
+        """
+        self._buffer_size = buffer_size
+        self._threaded_writer = threaded
+        self._mapped_writer = mapped
+
+    def set_rate_limit(self, rate: float | None):
+        """
+        Limite le débit de réception (octets/s, None : pas de limite). La limite est appliquée par l'émetteur
+        (TRANSACTION_RATE) : ralentir la lecture du socket ne ferait qu'accumuler le fichier en mémoire. Peut être appelé
+        pendant le transfert.
+        """
+        if rate == self._rate_limit:
+            return
+        self._rate_limit = rate
+        if self._receiver is not None: # sinon la limite est envoyée avec l'acceptation
+            self.send_rate_limit()
+
+    def send_rate_limit(self):
+        message = { "type": "TRANSACTION_RATE", "body": { "rate": self._rate_limit } }
+        self._socket.sendTextMessage(json.dumps(message))
+
+    def resume_offsets(self) -> list[int] | None:
+        """
+        Renvoie la position atteinte par chaque stream d'après le fichier de reprise de la destination, s'il correspond
+        au fichier et aux streams de la transaction, et None sinon. Une archive est toujours reçue en entier.
+        """
+        if self._archive is not None:
+            return None
+        checkpoint = read_checkpoint(self._filepath)
+        if checkpoint is None or checkpoint.get("filename") != self._filename or checkpoint.get("filesize") != self._filesize:
+            return None
+        offsets = checkpoint.get("offsets")
+        ranges = split_ranges(self._filesize, self._streams)
+        if not isinstance(offsets, list) or len(offsets) != len(ranges):
+            return None
+        if not all(start <= offset <= end for offset, (start, end) in zip(offsets, ranges)):
+            return None
+        if all(offset == start for offset, (start, _) in zip(offsets, ranges)):
+            return None
+        if self._files is not None:
+            for (start, _), offset in zip(ranges, offsets): # les fichiers partiels doivent couvrir les plages déjà reçues
+                for index, position, size in self._files.spans(start, offset - start):
+                    path = Path(self._files.path(index))
+                    if not path.is_file() or path.stat().st_size < position + size:
+                        return None
+            return offsets
+        path = Path(self._filepath)
+        if not path.is_file() or path.stat().st_size < max(offsets): # le fichier partiel a été modifié
+            return None
+        return offsets
+
     def accept(self):
         """
         Le client accepte la transaction, signifiant que le transfert peut commencer.
+        Si la destination contient déjà une partie du fichier (voir resume_offsets), seul le reste sera envoyé.
         """
-        message = { "type": "TRANSACTION_ACCEPT", "body": None }
+        if self._codec is not None and self._codec not in available_codecs():
+            self.text_received.emit(f"The file is compressed with {self._codec}, which is not available: install zstandard to receive it.")
+            self.transaction_failed.emit()
+            return
+        if self._archive not in (None, "tar"):
+            self.text_received.emit(f"The folder is sent as a {self._archive} archive, which is not supported.")
+            self.transaction_failed.emit()
+            return
+        if self._entries is not None:
+            try:
+                self._files = FileSet.from_entries(self._filepath, self._entries)
+                if self._files.size() != self._filesize:
+                    raise ValueError("file sizes do not add up to the transaction size")
+            except ValueError as error: # chemin dangereux (absolu, "..") ou liste invalide
+                self.text_received.emit(f"Invalid file list: {error}")
+                self.transaction_failed.emit()
+                return
+        offsets = self.resume_offsets()
+        message = { "type": "TRANSACTION_ACCEPT", "body": { "offsets": offsets } if offsets else None }
         self._socket.sendTextMessage(json.dumps(message))
-        self._receiver = Receiver(self._transaction_id, self._filepath)
-        self._receiver.progress.connect(lambda n: self.transaction_progressed.emit(n))
+        if self._rate_limit is not None:
+            self.send_rate_limit()
+        self._receiver = Receiver(self._transaction_id, self._filepath, self._buffer_size, self._threaded_writer, self._mapped_writer,
+                                  self._filesize, offsets, self._filename, self._streams, self._codec, self._block_size, self._files, self._archive)
+        self._next_stream = self._streams
+        self._receiver.progress.connect(self.on_progress)
+        self._receiver.stats.connect(self.transaction_stats)
+        self._receiver.resume_requested.connect(self.request_resume)
+        self._receiver.repair_ready.connect(self.send_repair)
+        self._receiver.repaired.connect(self.verify)
+        self._receiver.failed.connect(self.on_failed)
+        if offsets:
+            ranges = split_ranges(self._filesize, self._streams)
+            self.transaction_resumed.emit(sum(offset - start for offset, (start, _) in zip(offsets, ranges)))
+        if self._receiver.is_complete(): # fichier vide ou entièrement reçu lors d'une transaction précédente : aucune progression ne sera émise
+            self.finish()
+
+    @Slot(int)
+    def on_progress(self, n: int):
+        """
+        Relaie la progression et termine la réception une fois toutes les plages reçues.
+        """
+        self.transaction_progressed.emit(n)
+        if not self._complete and self._receiver.is_complete():
+            self.finish()
+
+    @Slot()
+    def on_failed(self):
+        self.text_received.emit("Stream could not be restored, the transfer can be resumed later to the same destination.")
+        self.transaction_failed.emit()
+
+    @Slot(int, int)
+    def request_resume(self, stream: int, offset: int):
+        """
+        Un stream a été rouvert après une interruption : on demande à l'émetteur de reprendre ce stream à partir de offset.
+        """
+        message = { "type": "TRANSACTION_RESUME", "body": { "stream": stream, "offset": offset } }
+        self._socket.sendTextMessage(json.dumps(message))
+
+    def request_repair(self, ranges: list[tuple[int, int]]):
+        """
+        Redemande les plages corrompues à l'émetteur, chacune sur un nouveau stream (voir send_repair).
+        """
+        ranges = [[self._next_stream + i, start, end] for i, (start, end) in enumerate(ranges)]
+        self._next_stream += len(ranges)
+        self._receiver.repair(ranges)
+
+    @Slot(list)
+    def send_repair(self, ranges: list):
+        """
+        Les streams de réparation sont connectés : l'émetteur peut envoyer les plages.
+        """
+        message = { "type": "TRANSACTION_REPAIR", "body": { "ranges": ranges } }
+        self._socket.sendTextMessage(json.dumps(message))
+
+    @Slot(int, int)
+    def on_stream_restarted(self, stream: int, offset: int):
+        if self._receiver is not None:
+            self._receiver.resume(stream, offset)
+
+    @Slot(int, list)
+    def on_manifest_received(self, first: int, leaves: list):
+        if self._receiver is not None and self._receiver.manifest() is not None:
+            self._receiver.manifest().set_expected(first, leaves)
+
+    @Slot(str, str)
+    def on_digest_received(self, algorithm: str, root: str):
+        self._algorithm = algorithm
+        if algorithm == DIGEST_ALGORITHM: # sinon le fichier ne peut pas être vérifié
+            self._root = root
+        self.verify()
+
+    @Slot()
+    def on_uploaded(self):
+        self._uploaded = True
+        self.verify()
 
     def finish(self):
         """
-        Le client a reçu l'entièreté du fichier.
+        Le client a reçu l'entièreté du fichier (appelé par on_progress) : il est vérifié dès que les empreintes de l'émetteur
+        sont connues.
+        """
+        self._complete = True
+        self.verify()
+
+    @Slot()
+    def verify(self):
         """
+        Vérifie le manifeste de l'émetteur avec sa racine puis chaque bloc reçu, et redemande les blocs corrompus ; une fois
+        le fichier correct, il est écrit sur le disque avant d'annoncer la fin de la transaction.
+        Ne fait rien tant que le fichier n'est pas entièrement reçu, que la racine n'est pas arrivée (un émetteur qui n'en publie
+        pas envoie directement TRANSACTION_UPLOAD) ou que des plages redemandées sont en cours de réception.
+        Un fichier qui ne peut pas être vérifié (pas de racine, algorithme inconnu) est conservé, mais transaction_unverified
+        est émis avant la fin de la transaction.
+        """
+        if not self._complete or self._receiver is None or self._receiver.is_repairing() or (self._root is None and not self._uploaded):
+            return
         message = { "type": "TRANSACTION_END", "body": None }
+        manifest = self._receiver.manifest()
+        if self._root is not None and manifest is not None:
+            if manifest.root() != self._root: # manifeste incomplet ou altéré : les blocs ne peuvent pas être vérifiés
+                message = { "type": "TRANSACTION_CORRUPTED", "body": None }
+            elif ranges := self._receiver.repair_ranges(manifest.bad_ranges()):
+                if self._repair_attempts < REPAIR_ATTEMPTS:
+                    self._repair_attempts += 1
+                    self.request_repair(ranges)
+                    return
+                message = { "type": "TRANSACTION_CORRUPTED", "body": None }
+        else:
+            self.report_unverified(manifest)
+        self._complete = False
+        self._receiver.finish()
         self._socket.sendTextMessage(json.dumps(message))
-        self._receiver.close()
\ No newline at end of file
+        self._receiver.close()
+
+    def report_unverified(self, manifest: Manifest | None):
+        if self._algorithm is not None and self._algorithm != DIGEST_ALGORITHM:
+            reason = f"unsupported digest algorithm {self._algorithm}"
+        elif self._root is None:
+            reason = "the sender published no digest"
+        else:
+            reason = "no block manifest for this file"
+        self.text_received.emit(f"The received file could not be verified: {reason}.")
+        self.transaction_unverified.emit(reason)
+
+    def close(self):
+        """
+        Ferme le socket de la transaction et ceux des streams ouverts.
+        """
+        if self._receiver is not None:
+            self._receiver.close()
+        super().close()
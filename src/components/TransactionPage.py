@@ -1,11 +1,15 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QGroupBox, QPushButton, QTextBrowser, QProgressBar, QFileDialog, QLabel, QHBoxLayout, QLineEdit, QStackedWidget
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QGroupBox, QPushButton, QProgressBar, QFileDialog, QLabel, QHBoxLayout, QLineEdit, QStackedWidget
 from PySide6.QtGui import Qt, QFont, QCloseEvent
 from PySide6.QtCore import Signal, Slot
 from .TransactionHandlers import TransactionSender, TransactionReceiver
-from humanize import naturalsize
+from humanize import naturalsize, naturaldelta
 from .utils import get_download_path, QElidedLabel
+from .MessageFeed import MessageModel, MessageView
+from .room_utils import Message, MessageType
 from ..vars import STYLES_PATH
 from pathlib import Path
+from itertools import accumulate
+import bisect
 
 class TransactionHeading(QWidget):
     """
@@ -41,21 +45,24 @@ class TransactionFeed(QWidget):
         self._feed_box = QGroupBox("Feed:")
         self._feed_box_layout = QVBoxLayout()
 
-        self._feed = QTextBrowser() # le fil est un QTextBrowser qui supporte le HTML
+        self._model = MessageModel(parent=self)
+        self._feed = MessageView()
+        self._feed.setModel(self._model)
         self._feed_box_layout.addWidget(self._feed)
         self._feed_box.setLayout(self._feed_box_layout)
         self._layout.addWidget(self._feed_box)
         self.setLayout(self._layout)
 
+    @Slot(str)
     def append(self, text: str):
-        self._feed.append(f"<div><span style='color: lightgray; font-style: italic;'>{text}</span></div>")
+        self._model.append(Message(MessageType.INFO, "", text))
 
     def clear(self):
-        self._feed.clear()
+        self._model.clear()
 
 class TransactionFile(QWidget):
     """
-    Widget qui contient des informations sur le fichier cible (nom + taille).
+    Widget qui contient des informations sur le fichier cible (nom + taille, et nombre de fichiers d'une transaction groupée).
     """
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -70,9 +77,11 @@ class TransactionFile(QWidget):
 
         self._filename_label = QElidedLabel("", alignment=Qt.AlignmentFlag.AlignHCenter) # affiche le nom du fichier
         self._filesize_label = QLabel("", alignment=Qt.AlignmentFlag.AlignHCenter) # affiche la taille
+        self._count_label = QLabel("", alignment=Qt.AlignmentFlag.AlignHCenter) # nombre de fichiers (transaction groupée)
 
         self._box_layout.addWidget(self._filename_label)
         self._box_layout.addWidget(self._filesize_label)
+        self._box_layout.addWidget(self._count_label)
         self._box_layout.addStretch(2)
 
         self._box.setLayout(self._box_layout)
@@ -89,11 +98,15 @@ class TransactionFile(QWidget):
         self._filename_label.setText(f"Filename: {self._filename}")
         self._filesize_label.setText(f"Size: {naturalsize(self._filesize, binary=True)}")
 
+    def set_files(self, entries: list):
+        self._count_label.setText(f"Files: {len(entries)}")
+
     def clear(self):
         self._filename = None
         self._filesize = None
         self._filename_label.setText("")
         self._filesize_label.setText("")
+        self._count_label.setText("")
 
 class TransactionClose(QWidget):
     """
@@ -133,15 +146,20 @@ class TransactionProgress(QWidget):
     cancelled = Signal() # transaction abandonnée
     uploaded = Signal() # uploadé
     finished = Signal() # téléchargé
+    FILE_STEPS = 1000 # graduations de la barre du fichier en cours (la taille d'un fichier peut dépasser un int)
 
     def __init__(self, is_sender: bool, parent=None):
         super().__init__(parent)
         self._filesize = None
         self._value = 0
+        self._paths = None # chemins des fichiers d'une transaction groupée
+        self._ends = None # position de fin de chaque fichier dans la transaction
         self._is_sender = is_sender
         self._is_pending = True # True avant que le premier octet de fichier soit envoyé ou reçu
+        self._queued = False # True tant que le transfert attend une place libre (voir TransferManager)
         self._finished = False
         self._uploaded = False
+        self._unverified = False # True si le fichier reçu n'a pas pu être vérifié
         self.init_UI()
 
     def init_UI(self):
@@ -165,8 +183,18 @@ class TransactionProgress(QWidget):
         self._bar.setTextVisible(True)
         self._bar.hide() # cachée au début, apparaît quand la transaction commence
 
+        self._stats_label = QLabel("", alignment=Qt.AlignmentFlag.AlignHCenter) # débit et temps restant
+        self._file_label = QElidedLabel("", alignment=Qt.AlignmentFlag.AlignHCenter) # fichier en cours (transaction groupée)
+        self._file_bar = QProgressBar(alignment=Qt.AlignmentFlag.AlignHCenter) # progression du fichier en cours, en millièmes
+        self._file_bar.setRange(0, self.FILE_STEPS)
+        self._file_bar.setTextVisible(True)
+        self._file_bar.hide() # transaction groupée seulement, apparaît avec la barre principale
+
         self._box_layout.addWidget(self._status_label)
         self._box_layout.addWidget(self._bar)
+        self._box_layout.addWidget(self._file_label)
+        self._box_layout.addWidget(self._file_bar)
+        self._box_layout.addWidget(self._stats_label)
         self._box_layout.addWidget(self._cancel_button, alignment=Qt.AlignmentFlag.AlignHCenter)
         self._box_layout.addWidget(self._close_button, alignment=Qt.AlignmentFlag.AlignHCenter)
         self._box.setLayout(self._box_layout)
@@ -178,6 +206,26 @@ class TransactionProgress(QWidget):
         self._filesize = filesize
         self._bar.setMaximum(self._filesize)
 
+    def set_files(self, entries: list):
+        """
+        Transaction groupée : le fichier en cours est affiché sous la barre de progression.
+        """
+        self._paths = [entry["path"] for entry in entries]
+        self._ends = list(accumulate(entry["size"] for entry in entries))
+        self.update_file()
+
+    def update_file(self):
+        """
+        Affiche le fichier en cours et sa progression, déduite de sa position dans la transaction (fin du fichier précédent).
+        """
+        if self._paths:
+            index = min(bisect.bisect_right(self._ends, self._value), len(self._paths) - 1) # premier fichier pas encore terminé
+            start = self._ends[index - 1] if index > 0 else 0
+            size = self._ends[index] - start
+            self._file_label.setText(f"File {index + 1} of {len(self._paths)}: {self._paths[index]}")
+            self._file_bar.setValue(self.FILE_STEPS * min(max(self._value - start, 0), size) // size if size else self.FILE_STEPS)
+            self._file_bar.setVisible(not self._is_pending)
+
     def status_text(self):
         """
         Renvoie le texte qui doit être affiché le temps que la transaction soit lancée.
@@ -187,6 +235,12 @@ class TransactionProgress(QWidget):
         else:
             return "Waiting for the sender to start transaction..."
 
+    def set_queued(self, queued: bool):
+        if queued != self._queued:
+            self._queued = queued
+            if self._is_pending:
+                self._status_label.setText("Queued: waiting for another transfer to finish..." if queued else self.status_text())
+
     def update_value(self, n: int):
         """
         Met à jour la QProgressBar.
@@ -199,6 +253,7 @@ class TransactionProgress(QWidget):
 
         self._value += n
         self._bar.setValue(self._value)
+        self.update_file()
 
         if self._value == self._filesize: # fichier totalement téléversé ou téléchargé
             if self._is_sender:
@@ -208,14 +263,55 @@ class TransactionProgress(QWidget):
                 self._finished = True
                 self.finished.emit()
 
+    def set_value(self, value: int):
+        """
+        Place la barre de progression à value octets (reprise d'un transfert).
+        """
+        self._value = value
+        self._bar.setValue(self._value)
+        self.update_file()
+
+    def update_stats(self, rate: float, average_rate: float, eta: float):
+        """
+        Affiche le débit instantané, le débit lissé et le temps restant estimé.
+        """
+        text = f"{naturalsize(rate, binary=True)}/s (average: {naturalsize(average_rate, binary=True)}/s)"
+        if eta >= 0:
+            text += f" - {naturaldelta(eta)} remaining"
+        self._stats_label.setText(text)
+
     @Slot()
     def on_upload(self):
         self._status_label.setText("Receiver is downloading the file...")
         self._uploaded = True
 
+    @Slot(str)
+    def on_unverified(self, reason: str):
+        self._unverified = True
+
     @Slot()
     def on_finish(self):
-        self._status_label.setText("Transaction finished! You can close the interface.")
+        if self._unverified:
+            self._status_label.setText("Transaction finished, but the file could not be verified. You can close the interface.")
+        else:
+            self._status_label.setText("Transaction finished! You can close the interface.")
+        self._close_button.show()
+        self._finished = True
+
+    @Slot()
+    def on_corrupted(self):
+        self._status_label.setText("The received file is corrupted, the transaction failed.")
+        self._close_button.show()
+        self._finished = True
+
+    @Slot()
+    def on_failed(self):
+        """
+        Le fichier ne peut pas être reçu (la raison est affichée dans le fil) : la transaction peut seulement être fermée.
+        """
+        self._status_label.setText("The transfer failed. You can close the interface.")
+        self._stats_label.setText("")
+        self._cancel_button.hide()
         self._close_button.show()
         self._finished = True
 
@@ -231,8 +327,16 @@ class TransactionProgress(QWidget):
     def clear(self):
         self._bar.hide()
         self._is_pending = True
+        self._queued = False
         self._value = 0
+        self._unverified = False
         self._bar.setValue(0)
+        self._stats_label.setText("")
+        self._paths = None
+        self._ends = None
+        self._file_label.setText("")
+        self._file_bar.hide()
+        self._file_bar.setValue(0)
         self._status_label.setText(self.status_text())
         self._close_button.hide()
         self._cancel_button.show()
@@ -310,6 +414,7 @@ class TransactionReceiverActions(QWidget):
         self.init_UI()
         self._filename = None
         self._destination = None
+        self._batch = False # True si la transaction contient plusieurs fichiers
 
     def init_UI(self):
         self._layout = QVBoxLayout()
@@ -352,11 +457,23 @@ class TransactionReceiverActions(QWidget):
         self._filename = filename
         self._browse_button.setDisabled(False) # le bouton devient cliquable
 
+    def set_folder(self, text: str):
+        """
+        La transaction contient plusieurs fichiers (transaction groupée ou archive) : la destination est un dossier.
+        """
+        self._batch = True
+        self._input_label.setText(text)
+
     def browse(self):
         """
-        Choisir la destination du fichier.
+        Choisir la destination du fichier ; pour une transaction groupée, les fichiers sont enregistrés dans un dossier
+        portant le nom de la transaction, créé dans le dossier choisi.
         """
-        self._destination, _ = QFileDialog.getSaveFileName(dir=f"{get_download_path()/self._filename}")
+        if self._batch:
+            directory = QFileDialog.getExistingDirectory(dir=f"{get_download_path()}")
+            self._destination = f"{Path(directory)/self._filename}" if directory != "" else ""
+        else:
+            self._destination, _ = QFileDialog.getSaveFileName(dir=f"{get_download_path()/self._filename}")
         if self._destination != "":
             self._input.setText(self._destination)
             self._box_layout.insertSpacing(2, -20)
@@ -364,6 +481,8 @@ class TransactionReceiverActions(QWidget):
 
     def clear(self):
         self._accept_button.hide()
+        self._batch = False
+        self._input_label.setText("Set the file destination path:")
         self._input.setText("")
         self._browse_button.setDisabled(True)
 
@@ -372,6 +491,7 @@ class TransactionSenderPage(QWidget):
     La page d'envoi de fichier.
     """
     closed = Signal() # lorsque la transaction est quittée
+    started = Signal() # lorsque le client lance l'envoi : l'envoi démarre quand le TransferManager lui laisse une place
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -380,9 +500,11 @@ class TransactionSenderPage(QWidget):
         self._connection = None
         self.init_UI()
 
-    def invoke(self, transaction_id: str, filepath: str):
+    def invoke(self, transaction_id: str, filepath: str | list[str], archive: bool = False):
         """
         Crée la connexion au serveur, affiche les informations sur la transaction.
+        filepath peut être un dossier ou une liste de fichiers (transaction groupée) ; si archive est à True, un dossier est
+        envoyé comme une archive tar générée à la volée.
         """
         self._transaction_id = transaction_id
         self._filepath = filepath
@@ -390,13 +512,17 @@ class TransactionSenderPage(QWidget):
 
         self._feed.append("Establishing connection...")
 
-        self._connection = TransactionSender(transaction_id, filepath) # ajout des slots
+        self._connection = TransactionSender(transaction_id, filepath, archive) # ajout des slots
         self._connection.text_received.connect(self._feed.append)
         self._connection.infos_received.connect(self.set_file_infos)
+        self._connection.files_received.connect(self.set_files)
         self._connection.transaction_accepted.connect(self._actions.show_start_button)
         self._connection.transaction_progressed.connect(self.update_progress)
+        self._connection.transaction_stats.connect(self.update_stats)
+        self._connection.transaction_resumed.connect(self._progress.set_value)
         self._connection.transaction_uploaded.connect(self._progress.on_upload)
         self._connection.transaction_finished.connect(self._progress.on_finish)
+        self._connection.transaction_corrupted.connect(self._progress.on_corrupted)
         self._connection.peer_left.connect(self.on_peer_close)
 
         self._connection.offer()
@@ -438,10 +564,10 @@ class TransactionSenderPage(QWidget):
     @Slot()
     def start(self):
         """
-        La transaction commence : le stream du fichier débute.
+        La transaction commence : le stream du fichier débute (voir started).
         """
         self._stacked_widget.setCurrentIndex(1)
-        self._connection.start()
+        self.started.emit()
 
     def connection(self):
         return self._connection
@@ -453,6 +579,13 @@ class TransactionSenderPage(QWidget):
         """
         self._progress.update_value(n)
 
+    @Slot(float, float, float)
+    def update_stats(self, rate: float, average_rate: float, eta: float):
+        """
+        Mettre à jour le débit et le temps restant.
+        """
+        self._progress.update_stats(rate, average_rate, eta)
+
     @Slot(str, int)
     def set_file_infos(self, filename: str, filesize: int):
         """
@@ -461,6 +594,17 @@ class TransactionSenderPage(QWidget):
         self._file.set_file_infos(filename, filesize)
         self._progress.set_filesize(filesize)
 
+    @Slot(list)
+    def set_files(self, entries: list):
+        """
+        Afficher les fichiers d'une transaction groupée.
+        """
+        self._file.set_files(entries)
+        self._progress.set_files(entries)
+
+    def set_queued(self, queued: bool):
+        self._progress.set_queued(queued)
+
     def clear(self):
         """
         Arrêt de la transaction.
@@ -495,6 +639,7 @@ class TransactionSenderPage(QWidget):
 
 class TransactionReceiverPage(QWidget):
     closed = Signal() # lorsque la transaction est quittée
+    accepted = Signal() # lorsque le client accepte la transaction : elle est acceptée quand le TransferManager lui laisse une place
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -511,6 +656,20 @@ class TransactionReceiverPage(QWidget):
         self._file.set_file_infos(filename, filesize)
         self._actions.set_filename(filename)
         self._progress.set_filesize(filesize)
+        if self._connection.archive() is not None:
+            self._actions.set_folder("Set the folder in which the archive is extracted:")
+
+    @Slot(list)
+    def set_files(self, entries: list):
+        """
+        Afficher les fichiers d'une transaction groupée.
+        """
+        self._file.set_files(entries)
+        self._actions.set_folder(f"Set the destination folder of the {len(entries)} files:")
+        self._progress.set_files(entries)
+
+    def set_queued(self, queued: bool):
+        self._progress.set_queued(queued)
 
     def invoke(self, transaction_id: str):
         """
@@ -524,9 +683,14 @@ class TransactionReceiverPage(QWidget):
         self._connection.open()
         self._connection.text_received.connect(self._feed.append)
         self._connection.infos_received.connect(self.set_file_infos)
+        self._connection.files_received.connect(self.set_files)
         self._connection.transaction_progressed.connect(self.update_progress)
+        self._connection.transaction_stats.connect(self.update_stats)
+        self._connection.transaction_resumed.connect(self._progress.set_value)
+        self._connection.transaction_unverified.connect(self._progress.on_unverified)
         self._connection.transaction_finished.connect(self._progress.on_finish)
-        self._progress.finished.connect(self._connection.finish)
+        self._connection.transaction_corrupted.connect(self._progress.on_corrupted)
+        self._connection.transaction_failed.connect(self._progress.on_failed)
         self._connection.transaction_uploaded.connect(self._progress.on_upload)
         self._connection.peer_left.connect(self.on_peer_close)
 
@@ -573,11 +737,11 @@ class TransactionReceiverPage(QWidget):
     @Slot(str)
     def accept_transaction(self, filepath: str):
         """
-        Le client a accepté la transaction : le stream peut débuter.
+        Le client a accepté la transaction : le stream peut débuter (voir accepted).
         """
         self._connection.set_filepath(filepath)
-        self._connection.accept()
         self._stacked_widget.setCurrentIndex(1)
+        self.accepted.emit()
 
     @Slot(int)
     def update_progress(self, n: int):
@@ -585,6 +749,13 @@ class TransactionReceiverPage(QWidget):
         Mettre à jour la barre de progression.
         """
         self._progress.update_value(n)
+
+    @Slot(float, float, float)
+    def update_stats(self, rate: float, average_rate: float, eta: float):
+        """
+        Mettre à jour le débit et le temps restant.
+        """
+        self._progress.update_stats(rate, average_rate, eta)
     
     @Slot()
     def on_peer_close(self):
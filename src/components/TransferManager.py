@@ -0,0 +1,228 @@
+from PySide6.QtCore import Signal, QObject
+from .TransactionHandlers import Transaction
+from ..vars import MAX_TRANSFERS, UPLOAD_RATE_LIMIT, DOWNLOAD_RATE_LIMIT
+from collections.abc import Callable
+import heapq
+import itertools
+
+"""
+File d'attente des transactions : au plus MAX_TRANSFERS transferts (envoi ou réception) se déroulent en même temps, les
+suivants attendent qu'une place se libère, par ordre de priorité puis d'arrivée. Les limites de débit globales
+(UPLOAD_RATE_LIMIT, DOWNLOAD_RATE_LIMIT) sont partagées à parts égales entre les transferts en cours.
+"""
+
+class Transfer:
+    """
+    État d'une transaction suivie par le TransferManager : nom et taille du fichier, octets transférés, débit et état.
+    """
+    WAITING = "Waiting" # en attente du pair ou du client
+    QUEUED = "Queued" # prêt, en attente d'une place libre
+    ACTIVE = "Active"
+    FINISHED = "Finished"
+    FAILED = "Failed"
+
+    def __init__(self, transaction: Transaction, sending: bool, priority: int = 0):
+        self.transaction = transaction
+        self.sending = sending # True pour un envoi, False pour une réception
+        self.priority = priority # les transferts de plus haute priorité quittent la file en premier
+        self.state = Transfer.WAITING
+        self.name = None
+        self.size = None
+        self.done = 0 # octets transférés
+        self.rate = 0.0 # débit lissé (octets/s)
+        self.limit = None # débit maximal propre au transfert (octets/s), None : seulement la limite globale
+        self.applied_limit = None # débit maximal appliqué à la transaction
+
+    def progress(self) -> float | None:
+        """
+        Renvoie la proportion transférée (entre 0 et 1), None si la taille n'est pas encore connue.
+        """
+        if not self.size:
+            return None
+        return min(self.done / self.size, 1.0)
+
+    def is_running(self) -> bool:
+        return self.state == Transfer.ACTIVE
+
+class TransferManager(QObject):
+    """
+    Ordonnance les transferts de plusieurs transactions : schedule() lance l'action qui démarre le transfert (start() pour
+    l'émetteur, accept() pour le receveur) si moins de limit transferts sont en cours, et la met sinon en file d'attente.
+    Une place se libère quand la transaction se termine, échoue ou est retirée (remove()).
+    Les transferts en cours se partagent la bande passante (chacun avec ses propres sockets) ; throughput_changed donne le
+    débit cumulé. Une limite globale d'envoi ou de réception est divisée également entre les transferts en cours dans ce
+    sens, puis chaque transfert est limité au plus petit de sa part et de sa propre limite (voir set_rate_limit des
+    transactions). Les parts sont recalculées chaque fois qu'un transfert démarre ou se termine.
+    """
+    transfer_added = Signal(object) # émis avec le Transfer ajouté
+    transfer_changed = Signal(object) # émis à chaque changement d'état ou de progression d'un transfert
+    transfer_removed = Signal(object)
+    throughput_changed = Signal(float) # débit cumulé des transferts en cours (octets/s)
+
+    def __init__(self, limit: int = MAX_TRANSFERS, parent=None):
+        super().__init__(parent)
+        self._limit = limit
+        self._upload_limit = UPLOAD_RATE_LIMIT
+        self._download_limit = DOWNLOAD_RATE_LIMIT
+        self._transfers = [] # transferts suivis, dans l'ordre d'ajout
+        self._queue = [] # tas de (-priorité, numéro d'arrivée, Transfer)
+        self._counter = itertools.count()
+        self._actions = {} # action en attente de chaque transfert de la file
+
+    def set_limit(self, limit: int):
+        """
+        Règle le nombre de transferts simultanés ; les transferts en attente démarrent si la limite augmente.
+        """
+        self._limit = max(1, limit)
+        self.run_queued()
+
+    def limit(self) -> int:
+        return self._limit
+
+    def set_upload_limit(self, rate: float | None):
+        """
+        Règle le débit maximal (octets/s, None : pas de limite) de l'ensemble des envois.
+        """
+        self._upload_limit = rate
+        self.share()
+
+    def set_download_limit(self, rate: float | None):
+        self._download_limit = rate
+        self.share()
+
+    def upload_limit(self) -> float | None:
+        return self._upload_limit
+
+    def download_limit(self) -> float | None:
+        return self._download_limit
+
+    def set_rate_limit(self, transfer: Transfer, rate: float | None):
+        """
+        Règle le débit maximal propre à un transfert.
+        """
+        transfer.limit = rate
+        self.share()
+        self.update(transfer)
+
+    def share(self):
+        """
+        Applique à chaque transfert en cours sa part des limites globales (ou sa propre limite si elle est plus basse).
+        """
+        for sending, limit in ((True, self._upload_limit), (False, self._download_limit)):
+            running = [transfer for transfer in self._transfers if transfer.is_running() and transfer.sending == sending]
+            for transfer in running:
+                limits = [rate for rate in (transfer.limit, limit / len(running) if limit is not None else None) if rate is not None]
+                rate = min(limits) if limits else None
+                if rate != transfer.applied_limit:
+                    transfer.applied_limit = rate
+                    transfer.transaction.set_rate_limit(rate)
+
+    def add(self, transaction: Transaction, sending: bool, priority: int = 0) -> Transfer:
+        """
+        Suit une nouvelle transaction, dont le transfert ne démarre qu'après schedule().
+        """
+        transfer = Transfer(transaction, sending, priority)
+        transaction.infos_received.connect(lambda filename, filesize: self.on_infos(transfer, filename, filesize))
+        transaction.transaction_progressed.connect(lambda n: self.on_progress(transfer, n))
+        transaction.transaction_resumed.connect(lambda done: self.on_resumed(transfer, done))
+        transaction.transaction_stats.connect(lambda rate, average_rate, eta: self.on_stats(transfer, average_rate))
+        transaction.transaction_finished.connect(lambda: self.end(transfer, Transfer.FINISHED))
+        transaction.transaction_corrupted.connect(lambda: self.end(transfer, Transfer.FAILED))
+        transaction.transaction_failed.connect(lambda: self.end(transfer, Transfer.FAILED))
+        transaction.peer_left.connect(lambda: self.end(transfer, Transfer.FAILED))
+        self._transfers.append(transfer)
+        self.transfer_added.emit(transfer)
+        return transfer
+
+    def schedule(self, transfer: Transfer, action: Callable[[], None]):
+        """
+        Lance action (démarrage du transfert) dès qu'une place est libre.
+        """
+        if transfer.state != Transfer.WAITING:
+            return
+        if self.active_count() < self._limit:
+            self.run(transfer, action)
+        else:
+            transfer.state = Transfer.QUEUED
+            self._actions[transfer] = action
+            heapq.heappush(self._queue, (-transfer.priority, next(self._counter), transfer))
+            self.transfer_changed.emit(transfer)
+
+    def set_priority(self, transfer: Transfer, priority: int):
+        transfer.priority = priority
+        if transfer.state == Transfer.QUEUED: # la file est réordonnée
+            self._queue = [(-item.priority, order, item) for _, order, item in self._queue]
+            heapq.heapify(self._queue)
+        self.update(transfer)
+
+    def update(self, transfer: Transfer):
+        if transfer in self._transfers: # les signaux d'une transaction retirée sont ignorés
+            self.transfer_changed.emit(transfer)
+
+    def run(self, transfer: Transfer, action: Callable[[], None]):
+        transfer.state = Transfer.ACTIVE
+        self.share() # la limite est réglée avant le démarrage
+        self.transfer_changed.emit(transfer)
+        action()
+
+    def run_queued(self):
+        while self._queue and self.active_count() < self._limit:
+            _, _, transfer = heapq.heappop(self._queue)
+            action = self._actions.pop(transfer, None)
+            if action is not None and transfer.state == Transfer.QUEUED:
+                self.run(transfer, action)
+
+    def end(self, transfer: Transfer, state: str):
+        """
+        Le transfert est terminé (ou a échoué) : sa place est donnée au premier transfert de la file.
+        """
+        if transfer.state in (Transfer.FINISHED, Transfer.FAILED) or transfer not in self._transfers:
+            return
+        if transfer.state == Transfer.QUEUED:
+            self._actions.pop(transfer, None) # retiré de la file lorsqu'il en sortira
+        transfer.state = state
+        transfer.rate = 0.0
+        self.transfer_changed.emit(transfer)
+        self.throughput_changed.emit(self.throughput())
+        self.share()
+        self.run_queued()
+
+    def remove(self, transfer: Transfer):
+        """
+        Ne suit plus le transfert (page de la transaction fermée) ; s'il était en cours, sa place est libérée.
+        """
+        if transfer not in self._transfers:
+            return
+        self.end(transfer, Transfer.FAILED)
+        self._transfers.remove(transfer)
+        self.transfer_removed.emit(transfer)
+
+    def on_infos(self, transfer: Transfer, filename: str, filesize: int):
+        transfer.name = filename
+        transfer.size = filesize
+        self.update(transfer)
+
+    def on_progress(self, transfer: Transfer, n: int):
+        transfer.done += n
+        self.update(transfer)
+
+    def on_resumed(self, transfer: Transfer, done: int):
+        transfer.done = done
+        self.update(transfer)
+
+    def on_stats(self, transfer: Transfer, rate: float):
+        if transfer.is_running() and transfer in self._transfers:
+            transfer.rate = rate
+            self.throughput_changed.emit(self.throughput())
+
+    def transfers(self) -> list[Transfer]:
+        return list(self._transfers)
+
+    def active_count(self) -> int:
+        return sum(transfer.is_running() for transfer in self._transfers)
+
+    def queued_count(self) -> int:
+        return sum(transfer.state == Transfer.QUEUED for transfer in self._transfers)
+
+    def throughput(self) -> float:
+        return sum(transfer.rate for transfer in self._transfers if transfer.is_running())
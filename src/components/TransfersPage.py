@@ -0,0 +1,190 @@
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QPushButton, QListWidget, QListWidgetItem, QLabel, QStackedWidget, QSpinBox
+from PySide6.QtGui import Qt
+from PySide6.QtCore import Signal, Slot
+from .TransferManager import TransferManager, Transfer
+from humanize import naturalsize
+from ..vars import STYLES_PATH
+from pathlib import Path
+
+class TransferList(QWidget):
+    """
+    Liste des transferts (en cours, en attente et terminés) avec le débit cumulé des transferts en cours, et les limites de
+    débit (en Kio/s, 0 : pas de limite) globales et du transfert sélectionné.
+    """
+    selected = Signal(object) # émis avec le Transfer choisi dans la liste
+    back = Signal() # retour au menu principal, les transferts continuent
+    upload_limit_changed = Signal(object) # émis avec la nouvelle limite globale d'envoi (octets/s ou None)
+    download_limit_changed = Signal(object)
+    transfer_limit_changed = Signal(object, object) # émis avec le Transfer sélectionné et sa nouvelle limite
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = {} # QListWidgetItem de chaque Transfer
+        self.init_UI()
+
+    def init_UI(self):
+        self._layout = QVBoxLayout()
+        self._box = QGroupBox("Transfers:")
+        self._box_layout = QVBoxLayout()
+
+        self._list = QListWidget()
+        self._list.currentItemChanged.connect(self.on_item_changed)
+        self._throughput_label = QLabel("", alignment=Qt.AlignmentFlag.AlignHCenter) # débit cumulé
+
+        self._limits_layout = QHBoxLayout()
+        self._upload_limit = self.limit_box()
+        self._download_limit = self.limit_box()
+        self._transfer_limit = self.limit_box()
+        self._transfer_limit.setDisabled(True) # actif quand un transfert est sélectionné
+        self._upload_limit.valueChanged.connect(lambda value: self.upload_limit_changed.emit(self.limit_value(value)))
+        self._download_limit.valueChanged.connect(lambda value: self.download_limit_changed.emit(self.limit_value(value)))
+        self._transfer_limit.valueChanged.connect(self.on_transfer_limit)
+        for text, box in (("Upload:", self._upload_limit), ("Download:", self._download_limit), ("Selected:", self._transfer_limit)):
+            self._limits_layout.addWidget(QLabel(text))
+            self._limits_layout.addWidget(box)
+
+        self._back_button = QPushButton("Back")
+        self._back_button.setObjectName("cancel")
+        self._back_button.clicked.connect(lambda: self.back.emit())
+
+        self._box_layout.addWidget(self._list)
+        self._box_layout.addWidget(self._throughput_label)
+        self._box_layout.addLayout(self._limits_layout)
+        self._box_layout.addWidget(self._back_button, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self._box.setLayout(self._box_layout)
+        self._layout.addWidget(self._box)
+        self.setLayout(self._layout)
+
+    def add(self, transfer: Transfer):
+        item = QListWidgetItem(self.item_text(transfer))
+        item.setData(Qt.ItemDataRole.UserRole, transfer)
+        self._items[transfer] = item
+        self._list.addItem(item)
+        self._list.setCurrentItem(item)
+
+    def update(self, transfer: Transfer):
+        item = self._items.get(transfer)
+        if item is not None:
+            text = self.item_text(transfer)
+            if item.text() != text: # la progression est émise bien plus souvent que le texte ne change
+                item.setText(text)
+
+    def remove(self, transfer: Transfer):
+        item = self._items.pop(transfer, None)
+        if item is not None:
+            self._list.takeItem(self._list.row(item))
+
+    def item_text(self, transfer: Transfer) -> str:
+        text = f"{'Send' if transfer.sending else 'Receive'}: {transfer.name or 'waiting for file infos...'} - {transfer.state}"
+        progress = transfer.progress()
+        if progress is not None and transfer.state != Transfer.WAITING:
+            text += f" - {int(100 * progress)}%"
+        if transfer.is_running() and transfer.rate:
+            text += f" - {naturalsize(transfer.rate, binary=True)}/s"
+        return text
+
+    def limit_box(self) -> QSpinBox:
+        box = QSpinBox()
+        box.setRange(0, 10 * 1024 * 1024)
+        box.setSingleStep(128)
+        box.setSuffix(" KiB/s")
+        box.setSpecialValueText("Unlimited") # affiché pour 0
+        return box
+
+    def limit_value(self, value: int) -> int | None:
+        return value * 1024 if value else None
+
+    def set_limits(self, upload: float | None, download: float | None):
+        self._upload_limit.setValue(int(upload or 0) // 1024)
+        self._download_limit.setValue(int(download or 0) // 1024)
+
+    @Slot(int)
+    def on_transfer_limit(self, value: int):
+        item = self._list.currentItem()
+        if item is not None:
+            self.transfer_limit_changed.emit(item.data(Qt.ItemDataRole.UserRole), self.limit_value(value))
+
+    def set_throughput(self, throughput: float, active: int, queued: int):
+        self._throughput_label.setText(f"{active} active, {queued} queued - total: {naturalsize(throughput, binary=True)}/s")
+
+    @Slot(QListWidgetItem, QListWidgetItem)
+    def on_item_changed(self, current: QListWidgetItem, previous: QListWidgetItem):
+        self._transfer_limit.setDisabled(current is None)
+        if current is not None:
+            transfer = current.data(Qt.ItemDataRole.UserRole)
+            self._transfer_limit.blockSignals(True) # la limite affichée n'est pas une modification
+            self._transfer_limit.setValue(int(transfer.limit or 0) // 1024)
+            self._transfer_limit.blockSignals(False)
+            self.selected.emit(transfer)
+
+class TransfersPage(QWidget):
+    """
+    Page des transferts : la liste des transactions du TransferManager au-dessus de la page (TransactionSenderPage ou
+    TransactionReceiverPage) de la transaction sélectionnée.
+    """
+    back = Signal() # retour au menu principal
+
+    def __init__(self, manager: TransferManager, parent=None):
+        super().__init__(parent)
+        self._manager = manager
+        self._pages = {} # page de chaque Transfer
+        self.init_UI()
+
+        self._manager.transfer_changed.connect(self.on_transfer_changed)
+        self._manager.throughput_changed.connect(lambda throughput: self.update_throughput())
+
+    def init_UI(self):
+        self._layout = QVBoxLayout()
+        self._list = TransferList()
+        self._stacked_widget = QStackedWidget()
+
+        self._list.selected.connect(self.show_transfer)
+        self._list.back.connect(lambda: self.back.emit())
+        self._list.set_limits(self._manager.upload_limit(), self._manager.download_limit())
+        self._list.upload_limit_changed.connect(self._manager.set_upload_limit)
+        self._list.download_limit_changed.connect(self._manager.set_download_limit)
+        self._list.transfer_limit_changed.connect(self._manager.set_rate_limit)
+
+        self._layout.addWidget(self._list, 1)
+        self._layout.addWidget(self._stacked_widget, 3)
+        self.setLayout(self._layout)
+
+        self.setStyleSheet(Path(f"{STYLES_PATH}/transaction_page.qss").read_text())
+
+    def add(self, transfer: Transfer, page: QWidget):
+        """
+        Ajoute un transfert et sa page, qui devient la page affichée.
+        """
+        self._pages[transfer] = page
+        self._stacked_widget.addWidget(page)
+        self._list.add(transfer)
+        self.update_throughput()
+
+    def remove(self, transfer: Transfer):
+        page = self._pages.pop(transfer, None)
+        self._list.remove(transfer)
+        if page is not None:
+            self._stacked_widget.removeWidget(page)
+            page.deleteLater()
+        self.update_throughput()
+
+    def count(self) -> int:
+        return len(self._pages)
+
+    @Slot(object)
+    def show_transfer(self, transfer: Transfer):
+        page = self._pages.get(transfer)
+        if page is not None:
+            self._stacked_widget.setCurrentWidget(page)
+
+    @Slot(object)
+    def on_transfer_changed(self, transfer: Transfer):
+        self._list.update(transfer)
+        page = self._pages.get(transfer)
+        if page is not None:
+            page.set_queued(transfer.state == Transfer.QUEUED)
+        self.update_throughput()
+
+    @Slot()
+    def update_throughput(self):
+        self._list.set_throughput(self._manager.throughput(), self._manager.active_count(), self._manager.queued_count())
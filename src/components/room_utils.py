@@ -0,0 +1,76 @@
+import json
+import sys
+from dataclasses import dataclass
+from enum import Enum
+try:
+    import orjson # optionnel : décodage et encodage JSON plus rapides
+except ImportError:
+    orjson = None
+
+"""
+Outils sans dépendance à Qt utilisés par les salons (voir Connection.py) : décodage JSON et messages du fil.
+"""
+
+def loads(message: str):
+    return orjson.loads(message) if orjson is not None else json.loads(message)
+
+def dumps(data) -> str:
+    return orjson.dumps(data).decode() if orjson is not None else json.dumps(data)
+
+class MessageType(Enum):
+    """
+    Type d'un message du fil : les types diffusés dans un salon, et INFO pour le fil d'une transaction.
+    """
+    WELCOME = "WELCOME" # arrivée du client dans le salon
+    JOIN = "JOIN" # arrivée d'un pair
+    MESSAGE = "MESSAGE" # texte d'un pair
+    RECEIVED = "RECEIVED" # texte du client, renvoyé par le serveur
+    LEAVE = "LEAVE" # départ d'un pair
+    INFO = "INFO" # événement d'une transaction
+
+EVENTS = frozenset((MessageType.WELCOME, MessageType.JOIN, MessageType.LEAVE))
+
+@dataclass(slots=True)
+class Message:
+    """
+    Message du fil, conservé tel que reçu : le texte affiché (arrivée ou départ d'un pair, alias devant un texte) n'est
+    construit qu'au moment de dessiner le message. Les alias sont internés, un alias n'est donc gardé qu'une fois en
+    mémoire quel que soit le nombre de ses messages.
+    """
+    type: MessageType
+    alias: str
+    body: str
+
+    @staticmethod
+    def from_data(data: dict) -> "Message | None":
+        """
+        Crée le message d'un salon à partir du JSON décodé ; renvoie None si son type n'est pas un type de message du fil.
+        """
+        _type = MessageType._value2member_map_.get(data["type"])
+        if _type is None or _type is MessageType.INFO:
+            return None
+        alias = sys.intern(data["alias"])
+        return Message(_type, alias, data["body"] if _type in (MessageType.MESSAGE, MessageType.RECEIVED) else "")
+
+    def is_event(self) -> bool:
+        return self.type in EVENTS
+
+    def text(self) -> str:
+        """
+        Renvoie le texte du message tel qu'affiché dans le fil, sans l'alias de son auteur.
+        """
+        match self.type:
+            case MessageType.WELCOME | MessageType.JOIN:
+                return f"{self.alias} has joined the room." # nouvel arrivant
+            case MessageType.LEAVE:
+                return f"{self.alias} has left the room." # départ d'un pair
+        return self.body
+
+    def line_count(self) -> int:
+        return 1 if self.is_event() else self.body.count("\n") + 1
+
+    def line(self, i: int) -> str:
+        """
+        Renvoie la ligne i du texte affiché.
+        """
+        return self.text() if self.is_event() else self.body.split("\n")[i]
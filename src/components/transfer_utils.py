@@ -0,0 +1,1243 @@
+from ..vars import CHUNK_SIZE, CHUNK_SIZE_MIN, CHUNK_SIZE_MAX, WRITE_BUFFER_SIZE, WRITE_QUEUE_SIZE, CHECKPOINT_SUFFIX, LEAVES_SUFFIX, STRIPE_ALIGNMENT, COMPRESSION_SAMPLE_SIZE, COMPRESSION_MIN_RATIO, DIGEST_ALGORITHM, MANIFEST_BLOCK_SIZE, RATE_LIMIT_BURST
+import bisect
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+try:
+    import zstandard # optionnel : active le codec zstd
+except ImportError:
+    zstandard = None
+
+"""
+Outils sans dépendance à Qt utilisés par les transferts de fichiers (voir TransactionHandlers.py).
+Les modules qui ne servent qu'à certains transferts (tarfile, queue, zlib, hashlib) sont importés à la demande : ils ne
+ralentissent pas le démarrage de la ligne de commande (voir benchmarks/startup.py).
+"""
+
+logger = logging.getLogger(__name__)
+
+class ChunkSizer:
+    """
+    Choisit la taille des chunks envoyés à partir du débit et du RTT mesurés.
+    La taille visée correspond aux données transmises pendant target_duration secondes (ou un demi-RTT si c'est plus long),
+    bornée entre minimum et maximum et arrondie à la puissance de 2 inférieure pour éviter les oscillations.
+    Si adaptive est à False, la taille initiale est conservée.
+    """
+    def __init__(self, initial: int = CHUNK_SIZE, minimum: int = CHUNK_SIZE_MIN, maximum: int = CHUNK_SIZE_MAX, adaptive: bool = True, target_duration: float = 0.05):
+        self._minimum = minimum
+        self._maximum = max(minimum, maximum)
+        self._size = self.clamp(initial) if adaptive else initial
+        self._adaptive = adaptive
+        self._target_duration = target_duration
+        self._rate = None # débit lissé en octets par seconde
+        self._rtt = None # plus petit RTT observé en secondes (le RTT mesuré inclut l'attente dans les tampons)
+
+    def clamp(self, size: int) -> int:
+        size = min(max(size, self._minimum), self._maximum)
+        return 1 << (size.bit_length() - 1) # puissance de 2 inférieure
+
+    def record(self, n: int, elapsed: float):
+        """
+        Ajoute une mesure de débit : n octets écrits sur le réseau en elapsed secondes.
+        """
+        if elapsed <= 0 or n <= 0:
+            return
+        rate = n / elapsed
+        self._rate = rate if self._rate is None else 0.7 * self._rate + 0.3 * rate # moyenne mobile exponentielle
+        self.update()
+
+    def set_rtt(self, rtt: float):
+        """
+        Ajoute une mesure de RTT (en secondes).
+        """
+        self._rtt = rtt if self._rtt is None else min(self._rtt, rtt)
+        self.update()
+
+    def update(self):
+        if not self._adaptive or self._rate is None:
+            return
+        duration = self._target_duration if self._rtt is None else max(self._target_duration, self._rtt / 2)
+        self._size = self.clamp(int(self._rate * duration))
+
+    def size(self) -> int:
+        return self._size
+
+    def rate(self):
+        return self._rate
+
+    def rtt(self):
+        return self._rtt
+
+class ProgressAggregator:
+    """
+    Accumule les octets transférés entre deux publications de la progression et calcule le débit instantané
+    (depuis la publication précédente), le débit lissé (moyenne mobile exponentielle) et le temps restant estimé.
+    """
+    def __init__(self, total: int = None, done: int = 0, smoothing: float = 0.2):
+        self._total = total
+        self._smoothing = smoothing
+        self._done = done # octets transférés au total
+        self._pending = 0 # octets pas encore publiés
+        self._last = time.monotonic() # date de la dernière publication
+        self._rate = 0.0
+        self._average_rate = None
+
+    def add(self, n: int):
+        self._done += n
+        self._pending += n
+
+    def pending(self) -> int:
+        return self._pending
+
+    def done(self) -> int:
+        return self._done
+
+    def set_done(self, done: int):
+        """
+        Corrige le nombre d'octets transférés (reprise d'un transfert à une position antérieure).
+        """
+        self._done = done
+
+    def is_complete(self) -> bool:
+        return self._total is not None and self._done >= self._total
+
+    def take(self) -> int:
+        """
+        Renvoie les octets transférés depuis le dernier appel et met à jour les débits.
+        """
+        now = time.monotonic()
+        elapsed = now - self._last
+        n = self._pending
+        if elapsed > 0:
+            self._rate = n / elapsed
+            self._average_rate = self._rate if self._average_rate is None else (1 - self._smoothing) * self._average_rate + self._smoothing * self._rate
+        self._last = now
+        self._pending = 0
+        return n
+
+    def stats(self) -> tuple[float, float, float]:
+        """
+        Renvoie (débit instantané, débit lissé, temps restant), les débits en octets par seconde et le temps en secondes.
+        Le temps restant vaut -1 s'il ne peut pas être estimé.
+        """
+        average_rate = self._average_rate or 0.0
+        eta = -1.0
+        if self._total is not None and average_rate > 0:
+            eta = max(self._total - self._done, 0) / average_rate
+        return self._rate, average_rate, eta
+
+class TokenBucket:
+    """
+    Limiteur de débit par seau à jetons : rate octets par seconde (None : pas de limite), avec une réserve d'au plus
+    capacity() octets, soit RATE_LIMIT_BURST secondes de débit. Un chunk peut être envoyé dès que la réserve n'est plus
+    négative (consume() peut la rendre négative) : l'émetteur ne lit donc rien tant qu'il doit attendre (poll()), et son
+    tampon reste celui du contrôle de flux. Le débit peut être changé à tout moment depuis un autre thread (set_rate()).
+    """
+    MIN_CAPACITY = 16 * 1024
+
+    def __init__(self, rate: float = None):
+        self._lock = threading.Lock()
+        self._rate = None
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float | None):
+        with self._lock:
+            self.refill()
+            self._rate = rate if rate is None or rate > 0 else None
+            self._tokens = min(self._tokens, self.capacity())
+
+    def rate(self) -> float | None:
+        return self._rate
+
+    def capacity(self) -> int:
+        if self._rate is None:
+            return 0
+        return max(int(self._rate * RATE_LIMIT_BURST), self.MIN_CAPACITY)
+
+    def refill(self):
+        now = time.monotonic()
+        if self._rate is not None:
+            self._tokens = min(self._tokens + (now - self._last) * self._rate, self.capacity())
+        self._last = now
+
+    def poll(self) -> tuple[float, int | None]:
+        """
+        Renvoie (attente, quota) lus ensemble sous le verrou : le temps (en secondes) à attendre avant de pouvoir envoyer,
+        0 si l'envoi est possible, et le nombre maximal d'octets d'un chunk, None s'il n'y a pas de limite (jamais 0).
+        """
+        with self._lock:
+            if self._rate is None:
+                return 0.0, None
+            self.refill()
+            return max(-self._tokens, 0.0) / self._rate, self.capacity()
+
+    def consume(self, n: int):
+        with self._lock:
+            if self._rate is not None:
+                self.refill()
+                self._tokens -= n
+
+class FileWriter:
+    """
+    Écrit un fichier reçu à travers un unique descripteur, ouvert pendant tout le transfert, derrière un tampon de buffer_size octets.
+    Si offset est positif, les offset premiers octets du fichier existant sont conservés et l'écriture reprend à leur suite.
+    Si keep est à True, le fichier existant est conservé en entier (reprise d'écritures faites avec write_at).
+    """
+    def __init__(self, filepath: str, buffer_size: int = WRITE_BUFFER_SIZE, offset: int = 0, keep: bool = False):
+        if offset > 0 or keep: # reprise d'un transfert
+            self._file = open(filepath, "r+b", buffering=buffer_size)
+            self._file.seek(offset)
+            if not keep:
+                self._file.truncate()
+        else:
+            self._file = open(filepath, "wb", buffering=buffer_size) # le fichier est vidé
+
+    def write(self, data):
+        self._file.write(data)
+
+    def write_at(self, offset: int, data) -> int:
+        """
+        Écrit data à la position offset et renvoie le nombre d'octets écrits.
+        """
+        if self._file.tell() != offset:
+            self._file.seek(offset)
+        return self._file.write(data)
+
+    def flush(self, sync: bool = True):
+        """
+        Vide le tampon dans le fichier et, si sync est à True, force l'écriture sur le disque (fsync). Sans effet une fois fermé.
+        """
+        if self._file.closed:
+            return
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+class ThreadedFileWriter(FileWriter):
+    """
+    FileWriter dont les écritures sont faites par un thread dédié : une lenteur du disque ne bloque pas la lecture du socket.
+    Au plus queue_size octets attendent d'être écrits ; au-delà, write() attend que le disque rattrape son retard.
+    Une erreur d'écriture survenue dans le thread est relevée au prochain appel de write(), flush() ou close().
+    """
+    def __init__(self, filepath: str, buffer_size: int = WRITE_BUFFER_SIZE, offset: int = 0, keep: bool = False, queue_size: int = WRITE_QUEUE_SIZE):
+        import queue
+        super().__init__(filepath, buffer_size, offset, keep)
+        self._queue = queue.Queue() # (position ou None pour écrire à la suite, données) ; (événement, sync) pour un flush ; None pour fermer
+        self._queue_size = queue_size
+        self._pending = 0 # octets en file d'écriture
+        self._drained = threading.Condition() # notifiée à chaque chunk écrit
+        self._error = None
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is None: # fermeture
+                return
+            if isinstance(item[0], threading.Event): # demande de flush
+                done, sync = item
+                try:
+                    if self._error is None:
+                        super().flush(sync)
+                except OSError as error:
+                    self._error = error
+                finally:
+                    done.set()
+                continue
+            offset, data = item
+            try:
+                if self._error is None:
+                    if offset is None:
+                        super().write(data)
+                    else:
+                        super().write_at(offset, data)
+            except OSError as error:
+                self._error = error
+            finally:
+                with self._drained:
+                    self._pending -= len(data)
+                    self._drained.notify()
+
+    def raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def enqueue(self, offset, data):
+        self.raise_error()
+        n = len(data)
+        with self._drained:
+            while self._pending > 0 and self._pending + n > self._queue_size:
+                self._drained.wait()
+            self._pending += n
+        self._queue.put((offset, data))
+
+    def write(self, data):
+        """
+        Met data en file d'écriture, sans copie : data ne doit plus être modifié par l'appelant.
+        """
+        self.enqueue(None, data)
+
+    def write_at(self, offset: int, data) -> int:
+        """
+        Met data en file d'écriture à la position offset (voir write).
+        """
+        self.enqueue(offset, data)
+        return len(data)
+
+    def flush(self, sync: bool = True):
+        """
+        Attend que les chunks en file soient écrits puis vide le tampon (voir FileWriter.flush). Sans effet une fois fermé.
+        """
+        if not self._thread.is_alive(): # fermé : plus personne ne traiterait la demande
+            return
+        done = threading.Event()
+        self._queue.put((done, sync))
+        done.wait()
+        self.raise_error()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        super().close()
+        self.raise_error()
+
+class MappedFileWriter:
+    """
+    Écrit un fichier reçu dont la taille est connue à l'avance : le fichier est préalloué (fallocate si disponible, sinon truncate)
+    puis projeté en mémoire (mmap). Chaque chunk est copié à sa position, ce qui évite la fragmentation et les mises à jour
+    répétées des métadonnées du fichier, et permet des écritures dans le désordre (write_at).
+    Lors des écritures séquentielles, les pages déjà écrites sont régulièrement retirées de la projection (madvise) pour que
+    la mémoire résidente du processus ne grossisse pas avec le fichier : les données restent dans le cache du système.
+    Si offset est positif ou keep à True, le fichier existant est conservé et l'écriture séquentielle reprend à la position offset.
+    Lève OSError ou ValueError si le fichier ne peut pas être préalloué ou projeté (fichier vide par exemple).
+    """
+    RELEASE_WINDOW = 16 * 1024 * 1024 # nombre d'octets écrits séquentiellement avant de libérer les pages correspondantes
+
+    def __init__(self, filepath: str, filesize: int, offset: int = 0, keep: bool = False):
+        self._file = open(filepath, "r+b" if offset > 0 or keep else "w+b") # sauf reprise, le fichier est vidé
+        self._filesize = filesize
+        self._offset = offset # position de la prochaine écriture séquentielle
+        self._released = offset - offset % mmap.PAGESIZE # les pages avant cette position ont été libérées
+        self._map = None
+        try:
+            if hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(self._file.fileno(), 0, filesize)
+                except OSError: # non supporté par le système de fichiers
+                    self._file.truncate(filesize)
+            else:
+                self._file.truncate(filesize)
+            self._map = mmap.mmap(self._file.fileno(), filesize)
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+
+    def write(self, data):
+        n = self.write_at(self._offset, data)
+        self._offset += n
+        if self._offset - self._released >= self.RELEASE_WINDOW:
+            self.release(self._released, self._offset)
+            self._released = self._offset - self._offset % mmap.PAGESIZE
+
+    def release(self, start: int, end: int):
+        """
+        Retire de la projection les pages entièrement comprises entre start et end, si le système le permet.
+        """
+        start = -(-start // mmap.PAGESIZE) * mmap.PAGESIZE # alignement sur les pages
+        end -= end % mmap.PAGESIZE
+        if end > start and hasattr(mmap, "MADV_DONTNEED"):
+            self._map.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def write_at(self, offset: int, data) -> int:
+        """
+        Écrit data à la position offset et renvoie le nombre d'octets écrits.
+        """
+        n = len(data)
+        if offset < 0 or offset + n > self._filesize:
+            raise ValueError(f"write of {n} bytes at offset {offset} exceeds file size {self._filesize}")
+        self._map[offset:offset + n] = data
+        return n
+
+    def flush(self, sync: bool = True):
+        """
+        Écrit les pages modifiées dans le fichier ; avec sync=False l'écriture sur le disque est laissée au système.
+        Sans effet une fois fermé.
+        """
+        if sync and not self._map.closed:
+            self._map.flush()
+
+    def close(self):
+        if self._map is not None and not self._map.closed:
+            self._map.close()
+        if not self._file.closed:
+            self._file.close()
+
+class FileSet:
+    """
+    Plusieurs fichiers vus comme un seul : ils sont mis bout à bout dans l'ordre de files, chacun étant identifié par son
+    chemin relatif à root (séparateur "/"). Une transaction groupée envoie ce fichier virtuel : les plages, la reprise et
+    les blocs du manifeste portent sur ses positions, et les petits fichiers sont envoyés à la suite sans échange propre.
+    """
+    def __init__(self, root: str, files: list[tuple[str, int]], name: str = None):
+        self._root = root
+        self._files = files # (chemin relatif, taille) de chaque fichier
+        self._name = name if name is not None else os.path.basename(os.path.normpath(root))
+        self._starts = [] # position de chaque fichier dans le fichier virtuel
+        self._size = 0
+        for _, size in files:
+            self._starts.append(self._size)
+            self._size += size
+
+    @classmethod
+    def from_paths(cls, paths: list[str]) -> "FileSet":
+        """
+        Un dossier (parcouru récursivement, liens symboliques exclus) ou une liste de fichiers, désignés par leur chemin relatif
+        au dossier qui les contient tous.
+        """
+        if len(paths) == 1 and os.path.isdir(paths[0]):
+            root = paths[0]
+            files = []
+            for directory, directories, filenames in os.walk(root):
+                directories.sort()
+                for filename in sorted(filenames):
+                    path = os.path.join(directory, filename)
+                    if os.path.isfile(path) and not os.path.islink(path):
+                        files.append((os.path.relpath(path, root).replace(os.sep, "/"), os.path.getsize(path)))
+            return cls(root, files)
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+        files = [(os.path.relpath(os.path.abspath(path), root).replace(os.sep, "/"), os.path.getsize(path)) for path in paths]
+        return cls(root, files, f"{len(files)} files")
+
+    @classmethod
+    def from_entries(cls, root: str, entries: list) -> "FileSet":
+        """
+        Reconstruit, sous root, la liste de fichiers publiée par l'émetteur (voir entries()).
+        Lève ValueError si un chemin sort de root ou si la liste est invalide.
+        """
+        if not isinstance(entries, list):
+            raise ValueError("Invalid file list")
+        files = []
+        seen = set()
+        for entry in entries:
+            if not isinstance(entry, dict):
+                raise ValueError(f"Invalid file entry: {entry}")
+            path, size = entry.get("path"), entry.get("size")
+            if not isinstance(path, str) or not isinstance(size, int) or size < 0:
+                raise ValueError(f"Invalid file entry: {entry}")
+            check_relative_path(path)
+            if path in seen:
+                raise ValueError(f"Duplicate file path: {path}")
+            seen.add(path)
+            files.append((path, size))
+        return cls(root, files)
+
+    def entries(self) -> list[dict]:
+        return [{ "path": path, "size": size } for path, size in self._files]
+
+    def name(self) -> str:
+        return self._name
+
+    def size(self) -> int:
+        return self._size
+
+    def count(self) -> int:
+        return len(self._files)
+
+    def path(self, index: int) -> str:
+        return os.path.join(self._root, *self._files[index][0].split("/"))
+
+    def open(self) -> "FileSetReader":
+        return FileSetReader(self)
+
+    def spans(self, offset: int, size: int):
+        """
+        Découpe les octets [offset, offset + size) du fichier virtuel en (numéro du fichier, position dans le fichier, taille).
+        """
+        end = min(offset + size, self._size)
+        index = bisect.bisect_right(self._starts, offset) - 1 # dernier fichier qui commence avant offset (les fichiers vides sont sautés)
+        while offset < end:
+            start, length = self._starts[index], self._files[index][1]
+            n = min(end, start + length) - offset
+            if n > 0:
+                yield index, offset - start, n
+                offset += n
+            index += 1
+
+class FileSetReader:
+    """
+    Lit un FileSet comme un fichier ouvert en lecture sans tampon (seek, readinto, close) : un seul fichier est ouvert à la fois.
+    """
+    def __init__(self, fileset: FileSet):
+        self._fileset = fileset
+        self._position = 0
+        self._index = None
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def seek(self, offset: int):
+        self._position = offset
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        n = 0
+        for index, position, size in self._fileset.spans(self._position, len(view)):
+            if index != self._index:
+                self.close()
+                self._file = open(self._fileset.path(index), "rb", buffering=0)
+                self._index = index
+            if self._file.tell() != position:
+                self._file.seek(position)
+            while size > 0:
+                read = self._file.readinto(view[n:n + size])
+                if not read:
+                    raise OSError(f"{self._fileset.path(index)} is shorter than expected")
+                n += read
+                size -= read
+        self._position += n
+        return n
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._index = None
+
+def fsync_path(path: str):
+    """
+    Force l'écriture sur le disque d'un fichier déjà fermé (son contenu peut encore être dans le cache du système).
+    """
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class FileSetWriter:
+    """
+    Écrit les fichiers d'un FileSet reçu (write, write_at, flush, close comme FileWriter). Les dossiers sont créés et, sauf
+    reprise (offset positif ou keep à True), tous les fichiers sont vidés dès l'ouverture, y compris les fichiers vides.
+    Au plus MAX_OPEN fichiers restent ouverts, chacun derrière un tampon d'au plus buffer_size octets.
+    """
+    MAX_OPEN = 16
+
+    def __init__(self, fileset: FileSet, buffer_size: int = WRITE_BUFFER_SIZE, offset: int = 0, keep: bool = False):
+        self._fileset = fileset
+        self._buffer_size = min(buffer_size, 1024 * 1024)
+        self._position = offset # position de la prochaine écriture séquentielle
+        self._files = OrderedDict() # fichiers ouverts, du moins au plus récemment utilisé
+        self._written = set() # fichiers écrits depuis la dernière synchronisation
+        for index in range(fileset.count()):
+            path = fileset.path(index)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "ab" if offset > 0 or keep else "wb"): # sauf reprise, le fichier est vidé
+                pass
+
+    def file(self, index: int):
+        file = self._files.get(index)
+        if file is None:
+            if len(self._files) >= self.MAX_OPEN:
+                self._files.popitem(last=False)[1].close()
+            file = open(self._fileset.path(index), "r+b", buffering=self._buffer_size)
+            self._files[index] = file
+        else:
+            self._files.move_to_end(index)
+        self._written.add(index)
+        return file
+
+    def write(self, data):
+        self._position += self.write_at(self._position, data)
+
+    def write_at(self, offset: int, data) -> int:
+        """
+        Écrit data à la position offset du fichier virtuel et renvoie le nombre d'octets écrits.
+        """
+        with memoryview(data) as view:
+            view = view.cast("B")
+            if offset + len(view) > self._fileset.size():
+                raise ValueError(f"write of {len(view)} bytes at offset {offset} exceeds file size {self._fileset.size()}")
+            n = 0
+            for index, position, size in self._fileset.spans(offset, len(view)):
+                file = self.file(index)
+                if file.tell() != position:
+                    file.seek(position)
+                file.write(view[n:n + size])
+                n += size
+            return n
+
+    def flush(self, sync: bool = True):
+        """
+        Vide les tampons et, si sync est à True, force l'écriture sur le disque des fichiers écrits depuis la dernière
+        synchronisation (un fsync par fichier, y compris ceux qui ont été fermés depuis).
+        """
+        for file in self._files.values():
+            file.flush()
+        if sync:
+            for index in self._written:
+                file = self._files.get(index)
+                if file is not None:
+                    os.fsync(file.fileno())
+                else:
+                    fsync_path(self._fileset.path(index))
+            self._written.clear()
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+        self._files.clear()
+
+class TarArchive:
+    """
+    Archive tar (format pax) d'un dossier, générée à la volée et jamais écrite sur le disque : les en-têtes sont calculés
+    lors du parcours du dossier, le contenu des fichiers est lu au moment de l'envoi. La taille de l'archive est donc connue
+    dès le parcours ; un fichier modifié depuis est tronqué ou complété par des zéros, comme le fait tar.
+    """
+    def __init__(self, root: str):
+        import tarfile
+        self._root = root
+        self._name = os.path.basename(os.path.normpath(root))
+        self._segments = [] # (en-tête ou remplissage en bytes, ou chemin du fichier, taille) dans l'ordre de l'archive
+        self._starts = [] # position de chaque segment dans l'archive
+        self._size = 0
+        self._count = 0 # nombre de fichiers
+        for directory, directories, filenames in os.walk(root):
+            directories.sort()
+            if directory != root:
+                self.add_member(directory, tarfile.DIRTYPE)
+            for filename in sorted(filenames):
+                path = os.path.join(directory, filename)
+                if os.path.isfile(path) and not os.path.islink(path):
+                    self.add_member(path, tarfile.REGTYPE)
+        self.add_segment(bytes(2 * tarfile.BLOCKSIZE)) # fin de l'archive
+
+    def add_member(self, path: str, type: bytes):
+        import tarfile
+        stat = os.stat(path)
+        info = tarfile.TarInfo(os.path.relpath(path, self._root).replace(os.sep, "/"))
+        info.type = type
+        info.mode = stat.st_mode & 0o7777
+        info.mtime = int(stat.st_mtime)
+        info.size = stat.st_size if type == tarfile.REGTYPE else 0
+        self.add_segment(info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape"))
+        if info.size:
+            self.add_segment(path, info.size)
+            self.add_segment(bytes(-info.size % tarfile.BLOCKSIZE))
+        self._count += type == tarfile.REGTYPE
+
+    def add_segment(self, data: bytes | str, size: int = None):
+        size = len(data) if size is None else size
+        if size:
+            self._segments.append((data, size))
+            self._starts.append(self._size)
+            self._size += size
+
+    def name(self) -> str:
+        return self._name
+
+    def size(self) -> int:
+        return self._size
+
+    def count(self) -> int:
+        return self._count
+
+    def open(self) -> "TarArchiveReader":
+        return TarArchiveReader(self)
+
+    def spans(self, offset: int, size: int):
+        """
+        Découpe les octets [offset, offset + size) de l'archive en (segment, position dans le segment, taille), où segment
+        est un en-tête (bytes) ou le chemin d'un fichier.
+        """
+        end = min(offset + size, self._size)
+        index = bisect.bisect_right(self._starts, offset) - 1
+        while offset < end:
+            data, length = self._segments[index]
+            n = min(end, self._starts[index] + length) - offset
+            yield data, offset - self._starts[index], n
+            offset += n
+            index += 1
+
+class TarArchiveReader:
+    """
+    Lit une TarArchive comme un fichier ouvert en lecture sans tampon (seek, readinto, close) : un seul fichier est ouvert à la fois.
+    """
+    def __init__(self, archive: TarArchive):
+        self._archive = archive
+        self._position = 0
+        self._path = None
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def seek(self, offset: int):
+        self._position = offset
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        n = 0
+        for data, position, size in self._archive.spans(self._position, len(view)):
+            if isinstance(data, bytes):
+                view[n:n + size] = data[position:position + size]
+                n += size
+                continue
+            if data != self._path:
+                self.close()
+                self._file = open(data, "rb", buffering=0)
+                self._path = data
+            if self._file.tell() != position:
+                self._file.seek(position)
+            end = n + size
+            while n < end:
+                read = self._file.readinto(view[n:end])
+                if not read: # fichier raccourci depuis le parcours
+                    view[n:end] = bytes(end - n)
+                    break
+                n += read
+            n = end
+        self._position += n
+        return n
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._path = None
+
+class TarExtractor:
+    """
+    Extrait au fil de la réception une archive tar dans le dossier root (write, write_at, flush, close comme FileWriter) :
+    chaque en-tête est lu dès que son bloc est arrivé et le contenu des fichiers est écrit directement à sa place.
+    Seuls les dossiers et les fichiers ordinaires sont extraits, et les chemins qui sortiraient de root sont ignorés.
+    write_at réécrit le contenu de fichiers déjà extraits (plages redemandées après vérification) ; si une plage corrompue
+    contient autre chose, l'extraction est d'abord ramenée à l'en-tête qui la précède (voir rewind) et write_at poursuit
+    l'extraction à partir de là.
+    """
+    def __init__(self, root: str, buffer_size: int = WRITE_BUFFER_SIZE):
+        os.makedirs(root, exist_ok=True)
+        self._root = root
+        self._buffer_size = min(buffer_size, 1024 * 1024)
+        self._position = 0 # octets de l'archive reçus
+        self._header = bytearray() # bloc d'en-tête en cours de réception
+        self._pax = {} # attributs pax qui s'appliquent au membre suivant
+        self._pax_data = None # contenu d'un en-tête pax en cours de réception
+        self._file = None # fichier en cours d'extraction
+        self._mtime = None
+        self._remaining = 0 # octets de contenu restant à recevoir pour le membre courant
+        self._padding = 0 # octets de remplissage qui suivent ce contenu
+        self._starts = [] # position du contenu de chaque fichier extrait dans l'archive
+        self._files = [] # (chemin, taille, date de modification) de chaque fichier extrait
+        self._written = set() # chemins des fichiers écrits depuis la dernière synchronisation
+        self._headers = [] # position de chaque en-tête lu
+        self._states = [] # attributs pax en vigueur et nombre de fichiers extraits avant chaque en-tête (voir rewind)
+        self._ended = False # True une fois le bloc de fin reçu, ou après un en-tête invalide
+        self._invalid = None # position du premier en-tête invalide
+
+    def write(self, data):
+        import tarfile
+        with memoryview(data) as view:
+            view = view.cast("B")
+            i = 0
+            while i < len(view):
+                if self._remaining:
+                    n = min(self._remaining, len(view) - i)
+                    if self._file is not None:
+                        self._file.write(view[i:i + n])
+                    elif self._pax_data is not None:
+                        self._pax_data += view[i:i + n]
+                    self._remaining -= n
+                    if not self._remaining:
+                        self.end_member()
+                elif self._padding or self._ended:
+                    n = min(self._padding, len(view) - i) if not self._ended else len(view) - i
+                    self._padding -= n if not self._ended else 0
+                else:
+                    n = min(tarfile.BLOCKSIZE - len(self._header), len(view) - i)
+                    self._header += view[i:i + n]
+                    if len(self._header) == tarfile.BLOCKSIZE:
+                        self._position += n
+                        i += n
+                        self.read_header(bytes(self._header))
+                        self._header.clear()
+                        continue
+                self._position += n
+                i += n
+
+    def read_header(self, block: bytes):
+        import tarfile
+        self._headers.append(self._position - tarfile.BLOCKSIZE)
+        self._states.append((self._pax, len(self._files)))
+        if block == bytes(tarfile.BLOCKSIZE): # fin de l'archive
+            self._ended = True
+            return
+        try:
+            info = tarfile.TarInfo.frombuf(block, "utf-8", "surrogateescape")
+            size = int(self._pax.get("size", info.size))
+        except (tarfile.HeaderError, ValueError) as error:
+            logger.warning("Invalid tar header at offset %d: %s", self._position - tarfile.BLOCKSIZE, error)
+            self._ended = True
+            self._invalid = self._position - tarfile.BLOCKSIZE
+            return
+        self._remaining = size
+        self._padding = -size % tarfile.BLOCKSIZE
+        if info.type == tarfile.XHDTYPE: # attributs (nom long, grande taille...) du membre suivant
+            self._pax_data = bytearray()
+        elif info.type != tarfile.XGLTYPE:
+            name = self._pax.get("path", info.name).rstrip("/")
+            self._pax = {}
+            try:
+                check_relative_path(name)
+            except ValueError as error:
+                logger.warning(error)
+            else:
+                path = os.path.join(self._root, *name.split("/"))
+                if info.type == tarfile.DIRTYPE:
+                    os.makedirs(path, exist_ok=True)
+                elif info.type in tarfile.REGULAR_TYPES:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    self._file = open(path, "wb", buffering=self._buffer_size)
+                    self._written.add(path)
+                    self._mtime = info.mtime
+                    self._starts.append(self._position)
+                    self._files.append((path, size, info.mtime))
+        if not self._remaining:
+            self.end_member()
+
+    def end_member(self):
+        if self._file is not None:
+            self._file.close()
+            os.utime(self._file.name, (self._mtime, self._mtime))
+            self._file = None
+        if self._pax_data is not None:
+            self._pax = parse_pax(bytes(self._pax_data))
+            self._pax_data = None
+
+    def write_at(self, offset: int, data) -> int:
+        """
+        Réécrit data à la position offset de l'archive et renvoie le nombre d'octets écrits. Ce qui dépasse la partie
+        extraite (après rewind) est extrait comme par write.
+        """
+        with memoryview(data) as view:
+            view = view.cast("B")
+            if offset > self._position:
+                raise ValueError(f"write of {len(view)} bytes at offset {offset} is beyond the extracted part of the archive")
+            if offset + len(view) > self._position:
+                extracted = self._position - offset
+                self.write_at(offset, view[:extracted])
+                self.write(view[extracted:])
+                return len(view)
+            self.flush(sync=False)
+            index = max(bisect.bisect_right(self._starts, offset) - 1, 0)
+            while index < len(self._starts) and self._starts[index] < offset + len(view):
+                path, size, mtime = self._files[index]
+                start, end = max(offset, self._starts[index]), min(offset + len(view), self._starts[index] + size)
+                if start < end:
+                    with open(path, "r+b") as file:
+                        file.seek(start - self._starts[index])
+                        file.write(view[start - offset:end - offset])
+                    os.utime(path, (mtime, mtime))
+                    self._written.add(path)
+                index += 1
+            return len(view)
+
+    def is_content(self, start: int, end: int) -> bool:
+        """
+        Indique si la plage [start, end) de l'archive est entièrement dans le contenu d'un fichier extrait.
+        """
+        index = bisect.bisect_right(self._starts, start) - 1
+        return index >= 0 and end <= self._starts[index] + self._files[index][1]
+
+    def rewind(self, ranges: list[tuple[int, int]]) -> int | None:
+        """
+        Prépare la réception à nouveau des plages corrompues ranges ([début, fin) de l'archive). Si l'une d'elles contient
+        autre chose que le contenu de fichiers extraits (en-tête, attributs pax, remplissage, fin de l'archive), ou si
+        l'extraction s'est arrêtée sur un en-tête invalide, l'extraction est ramenée au dernier en-tête qui précède le
+        premier octet concerné : les fichiers décrits à partir de cet en-tête seront extraits à nouveau.
+        Renvoie la position de cet en-tête, à partir de laquelle toute la suite de l'archive doit être reçue, ou None.
+        """
+        positions = [start for start, end in ranges if not self.is_content(start, end)]
+        if self._invalid is not None:
+            positions.append(self._invalid)
+        if not positions:
+            return None
+        index = bisect.bisect_right(self._headers, min(positions)) - 1
+        position, (pax, count) = (self._headers[index], self._states[index]) if index >= 0 else (0, ({}, 0))
+        index = max(index, 0)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        del self._headers[index:], self._states[index:], self._starts[count:], self._files[count:]
+        self._position = position
+        self._header.clear()
+        self._pax = pax
+        self._pax_data = None
+        self._remaining = self._padding = 0
+        self._ended = False
+        self._invalid = None
+        return position
+
+    def flush(self, sync: bool = True):
+        """
+        Vide le tampon du fichier en cours et, si sync est à True, force l'écriture sur le disque des fichiers écrits depuis
+        la dernière synchronisation (un fsync par fichier : les autres systèmes de fichiers ne sont pas concernés).
+        """
+        if self._file is not None:
+            self._file.flush()
+        if sync:
+            for path in self._written:
+                if self._file is not None and self._file.name == path:
+                    os.fsync(self._file.fileno())
+                else:
+                    fsync_path(path)
+            self._written.clear()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def parse_pax(data: bytes) -> dict:
+    """
+    Lit les enregistrements "longueur clé=valeur\n" d'un en-tête pax.
+    """
+    attributes = {}
+    position = 0
+    while position < len(data):
+        length, separator, _ = data[position:position + 20].partition(b" ")
+        if not separator or not length.isdigit() or int(length) <= 0:
+            break
+        record = data[position + len(length) + 1:position + int(length) - 1]
+        key, _, value = record.partition(b"=")
+        attributes[key.decode("utf-8", "surrogateescape")] = value.decode("utf-8", "surrogateescape")
+        position += int(length)
+    return attributes
+
+def check_relative_path(path: str):
+    """
+    Lève ValueError si path (séparateur "/") n'est pas un chemin relatif qui reste dans le dossier de destination.
+    """
+    parts = path.split("/")
+    if path.startswith("/") or "\\" in path or any(part in ("", ".", "..") for part in parts) or ":" in parts[0]:
+        raise ValueError(f"Unsafe file path: {path}")
+
+def open_source(source: str | FileSet | TarArchive):
+    """
+    Ouvre en lecture sans tampon un fichier (chemin), un FileSet ou une TarArchive.
+    """
+    return open(source, "rb", buffering=0) if isinstance(source, str) else source.open()
+
+def source_size(source: str | FileSet | TarArchive) -> int:
+    return os.path.getsize(source) if isinstance(source, str) else source.size()
+
+def split_ranges(filesize: int, streams: int) -> list[tuple[int, int]]:
+    """
+    Découpe un fichier de filesize octets en au plus streams plages [début, fin) contiguës, envoyées en parallèle.
+    Les plages commencent à un multiple de STRIPE_ALIGNMENT : un petit fichier est découpé en moins de plages.
+    L'émetteur et le récepteur appellent cette fonction avec les mêmes arguments pour obtenir les mêmes plages.
+    """
+    if streams <= 1 or filesize <= STRIPE_ALIGNMENT:
+        return [(0, filesize)]
+    size = -(-filesize // streams) # arrondi supérieur
+    size = -(-size // STRIPE_ALIGNMENT) * STRIPE_ALIGNMENT
+    return [(start, min(start + size, filesize)) for start in range(0, filesize, size)]
+
+def available_codecs() -> list[str]:
+    """
+    Renvoie les codecs de compression utilisables (zstd nécessite le paquet zstandard).
+    """
+    return ["zlib", "zstd"] if zstandard is not None else ["zlib"]
+
+class Compressor:
+    """
+    Compresse un stream chunk par chunk avec le codec donné ("zlib" ou "zstd").
+    Chaque chunk compressé est vidé (sync flush) : il peut être décompressé dès sa réception et sa taille décompressée
+    est celle du chunk lu, ce qui borne la mémoire utilisée par le Decompressor.
+    """
+    LEVELS = { "zlib": 1, "zstd": 3 } # niveaux privilégiant la vitesse
+
+    def __init__(self, codec: str):
+        import zlib
+        if codec == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=self.LEVELS[codec]).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        elif codec == "zlib":
+            self._compressor = zlib.compressobj(self.LEVELS[codec])
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+        else:
+            raise ValueError(f"Unknown codec: {codec}")
+
+    def compress(self, data) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(self._flush_mode)
+
+class Decompressor:
+    """
+    Décompresse un stream produit par un Compressor du même codec.
+    decompress() lève ValueError si les données reçues sont altérées.
+    """
+    def __init__(self, codec: str):
+        import zlib
+        if codec == "zstd":
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+            self._error = zstandard.ZstdError
+        elif codec == "zlib":
+            self._decompressor = zlib.decompressobj()
+            self._error = zlib.error
+        else:
+            raise ValueError(f"Unknown codec: {codec}")
+
+    def decompress(self, data) -> bytes:
+        try:
+            return self._decompressor.decompress(data)
+        except self._error as error:
+            raise ValueError(f"Corrupted compressed data: {error}") from error
+
+def choose_codec(filepath: str | FileSet | TarArchive, codec: str, sample_size: int = COMPRESSION_SAMPLE_SIZE, min_ratio: float = COMPRESSION_MIN_RATIO):
+    """
+    Renvoie codec si la compression vaut la peine pour ce fichier, None sinon.
+    Des échantillons du début, du milieu et de la fin du fichier sont compressés : si la taille compressée dépasse min_ratio
+    fois la taille d'origine (données déjà compressées, médias...), le fichier est envoyé tel quel.
+    """
+    if codec is None:
+        return None
+    filesize = source_size(filepath)
+    if filesize == 0:
+        return None
+    compressor = Compressor(codec)
+    raw = compressed = 0
+    sample = bytearray(min(sample_size, filesize))
+    with open_source(filepath) as file:
+        for position in sorted({0, max(0, filesize // 2 - sample_size // 2), max(0, filesize - sample_size)}):
+            file.seek(position)
+            n = file.readinto(sample)
+            raw += n
+            compressed += len(compressor.compress(sample[:n]))
+    return codec if compressed <= raw * min_ratio else None
+
+def new_hasher(algorithm: str = DIGEST_ALGORITHM):
+    """
+    Renvoie un objet hashlib pour l'empreinte d'une plage du fichier.
+    """
+    import hashlib
+    return hashlib.new(algorithm)
+
+def hash_range(filepath: str | FileSet | TarArchive, start: int, end: int, hasher, buffer_size: int = WRITE_BUFFER_SIZE):
+    """
+    Ajoute à hasher (objet hashlib ou BlockHasher) les octets [start, end) du fichier. Utilisé seulement à la reprise d'une
+    plage, pour reprendre les empreintes des octets transférés auparavant.
+    """
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with open_source(filepath) as file:
+        file.seek(start)
+        while start < end:
+            n = file.readinto(view[:min(buffer_size, end - start)])
+            if not n:
+                raise OSError(f"{filepath} is shorter than expected")
+            hasher.update(view[:n])
+            start += n
+
+class BlockHasher:
+    """
+    Calcule l'empreinte de chaque bloc de block_size octets (aligné sur le début du fichier) de la plage [start, end),
+    au fil des octets reçus par update(). start doit être aligné sur un bloc ; le dernier bloc de la plage peut être plus court.
+    Les empreintes terminées sont accumulées jusqu'à ce qu'elles soient récupérées par take().
+    """
+    def __init__(self, start: int, end: int, block_size: int = MANIFEST_BLOCK_SIZE):
+        self._block_size = block_size
+        self._end = end
+        self._position = start
+        self._hasher = new_hasher()
+        self._first = start // block_size # numéro de la première empreinte en attente
+        self._leaves = [] # empreintes terminées, en attente de take()
+        if start == end == 0: # fichier vide : un seul bloc, vide
+            self._leaves.append(self._hasher.hexdigest())
+
+    def update(self, data):
+        view = memoryview(data)
+        while len(view):
+            n = min(len(view), self._block_size - self._position % self._block_size)
+            self._hasher.update(view[:n])
+            self._position += n
+            view = view[n:]
+            if self._position % self._block_size == 0 or self._position == self._end: # fin du bloc
+                self._leaves.append(self._hasher.hexdigest())
+                self._hasher = new_hasher()
+
+    def pending(self) -> int:
+        return len(self._leaves)
+
+    def take(self, limit: int = None) -> tuple[int, list[str]]:
+        """
+        Renvoie le numéro du premier bloc et au plus limit empreintes terminées depuis le dernier appel.
+        """
+        limit = limit if limit is not None else len(self._leaves)
+        first, leaves = self._first, self._leaves[:limit]
+        self._leaves = self._leaves[limit:]
+        self._first += len(leaves)
+        return first, leaves
+
+def complete_blocks(start: int, end: int, position: int, block_size: int = MANIFEST_BLOCK_SIZE) -> int:
+    """
+    Renvoie le nombre de blocs de la plage [start, end) (start aligné sur un bloc) entièrement compris dans [start, position).
+    """
+    count = (position - start) // block_size
+    if position >= end and (end - start) % block_size: # dernier bloc, plus court
+        count += 1
+    return count
+
+def merkle_root(leaves: list[str]) -> str:
+    """
+    Renvoie la racine de l'arbre de Merkle dont les feuilles sont les empreintes (hexadécimales) données. Chaque nœud est
+    l'empreinte de la concaténation de ses deux fils ; un nœud sans frère remonte tel quel au niveau supérieur.
+    """
+    level = [bytes.fromhex(leaf) for leaf in leaves]
+    while len(level) > 1:
+        parents = []
+        for i in range(0, len(level) - 1, 2):
+            hasher = new_hasher()
+            hasher.update(b"\x01" + level[i] + level[i + 1]) # préfixe : un nœud ne peut pas être confondu avec une feuille
+            parents.append(hasher.digest())
+        if len(level) % 2:
+            parents.append(level[-1])
+        level = parents
+    return level[0].hex()
+
+class Manifest:
+    """
+    Empreintes de chaque bloc d'un fichier : celles publiées par l'émetteur (expected) et celles calculées à la réception
+    (received). Les blocs sont comparés dès que les deux empreintes sont connues : un bloc corrompu est repéré au moment
+    où il arrive, et seuls les blocs corrompus doivent être renvoyés (voir bad_ranges).
+    """
+    def __init__(self, filesize: int, block_size: int = MANIFEST_BLOCK_SIZE):
+        self._filesize = filesize
+        self._block_size = block_size
+        count = max(1, -(-filesize // block_size)) # un fichier vide a un bloc vide
+        self._expected = [None] * count
+        self._received = [None] * count
+        self._bad = set() # numéros des blocs dont les empreintes diffèrent
+
+    def block_size(self) -> int:
+        return self._block_size
+
+    def set_expected(self, first: int, leaves: list[str]):
+        for index, leaf in enumerate(leaves, first):
+            self._expected[index] = leaf
+            self.compare(index)
+
+    def set_received(self, first: int, leaves: list[str]):
+        for index, leaf in enumerate(leaves, first):
+            self._received[index] = leaf
+            self.compare(index)
+
+    def compare(self, index: int):
+        if self._expected[index] is None or self._received[index] is None:
+            return
+        if self._expected[index] == self._received[index]:
+            self._bad.discard(index)
+        else:
+            self._bad.add(index)
+
+    def expected(self, first: int = 0, count: int = None) -> list[str]:
+        return self._expected[first:first + count if count is not None else None]
+
+    def received(self, first: int = 0, count: int = None) -> list[str]:
+        return self._received[first:first + count if count is not None else None]
+
+    def root(self) -> str | None:
+        """
+        Renvoie la racine de Merkle des empreintes publiées, ou None s'il en manque.
+        """
+        if None in self._expected:
+            return None
+        return merkle_root(self._expected)
+
+    def bad_ranges(self) -> list[tuple[int, int]]:
+        """
+        Renvoie les plages [start, end) à renvoyer : blocs corrompus consécutifs regroupés.
+        """
+        ranges = []
+        for index in sorted(self._bad):
+            start, end = index * self._block_size, min((index + 1) * self._block_size, self._filesize)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+def checkpoint_path(filepath: str) -> str:
+    """
+    Renvoie le chemin du fichier de reprise associé au fichier reçu filepath.
+    """
+    return filepath + CHECKPOINT_SUFFIX
+
+def write_checkpoint(filepath: str, infos: dict):
+    """
+    Enregistre à côté du fichier partiellement reçu les informations qui permettront de reprendre le transfert
+    (nom et taille du fichier, position atteinte par chaque stream). L'écriture est atomique : le fichier de reprise n'est jamais tronqué.
+    """
+    path = checkpoint_path(filepath)
+    with open(path + ".tmp", "w") as file:
+        json.dump(infos, file)
+    os.replace(path + ".tmp", path)
+
+def read_checkpoint(filepath: str):
+    """
+    Renvoie les informations enregistrées par write_checkpoint, ou None si le fichier de reprise est absent ou illisible.
+    """
+    try:
+        with open(checkpoint_path(filepath)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def remove_checkpoint(filepath: str):
+    for path in (checkpoint_path(filepath), filepath + LEAVES_SUFFIX):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def write_leaves(filepath: str, first: int, leaves: list[str]):
+    """
+    Enregistre à côté du fichier partiellement reçu les empreintes des blocs first, first + 1, etc. : chaque empreinte
+    occupe sa place (numéro du bloc × taille d'une empreinte) dans le fichier des empreintes, seules les nouvelles
+    empreintes sont donc écrites à chaque enregistrement. À appeler avant write_checkpoint, qui en fixe la validité.
+    """
+    path = filepath + LEAVES_SUFFIX
+    with open(path, "r+b" if os.path.exists(path) else "wb") as file:
+        file.seek(first * new_hasher().digest_size)
+        file.write(b"".join(bytes.fromhex(leaf) for leaf in leaves))
+
+def read_leaves(filepath: str, first: int, count: int) -> list[str] | None:
+    """
+    Renvoie les empreintes des blocs [first, first + count) enregistrées par write_leaves, ou None si elles n'y sont pas toutes.
+    """
+    size = new_hasher().digest_size
+    try:
+        with open(filepath + LEAVES_SUFFIX, "rb") as file:
+            file.seek(first * size)
+            data = file.read(count * size)
+    except OSError:
+        return None
+    if len(data) < count * size:
+        return None
+    return [data[i:i + size].hex() for i in range(0, len(data), size)]
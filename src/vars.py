@@ -1,6 +1,39 @@
+import os
+
 CONFLICT = 409
 UNAUTHORIZED = 401
 NOT_FOUND = 404
-SERVER_DOMAIN = "wss://chat-server-21.deno.dev"
+SERVER_DOMAIN = os.environ.get("NSI_SERVER_DOMAIN", "wss://chat-server-21.deno.dev") # remplaçable par la variable d'environnement NSI_SERVER_DOMAIN ou l'option --server
 STYLES_PATH = "src/styles"
-MAXIMUM_ALIAS_LENGTH = 50
\ No newline at end of file
+MAXIMUM_ALIAS_LENGTH = 50
+UPLOAD_HIGH_WATERMARK = 8 * 1024 * 1024 # au-delà de ce nombre d'octets en attente dans le socket, l'émetteur arrête de lire le fichier
+UPLOAD_LOW_WATERMARK = 2 * 1024 * 1024 # la lecture reprend quand le tampon du socket redescend sous ce seuil
+CHUNK_SIZE = 256 * 1024 # taille initiale des chunks envoyés
+CHUNK_SIZE_MIN = 64 * 1024 # bornes de la taille adaptative des chunks
+CHUNK_SIZE_MAX = 4 * 1024 * 1024
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024 # taille du tampon d'écriture du fichier reçu
+WRITE_QUEUE_SIZE = 32 * 1024 * 1024 # nombre maximal d'octets en attente d'écriture quand l'écriture se fait dans un thread dédié
+PROGRESS_INTERVAL = 50 # intervalle (en ms) entre deux mises à jour de la progression d'un transfert (20 Hz)
+CHECKPOINT_SUFFIX = ".nsi-checkpoint" # extension du fichier qui enregistre la progression d'un fichier partiellement reçu
+LEAVES_SUFFIX = ".nsi-leaves" # extension du fichier qui enregistre les empreintes des blocs d'un fichier partiellement reçu
+CHECKPOINT_INTERVAL = 64 * 1024 * 1024 # nombre d'octets reçus entre deux enregistrements de la progression
+RECONNECT_DELAY = 1000 # délai (en ms) avant de rouvrir un stream interrompu, multiplié par le numéro de la tentative
+RECONNECT_ATTEMPTS = 5 # nombre de tentatives de reconnexion d'un stream interrompu
+TRANSFER_STREAMS = 1 # nombre de streams parallèles utilisés par défaut pour envoyer un fichier
+STRIPE_ALIGNMENT = 1024 * 1024 # les plages envoyées en parallèle commencent à un multiple de cette taille
+COMPRESSION = None # codec de compression utilisé par défaut pour les transferts ("zlib", "zstd" ou None)
+COMPRESSION_SAMPLE_SIZE = 64 * 1024 # taille des échantillons compressés pour décider si un fichier est compressible
+COMPRESSION_MIN_RATIO = 0.9 # le fichier est envoyé sans compression si les échantillons ne descendent pas sous ce ratio
+DIGEST_ALGORITHM = "sha256" # algorithme (hashlib) de l'empreinte calculée pendant le transfert pour vérifier le fichier reçu (accéléré matériellement sur la plupart des processeurs)
+MANIFEST_BLOCK_SIZE = 1024 * 1024 # taille des blocs dont l'empreinte est publiée dans le manifeste (STRIPE_ALIGNMENT doit en être un multiple)
+MANIFEST_BATCH = 64 # nombre d'empreintes de blocs par message TRANSACTION_MANIFEST
+REPAIR_ATTEMPTS = 3 # nombre de fois où le récepteur redemande les blocs corrompus avant d'abandonner
+LOCAL_SERVER_PORT = 8765 # port par défaut du serveur local (server.py)
+LOCAL_SERVER_WINDOW = 1024 * 1024 # nombre maximal d'octets en transit sur un stream binaire du serveur local (fenêtre d'une connexion)
+MAX_TRANSFERS = 2 # nombre de transferts (envois et réceptions) qui se déroulent en même temps, les suivants attendent dans une file
+UPLOAD_RATE_LIMIT = None # débit maximal (octets/s) de l'ensemble des envois, partagé entre les transferts en cours (None : pas de limite)
+DOWNLOAD_RATE_LIMIT = None # idem pour les réceptions
+RATE_LIMIT_BURST = 0.05 # réserve (en secondes de débit) d'un transfert limité : au-delà, l'envoi attend
+MESSAGE_SCROLLBACK = 10000 # nombre de lignes conservées dans le fil d'un salon, les plus anciennes sont retirées au-delà
+MESSAGE_FLUSH_INTERVAL = 16 # intervalle (en ms) entre deux ajouts des messages reçus au fil d'un salon (environ une image à 60 Hz)
+MESSAGE_BATCH_MAX = 2000 # nombre maximal de messages ajoutés au fil à chaque intervalle, les suivants attendent l'intervalle suivant
\ No newline at end of file